@@ -0,0 +1,351 @@
+#!/usr/bin/python
+# Benchmarks for drafting, rendering, pdf tiling and piece detection.
+#
+# Results are written as JSON (one file per commit by default) so two runs can be
+# compared with --compare to spot regressions.
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError: # Windows
+    resource = None
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DRAFTING_DIR = os.path.join(REPO_ROOT, "patternDrafting")
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, DRAFTING_DIR)
+
+import cv2 as cv
+import numpy as np
+import yaml
+
+import draftBatwingTop
+import draftBodiceSloper
+from util.draw import draw_pattern
+from util.garment_specs import GarmentSpecs
+from util.instrumentation import disable_profiling, enable_profiling
+from util.measurements import Measurements
+from util.render_context import get_context
+from pdfManagement.convertImageToMultiPagePdf import divide_image, export_multi_page_pdf, inches_from_format_name
+from visionComponents.getIndividualPieces import find_pieces
+
+SAMPLE_MEASUREMENTS = os.path.join(DRAFTING_DIR, "measurements", "sample_measurements.yaml")
+SAMPLE_SPECS = os.path.join(DRAFTING_DIR, "garmentSpecs", "sample_garment_specs.yaml")
+RESULTS_DIR = os.path.join(REPO_ROOT, "benchmarks", "results")
+# Canvas modes measured besides the default color canvas, see util/canvas.py
+COMPACT_CANVASES = ("gray", "bilevel")
+
+DRAFTS = {
+    "bodice-sloper": draftBodiceSloper.draft,
+    "batwing-top": draftBatwingTop.draft,
+}
+
+
+def _peak_alloc_mb(fn):
+    """
+    Runs `fn` once under tracemalloc and returns the peak of the memory it
+    allocated on top of what was already live, in MB. numpy arrays, including
+    those OpenCV returns, are counted; OpenCV's internal scratch buffers are not.
+    """
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return (peak - base) / (1024 * 1024)
+
+
+def _max_rss_mb():
+    """Returns the peak resident set size of this process so far, in MB."""
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return max_rss / (1024 * 1024) if sys.platform == "darwin" else max_rss / 1024
+
+
+def _peak_rss_mb(fn, setup=None):
+    """
+    Runs `fn` in a forked child and returns the child's peak resident set size
+    before and after the run, in MB. Unlike tracemalloc this counts OpenCV's and
+    numpy's native allocations, and a fresh process keeps the peaks of earlier
+    stages out of the figure. The child starts with the pages of this process,
+    so the growth is what the stage itself needs. Returns (None, None) where
+    fork or getrusage are not available.
+    """
+    if resource is None or not hasattr(os, "fork"):
+        return None, None
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        status = 1
+        try:
+            os.close(read_fd)
+            arg = setup() if setup else None
+            base = _max_rss_mb()
+            fn(arg) if setup else fn()
+            with os.fdopen(write_fd, "w") as pipe:
+                json.dump([base, _max_rss_mb()], pipe)
+            status = 0
+        finally:
+            os._exit(status)
+    os.close(write_fd)
+    with os.fdopen(read_fd) as pipe:
+        output = pipe.read()
+    _, status = os.waitpid(pid, 0)
+    if status != 0:
+        raise RuntimeError(f"Measuring the peak RSS failed (wait status {status}).")
+    return tuple(json.loads(output))
+
+
+def _git_commit():
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+        return result.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+class BenchmarkRun:
+    """Times benchmark stages and collects the results."""
+
+    def __init__(self, repeat):
+        self.repeat = repeat
+        self.results = []
+
+    def measure(self, stage, fn, setup=None, **params):
+        """
+        Runs `fn` `repeat` times and records its wall times and the total time
+        spent in each instrumented span, then once more untimed to record the
+        peak memory it allocates and once in a forked child for its peak RSS.
+        `setup` is called before each run and its return value passed to `fn`,
+        so per-run preparation is excluded from the timing and the memory peak.
+        """
+        times = []
+        breakdown = {}
+        for _ in range(self.repeat):
+            arg = setup() if setup else None
+            collector = enable_profiling()
+            try:
+                start = time.perf_counter()
+                fn(arg) if setup else fn()
+                times.append(time.perf_counter() - start)
+            finally:
+                disable_profiling(collector)
+            for name, stats in collector.summary()["spans"].items():
+                breakdown.setdefault(name, []).append(stats["total"])
+        arg = setup() if setup else None
+        peak_alloc_mb = _peak_alloc_mb(lambda: fn(arg) if setup else fn())
+        base_rss_mb, peak_rss_mb = _peak_rss_mb(fn, setup)
+
+        result = {
+            "stage": stage,
+            "params": params,
+            "wall_s": times,
+            "min_s": min(times),
+            "median_s": statistics.median(times),
+            "peak_alloc_mb": round(peak_alloc_mb, 1),
+            "peak_rss_mb": None if peak_rss_mb is None else round(peak_rss_mb, 1),
+            "rss_growth_mb": None if peak_rss_mb is None else round(peak_rss_mb - base_rss_mb, 1),
+        }
+        if breakdown:
+            result["breakdown_s"] = {key: min(values) for key, values in breakdown.items()}
+        self.results.append(result)
+        param_str = ", ".join(f"{k}={v}" for k, v in params.items())
+        rss_str = "" if peak_rss_mb is None else f"   peak RSS {peak_rss_mb:.0f} MB (+{result['rss_growth_mb']:.0f})"
+        print(f"{stage:<16} {param_str:<40} min {result['min_s'] * 1000:9.2f} ms   peak alloc {result['peak_alloc_mb']:.0f} MB{rss_str}")
+        return result
+
+
+def synthetic_measurements(count, seed=0):
+    """
+    Generates measurement sets by scaling the sample measurements. Each set gets
+    one overall size factor plus small per-measurement noise so proportions stay
+    plausible.
+    """
+    with open(SAMPLE_MEASUREMENTS) as f:
+        base = yaml.safe_load(f)
+
+    rng = random.Random(seed)
+    sets = []
+    for _ in range(count):
+        size = rng.uniform(0.85, 1.15)
+        data = {
+            section: {key: value * size * rng.uniform(0.98, 1.02) for key, value in values.items()}
+            for section, values in base.items()
+        }
+        sets.append(Measurements(**data))
+    return sets
+
+
+def draft_pieces(draft_name, measurement_sets, garment_specs):
+    pieces = []
+    for measurements in measurement_sets:
+        pieces.extend(DRAFTS[draft_name](measurements, garment_specs))
+    return pieces
+
+
+def generate_a0_image(dpi, piece_count=12, seed=0):
+    """Draws dashed piece outlines on a white A0 sized image."""
+    width_in, height_in = inches_from_format_name("a0")
+    img = np.full((round(height_in * dpi), round(width_in * dpi), 3), 255, dtype=np.uint8)
+    rng = np.random.default_rng(seed)
+    columns = 3
+    rows = -(-piece_count // columns)
+    cell_w, cell_h = img.shape[1] // columns, img.shape[0] // rows
+    for i in range(piece_count):
+        cx = (i % columns) * cell_w + cell_w // 2
+        cy = (i // columns) * cell_h + cell_h // 2
+        angles = np.sort(rng.uniform(0, 2 * np.pi, 9))
+        radii = rng.uniform(0.3, 0.45, 9) * min(cell_w, cell_h)
+        points = np.stack((cx + radii * np.cos(angles), cy + radii * np.sin(angles)), axis=-1).astype(np.int32)
+        cv.polylines(img, [points], True, (0, 0, 0), max(1, dpi // 25))
+        # Dashed seam line inset from the cut line
+        inner = ((points - (cx, cy)) * 0.9 + (cx, cy)).astype(np.int32)
+        for a, b in zip(inner, np.roll(inner, -1, axis=0)):
+            for t in np.arange(0, 1, 0.1):
+                p1 = a + (b - a) * t
+                p2 = a + (b - a) * min(t + 0.05, 1)
+                cv.line(img, tuple(int(v) for v in p1), tuple(int(v) for v in p2), (0, 0, 0), max(1, dpi // 50))
+    return img, (width_in, height_in)
+
+
+def run(args):
+    bench = BenchmarkRun(args.repeat)
+    garment_specs = GarmentSpecs.from_file(SAMPLE_SPECS)
+    sample = Measurements.from_file(SAMPLE_MEASUREMENTS)
+    batch = synthetic_measurements(args.batch_size)
+
+    # --- Drafting ---
+    for draft_name, draft in DRAFTS.items():
+        bench.measure("draft", lambda d=draft: d(sample, garment_specs), draft=draft_name, sets=1)
+        bench.measure("draft", lambda d=draft: [d(m, garment_specs) for m in batch], draft=draft_name, sets=len(batch))
+
+    pieces = draft_pieces("bodice-sloper", [sample], garment_specs) + draft_pieces("batwing-top", [sample], garment_specs)
+
+    # --- Curve evaluation ---
+    smooth_lines = [line for piece in pieces for line in piece.pattern_lines + piece.body_lines if line.smooth]
+    bench.measure("render_points", lambda: [line.get_render_points() for line in smooth_lines], lines=len(smooth_lines))
+
+    # --- Per piece finishing ---
+    def fresh_pieces():
+        for piece in pieces:
+            piece.cut_lines = []
+        return pieces
+
+    for dpi in args.dpis:
+        bench.measure(
+            "seam_allowance",
+            lambda ps, d=dpi: [p.add_seam_allowance(garment_specs.seam_allowance, scale=d) for p in ps],
+            setup=fresh_pieces, dpi=dpi, pieces=len(pieces),
+        )
+    for dpi in args.dpis:
+        bench.measure(
+            "label_box",
+            lambda ps, d=dpi: [p.get_label_box(scale=d) for p in ps],
+            setup=fresh_pieces, dpi=dpi, pieces=len(pieces),
+        )
+
+    # --- Rendering and pdf tiling ---
+    page_size = inches_from_format_name("letter")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for piece_sets in args.piece_sets:
+            layout_pieces = draft_pieces("bodice-sloper", batch[:piece_sets], garment_specs)
+            for dpi in args.dpis:
+                output = os.path.join(tmp_dir, "pattern.png")
+                bench.measure(
+                    "draw_pattern",
+                    lambda d=dpi, ps=layout_pieces: draw_pattern(d, ps, garment_specs.seam_allowance, output, "Benchmark"),
+                    dpi=dpi, pieces=len(layout_pieces),
+                )
+                image = cv.imread(output)
+                size_in = (image.shape[1] / dpi, image.shape[0] / dpi)
+                bench.measure(
+                    "divide_image",
+                    lambda img=image, s=size_in: divide_image(img, (page_size[0] * 72, page_size[1] * 72), s),
+                    dpi=dpi, pieces=len(layout_pieces),
+                )
+                bench.measure(
+                    "export_pdf",
+                    lambda img=image, s=size_in: export_multi_page_pdf(img, page_size, s, os.path.join(tmp_dir, "pattern.pdf"), True),
+                    dpi=dpi, pieces=len(layout_pieces),
+                )
+                del image
+                for canvas in COMPACT_CANVASES:
+                    context = get_context(profile="production")._replace(canvas=canvas)
+                    bench.measure(
+                        "draw_pattern",
+                        lambda d=dpi, ps=layout_pieces, c=context: draw_pattern(d, ps, garment_specs.seam_allowance, output, "Benchmark", context=c),
+                        dpi=dpi, pieces=len(layout_pieces), canvas=canvas,
+                    )
+
+    # --- Vision ---
+    for dpi in args.scan_dpis:
+        image, size_in = generate_a0_image(dpi)
+        bench.measure("find_pieces", lambda img=image, s=size_in: find_pieces(img, s), dpi=dpi, size="a0")
+        del image
+
+    return bench.results
+
+
+def compare(results, baseline_path, threshold):
+    """Prints stages that got slower than the baseline by more than `threshold`."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+
+    key = lambda r: (r["stage"], json.dumps(r["params"], sort_keys=True))
+    previous = {key(r): r for r in baseline["results"]}
+    regressions = 0
+    for result in results:
+        old = previous.get(key(result))
+        if old is None:
+            continue
+        change = result["min_s"] / old["min_s"] - 1 if old["min_s"] else 0
+        marker = "REGRESSION" if change > threshold else ""
+        if change > threshold:
+            regressions += 1
+        print(f"{result['stage']:<16} {json.dumps(result['params']):<50} {old['min_s'] * 1000:9.2f} -> {result['min_s'] * 1000:9.2f} ms ({change:+.0%}) {marker}")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks drafting, rendering, pdf export and piece detection.")
+    parser.add_argument("--dpis", type=int, nargs="+", default=[50, 100, 200], help="Render resolutions (pixels per inch)")
+    parser.add_argument("--piece-sets", type=int, nargs="+", default=[1, 4], help="Numbers of drafted bodices to lay out together")
+    parser.add_argument("--scan-dpis", type=int, nargs="+", default=[25, 50], help="Resolutions of the generated A0 scans")
+    parser.add_argument("--batch-size", type=int, default=50, help="Number of synthetic measurement sets")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement")
+    parser.add_argument("--output", "-o", help="Result file, defaults to benchmarks/results/<commit>.json")
+    parser.add_argument("--compare", "-c", metavar="BASELINE_JSON", help="Compare against an earlier result file")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Slowdown that counts as a regression (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    commit = _git_commit()
+    results = run(args)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump({
+            "commit": commit,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "config": vars(args),
+            "results": results,
+        }, f, indent=2)
+    print(f"Results written to {output}")
+
+    if args.compare and compare(results, args.compare, args.threshold):
+        sys.exit(1)
@@ -0,0 +1,57 @@
+#!/usr/bin/python
+# Measures the import time of the drafting-only path in a fresh interpreter and
+# checks that none of the heavy rendering, pdf or vision dependencies get loaded.
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+DRAFTING_MODULES = [
+  "draftBodiceSloper",
+  "draftBatwingTop",
+  "util.serialization",
+]
+HEAVY_MODULES = ["scipy", "cv2", "reportlab", "easyocr", "torch", "pdf2image"]
+DEFAULT_BUDGET_S = 0.5
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+for name in {modules!r}:
+  __import__(name)
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+def measure_import_time(modules=DRAFTING_MODULES, runs=3):
+  """
+  Imports `modules` in fresh interpreters and returns the fastest import time.
+
+  Returns:
+    A tuple of (seconds, list of heavy modules that were loaded as a side effect).
+  """
+  drafting_dir = os.path.dirname(os.path.abspath(__file__))
+  probe = _PROBE.format(modules=list(modules), heavy=HEAVY_MODULES)
+  best = None
+  loaded = []
+  for _ in range(runs):
+    result = subprocess.run([sys.executable, "-c", probe], cwd=drafting_dir, capture_output=True, text=True, check=True)
+    data = json.loads(result.stdout.strip().splitlines()[-1])
+    if best is None or data["seconds"] < best:
+      best = data["seconds"]
+    loaded = data["loaded"]
+  return best, loaded
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="Checks the import-time budget of the drafting-only code path.")
+  parser.add_argument("--budget", "-b", type=float, default=DEFAULT_BUDGET_S, help="Maximum import time in seconds")
+  parser.add_argument("--runs", "-r", type=int, default=3, help="Number of fresh interpreters to time")
+  args = parser.parse_args()
+
+  seconds, loaded = measure_import_time(runs=args.runs)
+  print(f"Drafting import time: {seconds * 1000:.1f} ms (budget {args.budget * 1000:.0f} ms)")
+  if loaded:
+    print(f"Heavy modules loaded at import: {', '.join(loaded)}")
+  if loaded or seconds > args.budget:
+    sys.exit(1)
@@ -4,12 +4,14 @@ from util.line import Line
 from util.pattern_piece import PatternPiece
 from util.measurements import Measurements
 from util.garment_specs import GarmentSpecs
+from util.instrumentation import timed
+from util.finishing import finish_pieces
+from util.render_context import get_context
 
-def _draft_bodice_half(name, measurements, garment_specs, neckline_depth_spec):
+def _draft_bodice_half(name, measurements, garment_specs, neckline_depth_spec, keep_drafting_lines=True):
   """Drafts a half bodice piece (either front or back)."""
   body_lines = []
   drafting_lines = []
-  pattern_lines = []
 
   # Draw drafting lines
   garm_length = measurements.shoulder_to_waist + garment_specs.waist_to_hem
@@ -18,7 +20,7 @@ def _draft_bodice_half(name, measurements, garment_specs, neckline_depth_spec):
   # Center front line (body)
   body_lines.append(Line.vertical(0, 0, garm_length))
   # Center front line (pattern)
-  pattern_lines.append(Line.vertical(0, neck_point, garm_length))
+  center_line = Line.vertical(0, neck_point, garm_length)
 
   # shoulder line
   shoulder_x = measurements.shoulders/2
@@ -27,7 +29,6 @@ def _draft_bodice_half(name, measurements, garment_specs, neckline_depth_spec):
   # neckline
   neckline_line, neckline_radius = garment_specs.create_bodice_neckline(name, 0)
   neckline_outside_x = neckline_radius
-  pattern_lines.append(neckline_line)
 
   body_lines.append(Line.horizontal(0, 0, shoulder_x))
 
@@ -62,14 +63,14 @@ def _draft_bodice_half(name, measurements, garment_specs, neckline_depth_spec):
   sleeve_edge_y = armpit_depth/2
   drafting_lines.append(Line.horizontal(sleeve_edge_y, 0, sleeve_edge_x))
 
-  pattern_lines.append(Line.horizontal(0, neckline_outside_x, shoulder_x))
+  shoulder_line = Line.horizontal(0, neckline_outside_x, shoulder_x)
 
   sleeve_width = garment_specs.cuff_ease + measurements.above_elbow_circumference
   cuff_top_y = sleeve_edge_y - sleeve_width/4
   cuff_bottom_y = sleeve_edge_y + sleeve_width/4
-  pattern_lines.append(Line.vertical(sleeve_edge_x, cuff_top_y, cuff_bottom_y))
+  cuff_line = Line.vertical(sleeve_edge_x, cuff_top_y, cuff_bottom_y)
 
-  pattern_lines.append(Line([(shoulder_x, 0), (sleeve_edge_x, cuff_top_y)]))
+  overarm_line = Line([(shoulder_x, 0), (sleeve_edge_x, cuff_top_y)])
 
   # Body Curve
   body_lines.append(Line([(upper_bust_x, upper_bust_y), (bust_x, bust_y), (waist_x, waist_y), (high_hip_x, high_hip_y), (hip_x, hip_y)], smooth=True))
@@ -81,48 +82,71 @@ def _draft_bodice_half(name, measurements, garment_specs, neckline_depth_spec):
   side_seam_line = Line([(sleeve_edge_x, cuff_bottom_y), (bust_x + bust_ease, bust_y), (waist_x + waist_ease, waist_y), (high_hip_x + hip_ease, high_hip_y), (hip_x + hip_ease, hip_y)], smooth=True)
   
   # Truncate the side seam so it ends at the hemline.
-  pattern_lines.append(side_seam_line.truncate_vertical(max_y=garm_length))
+  side_seam_line.truncate_vertical(max_y=garm_length)
   # Find the exact intersection point for the hem.
   hem_end_x = side_seam_line.get_x_for_y(garm_length)
-  pattern_lines.append(Line.horizontal(garm_length, 0, hem_end_x))
+  hem_line = Line.horizontal(garm_length, 0, hem_end_x)
 
   # Assemble the pattern piece
   piece = PatternPiece(name=name,
-                       body_lines=body_lines,
-                       drafting_lines=drafting_lines,
-                       pattern_lines=pattern_lines)
+                       body_lines=body_lines if keep_drafting_lines else None,
+                       drafting_lines=drafting_lines if keep_drafting_lines else None)
+  piece.set_outline([("Center", center_line),
+                     ("Neckline", neckline_line),
+                     ("Shoulder", shoulder_line),
+                     ("Overarm", overarm_line),
+                     ("Cuff", cuff_line),
+                     ("Side Seam", side_seam_line),
+                     ("Hem", hem_line)])
   piece.add_fold_line()
-  piece.add_seam_allowance(garment_specs.seam_allowance)
   return piece
 
-def draft(measurements, garment_specs):
+@timed("draft.batwing_top")
+def draft(measurements, garment_specs, finish=True, profile=None, context=None):
+  """
+  Drafts the front and back of a batwing top.
+
+  Args:
+    measurements: The Measurements to draft for.
+    garment_specs: The GarmentSpecs of the garment.
+    finish: Add the seam allowances and prepare the outlines and label boxes
+      of the pieces. Without this only the vector geometry is drafted.
+    profile: The RenderProfile, or its name, the pattern is drafted for.
+      Body and drafting lines are only kept if the profile draws them.
+      Defaults to the context's profile.
+    context: The RenderContext the pattern will be drawn with, DEFAULT_CONTEXT if None.
+  """
+  context = get_context(context, profile)
+  keep_drafting_lines = context.profile.drafting_lines
   pattern_pieces = []
 
   # Draft Front Piece
-  front_piece = _draft_bodice_half("Front", measurements, garment_specs, garment_specs.front_neckline_depth)
-  front_piece.add_seam_allowance(garment_specs.seam_allowance)
+  front_piece = _draft_bodice_half("Front", measurements, garment_specs, garment_specs.front_neckline_depth, keep_drafting_lines)
   pattern_pieces.append(front_piece)
 
   # Draft Back Piece
-  back_piece = _draft_bodice_half("Back", measurements, garment_specs, garment_specs.back_neckline_depth)
-  back_piece.add_seam_allowance(garment_specs.seam_allowance)
+  back_piece = _draft_bodice_half("Back", measurements, garment_specs, garment_specs.back_neckline_depth, keep_drafting_lines)
   pattern_pieces.append(back_piece)
-  
+
+  if finish:
+    finish_pieces(pattern_pieces, garment_specs.seam_allowance, context=context)
   return pattern_pieces
 
 if __name__ == "__main__":
   from util.draw import draw_pattern # Import here as it's only used in __main__
+  from util.render_profile import DEFAULT_PROFILE
   
   # Load measurements and garment specs from files
   measurements = Measurements.from_file('patternDrafting/measurements/sample_measurements.yaml')
   garment_specs = GarmentSpecs.from_file('patternDrafting/garmentSpecs/sample_garment_specs.yaml')
 
-  pattern_pieces = draft(measurements, garment_specs)
+  pattern_pieces = draft(measurements, garment_specs, profile=DEFAULT_PROFILE)
   
   draw_pattern(
       scale=100, # Pixels per inch
       pattern_pieces=pattern_pieces,
       seam_allowance=garment_specs.seam_allowance,
       output_filepath="testFiles/batwingDraft.png",
-      pattern_name="Batwing Top"
+      pattern_name="Batwing Top",
+      profile=DEFAULT_PROFILE,
   )
@@ -1,20 +1,42 @@
 from util.line import Line
+from util.curves import armscye_curve
 from util.pattern_piece import PatternPiece
 import math
 from util.measurements import Measurements
 from util.garment_specs import GarmentSpecs
 from util.dart import Dart
+from util.fit import DEFAULT_FIT
+from util.finishing import finish_pieces
+from util.render_context import get_context
+from util.seam_matching import SeamPair, true_seams
+from util.instrumentation import timed
+import logging
 
-DART_ROTATION_THRESHOLD = 1.0 # Inches of waist suppression below which darts are combined
+logger = logging.getLogger(__name__)
 
-def draft(measurements, garment_specs):
+@timed("draft.bodice_sloper")
+def draft(measurements, garment_specs, fit=None, finish=True, profile=None, context=None):
     """
     Drafts a two-dart bodice block based on provided measurements.
+
+    Args:
+        measurements: The Measurements to draft for.
+        garment_specs: The GarmentSpecs of the garment.
+        fit: FitParameters tuning dart placement, DEFAULT_FIT if None.
+        finish: Add the seam allowances and prepare the outlines and label boxes
+          of the pieces. Without this only the vector geometry is drafted,
+          which is much faster, e.g. for fit optimisation.
+        profile: The RenderProfile, or its name, the pattern is drafted for.
+          Body and drafting lines are only kept if the profile draws them.
+          Defaults to the context's profile.
+        context: The RenderContext the pattern will be drawn with, DEFAULT_CONTEXT if None.
     """
+    fit = fit or DEFAULT_FIT
+    context = get_context(context, profile)
+    keep_drafting_lines = context.profile.drafting_lines
     pattern_pieces = []
 
     # --- DRAFT FRONT BODICE ---
-    front_lines = []
     front_body_lines = []
     front_drafting_lines = []
     front_marking_lines = []
@@ -40,14 +62,13 @@ def draft(measurements, garment_specs):
     front_neckline, neckline_edge = garment_specs.create_bodice_neckline("Front", side_neck_rise)
     # Center Front Line
     front_neck_depth = garment_specs.front_neckline_depth
-    front_lines.append(Line.vertical(0, front_neck_depth, center_front_y))
-    front_lines.append(front_neckline)
+    center_front_line = Line.vertical(0, front_neck_depth, center_front_y)
 
     # Shoulder
     shoulder_slope_drop = side_neck_rise + measurements.shoulder_slope
     shoulder_point_x = neck_width + measurements.shoulder_length
     shoulder_point = (shoulder_point_x, shoulder_slope_drop)
-    front_lines.append(Line([(neckline_edge, side_neck_rise), (shoulder_point_x, shoulder_slope_drop)]))
+    front_shoulder_line = Line([(neckline_edge, side_neck_rise), (shoulder_point_x, shoulder_slope_drop)])
 
     # Armscye
     armscye_depth = measurements.shoulder_to_armpit - 1
@@ -64,15 +85,10 @@ def draft(measurements, garment_specs):
     # The top of the armscye is a straight line perpendicular to the shoulder seam.
     # TODO: The length of this straight part could be a specific measurement.
     armscye_straight_len = armscye_depth / 5
-    shoulder_line_front = Line([(neckline_edge, side_neck_rise), shoulder_point])
-    curve_start_point = shoulder_line_front.get_perpendicular_point(shoulder_point, armscye_straight_len)
 
-    # The third guide point is on a 1-inch diagonal from the chest/armscye corner.
-    # TODO: The 1-inch length could be a calculated proportion.
-    diagonal_guide_len = 0.5
-    guide_point_3 = (across_chest - diagonal_guide_len * math.cos(math.radians(45)), armscye_depth - diagonal_guide_len * math.sin(math.radians(45)))
-    armscye_points = [shoulder_point, curve_start_point, guide_point_3, (front_width, armscye_depth)]
-    front_lines.append(Line(armscye_points, smooth=True))
+    # The third guide point is on a short diagonal from the chest/armscye corner.
+    # TODO: The diagonal length could be a calculated proportion.
+    front_armscye = armscye_curve(front_shoulder_line, armscye_straight_len, (across_chest, armscye_depth), (front_width, armscye_depth))
 
     # Calculate total waist suppression needed for the front
     total_front_waist_suppression = front_width - (waist_circ / 4)
@@ -83,13 +99,12 @@ def draft(measurements, garment_specs):
 
     # Side Seam
     side_seam_line = Line([(front_width, armscye_depth), (front_width, front_bust_height), (front_waist_x, center_front_y)])
-    front_lines.append(side_seam_line)
     
     # Hem
     # The hemline should end exactly where it meets the side seam.
     # This should change to be curved in the future
     hem_end_x = side_seam_line.get_x_for_y(center_front_y)
-    front_lines.append(Line.horizontal(center_front_y, 0, hem_end_x))
+    front_hem_line = Line.horizontal(center_front_y, 0, hem_end_x)
 
     # Darts
     bust_point_x = measurements.bust_point_separation / 2
@@ -103,9 +118,9 @@ def draft(measurements, garment_specs):
 
     front_body_lines.append(Line.horizontal(bust_point_y, 0, front_width))
 
-    # Back the dart tip off from the bust apex for a better fit.
-    # We'll back it off by 20% of the distance from the apex to the side seam.
-    dart_back_off = (front_width - bust_point_x) * 0.20
+    # Back the dart tip off from the bust apex for a better fit, by a share
+    # (20% by default) of the distance from the apex to the side seam.
+    dart_back_off = (front_width - bust_point_x) * fit.dart_back_off
     dart_tip_x = bust_point_x + dart_back_off
     
     # Bust Dart (from side seam)
@@ -129,14 +144,26 @@ def draft(measurements, garment_specs):
     if waist_dart and waist_dart.leg1:
         front_marking_lines.append(waist_dart)
 
-    front_piece = PatternPiece(name="Front Bodice", body_lines=front_body_lines, pattern_lines=front_lines, drafting_lines=front_drafting_lines, marking_lines=front_marking_lines)
+    front_piece = PatternPiece(
+        name="Front Bodice",
+        body_lines=front_body_lines if keep_drafting_lines else None,
+        drafting_lines=front_drafting_lines if keep_drafting_lines else None,
+        marking_lines=front_marking_lines,
+        cut_count=2, # Cut as a left and a right half
+    )
+    front_piece.set_outline([
+        ("Center Front", center_front_line),
+        ("Neckline", front_neckline),
+        ("Shoulder", front_shoulder_line),
+        ("Armscye", front_armscye),
+        ("Side Seam", side_seam_line),
+        ("Hem", front_hem_line),
+    ])
     front_piece.add_grainline()
-    front_piece.add_seam_allowance(garment_specs.seam_allowance)
     pattern_pieces.append(front_piece)
 
 
     # --- DRAFT BACK BODICE ---
-    back_lines = []
     back_drafting_lines = []
     back_body_lines = []
     back_marking_lines = []
@@ -149,8 +176,7 @@ def draft(measurements, garment_specs):
     back_neckline, neckline_edge = garment_specs.create_bodice_neckline("Back", side_neck_rise)
     # Center Back Line
     back_neck_depth = garment_specs.back_neckline_depth
-    back_lines.append(Line.vertical(0, back_neck_depth, center_back_y))
-    back_lines.append(back_neckline)
+    center_back_line = Line.vertical(0, back_neck_depth, center_back_y)
 
     # Armscye
     across_back = measurements.across_back / 2
@@ -171,18 +197,17 @@ def draft(measurements, garment_specs):
 
     # Side Seam
     back_side_seam_line = Line([(back_width, armscye_depth), (back_waist_x, center_back_y)])
-    back_lines.append(back_side_seam_line)
 
     # Hem
     back_hem_end_x = back_side_seam_line.get_x_for_y(center_back_y)
-    back_lines.append(Line.horizontal(center_back_y, 0, back_hem_end_x))
+    back_hem_line = Line.horizontal(center_back_y, 0, back_hem_end_x)
 
     # --- Darts and Final Seams for Back ---
     shoulder_dart_intake = measurements.back_shoulder_length - measurements.shoulder_length
 
-    if total_back_waist_suppression < DART_ROTATION_THRESHOLD:
+    if total_back_waist_suppression < fit.dart_rotation_threshold:
         # If waist shaping is minimal, rotate the shoulder dart into the waist dart.
-        print("Rotating back shoulder dart into waist dart.")
+        logger.info("Rotating back shoulder dart into waist dart.")
         # Draw the shoulder seam at its final (shorter) length.
         shoulder_line = Line([(neckline_edge, side_neck_rise), (neck_width + measurements.shoulder_length, shoulder_slope_drop)])
         
@@ -204,12 +229,7 @@ def draft(measurements, garment_specs):
         # The waist dart takes the remaining 2/3 of waist suppression.
         back_waist_dart_width = total_back_waist_suppression * (2/3)
 
-    back_lines.append(shoulder_line)
-    shoulder_point_back = shoulder_line.points[-1]
-    curve_start_point_back = shoulder_line.get_perpendicular_point(shoulder_point_back, armscye_straight_len)
-    guide_point_3_back = (across_back - diagonal_guide_len * math.cos(math.radians(45)), armscye_depth - diagonal_guide_len * math.sin(math.radians(45)))
-    back_armscye_points = [shoulder_point_back, curve_start_point_back, guide_point_3_back, (back_width, armscye_depth)]
-    back_lines.append(Line(back_armscye_points, smooth=True))
+    back_armscye = armscye_curve(shoulder_line, armscye_straight_len, (across_back, armscye_depth), (back_width, armscye_depth))
 
     # Create the waist dart legs to be passed to the truing function
     back_dart_center_x = back_width / 2
@@ -219,74 +239,74 @@ def draft(measurements, garment_specs):
     if back_waist_dart and back_waist_dart.leg1:
         back_marking_lines.append(back_waist_dart)
 
-    back_piece = PatternPiece(name="Back Bodice", body_lines=back_body_lines, pattern_lines=back_lines, drafting_lines=back_drafting_lines, marking_lines=back_marking_lines)
+    back_piece = PatternPiece(
+        name="Back Bodice",
+        body_lines=back_body_lines if keep_drafting_lines else None,
+        drafting_lines=back_drafting_lines if keep_drafting_lines else None,
+        marking_lines=back_marking_lines,
+        cut_count=2,
+    )
+    back_piece.set_outline([
+        ("Center Back", center_back_line),
+        ("Neckline", back_neckline),
+        ("Shoulder", shoulder_line),
+        ("Armscye", back_armscye),
+        ("Side Seam", back_side_seam_line),
+        ("Hem", back_hem_line),
+    ])
     back_piece.add_grainline()
-    back_piece.add_seam_allowance(garment_specs.seam_allowance)
     pattern_pieces.append(back_piece)
 
-    # --- TRUE SIDE SEAMS ---
+    # --- TRUE SEAMS ---
     # This is done after both pieces are drafted to ensure all lines are available.
-    # The goal is to make the front side seam length match the back side seam length
-    # when the front bust dart is closed.
-
-    # 1. Get the back side seam line from the back piece and calculate its length.
-    # It's the line connecting the armscye to the waist.
-    back_side_seam = back_piece.pattern_lines[-4] # Based on current append order
-    back_side_seam_length = math.dist(back_side_seam.points[0], back_side_seam.points[1])
-
-    # 2. Get the front side seam and bust dart from the front piece.
-    front_side_seam = front_piece.pattern_lines[-2]
-    front_bust_dart = front_piece.get_marking_by_name("Bust Dart")
-    if not front_bust_dart:
-        print("Warning: Could not find front bust dart for truing side seams.")
-        return pattern_pieces
-
-    # 3. Calculate the "closed" length of the front side seam.
-    side_seam_top_point = front_side_seam.points[0]
-    side_seam_bottom_point = front_side_seam.points[1]
-    dart_leg1_start = front_bust_dart.leg1.points[0]
-    dart_leg2_start = front_bust_dart.leg2.points[0]
-
-    # Ensure leg1 is the upper leg for clarity
-    upper_dart_leg_start = dart_leg1_start if dart_leg1_start[1] < dart_leg2_start[1] else dart_leg2_start
-    lower_dart_leg_start = dart_leg2_start if dart_leg1_start[1] < dart_leg2_start[1] else dart_leg1_start
-
-    upper_seam_length = math.dist(side_seam_top_point, upper_dart_leg_start)
-    lower_seam_length = math.dist(lower_dart_leg_start, side_seam_bottom_point)
-    closed_front_seam_length = upper_seam_length + lower_seam_length
-
-    # 4. Calculate the difference and adjust the front waist point.
-    length_difference = closed_front_seam_length - back_side_seam_length
-    adjusted_front_waist_y = side_seam_bottom_point[1] - length_difference
-
-    # 5. Redefine the front side seam, hem, and waist dart with the adjusted point.
-    front_side_seam.points[1] = (side_seam_bottom_point[0], adjusted_front_waist_y)
-    
-    front_hem = front_piece.pattern_lines[-1]
-    front_hem.points = [(0, adjusted_front_waist_y), (front_side_seam.points[1][0], adjusted_front_waist_y)]
+    # The front side seam is lengthened or shortened at the waist to match the back
+    # side seam when the front bust dart is closed, and the front shoulder point
+    # slides along the shoulder to match the back shoulder with its dart closed.
+    front_shoulder_direction = (shoulder_point[0] - neckline_edge, shoulder_point[1] - side_neck_rise)
+    true_seams([
+        SeamPair(front_piece, "Side Seam", back_piece, "Side Seam", vertex=-1, direction=(0, 1)),
+        SeamPair(front_piece, "Shoulder", back_piece, "Shoulder", vertex=-1, direction=front_shoulder_direction),
+    ])
+
+    # The hem follows the new waist point, as do the center front and the waist dart.
+    adjusted_front_waist_x, adjusted_front_waist_y = side_seam_line.points[-1]
+    front_hem = front_piece.get_seam("Hem")
+    front_hem.points = [(0, adjusted_front_waist_y), (adjusted_front_waist_x, adjusted_front_waist_y)]
+    center_front = front_piece.get_seam("Center Front")
+    center_front.points = [center_front.points[0], (0, adjusted_front_waist_y)]
 
     front_waist_dart = front_piece.get_marking_by_name("Front Waist Dart")
-    if not front_waist_dart:
-        print("Warning: Could not find front waist dart for truing side seams.")
-        return pattern_pieces
-    front_waist_dart.seam_line.points = front_hem.points # Update the dart's seam line reference
-    front_waist_dart.leg1.points[0] = (front_waist_dart.leg1.points[0][0], adjusted_front_waist_y)
-    front_waist_dart.leg2.points[0] = (front_waist_dart.leg2.points[0][0], adjusted_front_waist_y)
+    if front_waist_dart:
+        front_waist_dart.seam_line.points = front_hem.points # Update the dart's seam line reference
+        for leg in (front_waist_dart.leg1, front_waist_dart.leg2):
+            leg.points[0] = (leg.points[0][0], adjusted_front_waist_y)
+            leg.invalidate_cache()
+    else:
+        logger.warning("Could not find front waist dart for truing side seams.")
+    # The points were edited in place, so cached outlines of the front are stale.
+    front_piece.invalidate_cache()
+
+    # Seam allowances are added once all seams are trued.
+    if finish:
+        finish_pieces(pattern_pieces, garment_specs.seam_allowance, context=context)
 
     return pattern_pieces
 
 if __name__ == "__main__":
     from util.draw import draw_pattern
-    
+    from util.render_profile import DEFAULT_PROFILE
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
     measurements = Measurements.from_file('patternDrafting/measurements/sample_measurements.yaml')
     garment_specs = GarmentSpecs.from_file('patternDrafting/garmentSpecs/sample_garment_specs.yaml')
 
-    pattern_pieces = draft(measurements, garment_specs)
+    pattern_pieces = draft(measurements, garment_specs, profile=DEFAULT_PROFILE)
     
     draw_pattern(
         scale=100,
         pattern_pieces=pattern_pieces,
         seam_allowance=garment_specs.seam_allowance,
         output_filepath="testFiles/bodiceBlock.png",
-        pattern_name="Bodice Block"
+        pattern_name="Bodice Block",
+        profile=DEFAULT_PROFILE,
     )
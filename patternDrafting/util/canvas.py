@@ -0,0 +1,206 @@
+import os
+import struct
+import zlib
+from typing import NamedTuple
+import cv2 as cv
+import numpy as np
+from .render_context import COLOR_FIELDS, coverage_context
+
+# How a pattern is rendered, see `RenderContext.canvas`:
+#   color    3 channel BGR, exact for every profile.
+#   gray     1 channel, exact as long as all context colors are gray, as in production.
+#   palette  1 channel of indices into `canvas_palette`, for debug renders in a
+#            few colors. Text is drawn with hard edges, as indices cannot blend.
+#   bilevel  1 bit per pixel in a PackedBits, for pure line art. Gray values
+#            below BILEVEL_THRESHOLD, including the grid, become background.
+CANVAS_MODES = ("color", "gray", "palette", "bilevel")
+BILEVEL_THRESHOLD = 128
+PNG_COMPRESSION_LEVEL = 1 # zlib level, OpenCV's default for png
+PNG_ROWS_PER_CHUNK = 256 # Rows handed to zlib at a time, bounds the encoder's extra memory
+
+
+class PackedBits(NamedTuple):
+    """A bilevel image with eight pixels per byte, most significant bit first, as np.packbits packs them."""
+    bits: np.ndarray # (height, ceil(width / 8)) uint8
+    width: int
+
+    @property
+    def shape(self):
+        """(height, width) in pixels, like the shape of an unpacked single channel image."""
+        return (self.bits.shape[0], self.width)
+
+
+def check_canvas_mode(mode):
+    if mode not in CANVAS_MODES:
+        raise ValueError(f"Unknown canvas mode '{mode}', expected one of {', '.join(CANVAS_MODES)}.")
+
+
+def gray_value(color):
+    """The gray value OpenCV converts a (b, g, r) color to."""
+    return int(cv.cvtColor(np.array([[color]], dtype=np.uint8), cv.COLOR_BGR2GRAY)[0, 0])
+
+
+def canvas_palette(context):
+    """
+    The (N, 3) BGR palette of a palette canvas: the background first, then every
+    other color the context draws with.
+    """
+    colors = [context.background_color, context.line_color, context.grid_color, context.body_color,
+              context.drafting_color, context.debug_contour_color, context.debug_bbox_color, context.debug_outline_color]
+    return np.array(list(dict.fromkeys(tuple(color) for color in colors)), dtype=np.uint8)
+
+
+def canvas_color(color, context):
+    """Returns how `color` is written into a canvas of the context's mode: a BGR tuple, a gray value or a palette index."""
+    if context.canvas == "color":
+        return color
+    if context.canvas == "palette":
+        return [tuple(entry) for entry in canvas_palette(context).tolist()].index(tuple(color))
+    return gray_value(color)
+
+
+def canvas_context(context):
+    """Returns `context` with every drawing color replaced by how it is written into its canvas mode, see canvas_color."""
+    return context._replace(**{field: canvas_color(getattr(context, field), context) for field in COLOR_FIELDS})
+
+
+def sprite_is_coverage(context):
+    """
+    Whether sprites for `context` are a bare coverage mask, composited in the
+    line color. That holds on gray and bilevel canvases unless drafting lines
+    or debug output add other colors.
+    """
+    return context.canvas in ("gray", "bilevel") and not context.profile.drafting_lines and not context.profile.debug
+
+
+def _drawn_box(coverage):
+    """(top, bottom, left, right) of the non-zero pixels of `coverage`, or None if there are none."""
+    rows = np.flatnonzero(coverage.any(axis=1))
+    if len(rows) == 0:
+        return None
+    columns = np.flatnonzero(coverage.any(axis=0))
+    return rows[0], rows[-1] + 1, columns[0], columns[-1] + 1
+
+
+def render_sprite(draw, shape, context):
+    """
+    Draws a piece into a sprite at the depth of the context's canvas mode and
+    crops it to what was drawn. Sprites are premultiplied over black:
+      color          BGRA.
+      gray, bilevel  The coverage alone if `sprite_is_coverage`, otherwise the
+                     gray value and the coverage.
+      palette        Palette indices, 0 where nothing is drawn, as the
+                     background is never drawn. Text is drawn with hard edges.
+
+    Args:
+        draw: `draw(img, context)`, drawing the piece onto `img` with the colors of `context`.
+        shape: (height, width) of the image the piece is drawn in.
+        context: The RenderContext.
+
+    Returns:
+        The sprite and the (x, y) pixel position of its top-left corner in the image.
+    """
+    coverage = np.zeros(shape, dtype=np.uint8)
+    layers = ()
+    if context.canvas == "palette":
+        # No color is drawn as index 0, so the indices are their own coverage.
+        draw(coverage, canvas_context(context))
+    else:
+        # Drawn over black, a color darker than the background could not be told
+        # apart from it, so what is covered is drawn separately in white.
+        draw(coverage, coverage_context(context))
+        if not sprite_is_coverage(context):
+            colors = np.zeros(shape + ((3,) if context.canvas == "color" else ()), dtype=np.uint8)
+            draw(colors, canvas_context(context))
+            layers = (colors,)
+
+    top, bottom, left, right = _drawn_box(coverage) or (0, 0, 0, 0)
+    if layers:
+        sprite = np.dstack([layer[top:bottom, left:right] for layer in layers + (coverage,)])
+    else:
+        # Copy the crop so the full size mask can be freed.
+        sprite = coverage[top:bottom, left:right].copy()
+    return sprite, (left, top)
+
+
+def pack_bits(gray, threshold=BILEVEL_THRESHOLD):
+    """Packs a single channel image to a PackedBits, setting pixels from `threshold` up."""
+    return PackedBits(np.packbits(gray >= threshold, axis=1), gray.shape[1])
+
+
+def unpack_bits(packed):
+    """Unpacks a PackedBits to a single channel image of 0 and 255."""
+    return np.unpackbits(packed.bits, axis=1, count=packed.width) * np.uint8(255)
+
+
+def to_bgr(img, context):
+    """Expands a canvas rendered with `context` to a 3 channel BGR image."""
+    if isinstance(img, PackedBits):
+        img = unpack_bits(img)
+    elif img.ndim == 3:
+        return img
+    elif context.canvas == "palette":
+        return canvas_palette(context)[img]
+    return cv.cvtColor(img, cv.COLOR_GRAY2BGR)
+
+
+def _png_chunk(kind, data):
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+
+def encode_png(img, palette=None, level=PNG_COMPRESSION_LEVEL):
+    """
+    Encodes a single channel image, with an optional BGR palette, or a
+    PackedBits as png. OpenCV only writes 8-bit gray and color pngs.
+
+    Returns:
+        The png file as bytes.
+    """
+    if isinstance(img, PackedBits):
+        # Packed rows are exactly the rows of a 1-bit png.
+        rows, width, bit_depth, color_type = img.bits, img.width, 1, 0
+    else:
+        rows, width, bit_depth, color_type = img, img.shape[1], 8, 0 if palette is None else 3
+    height = rows.shape[0]
+
+    compressor = zlib.compressobj(level)
+    compressed = []
+    for start in range(0, height, PNG_ROWS_PER_CHUNK):
+        band = rows[start:start + PNG_ROWS_PER_CHUNK]
+        # Every row starts with its filter type, 0 for none.
+        filtered = np.zeros((band.shape[0], band.shape[1] + 1), dtype=np.uint8)
+        filtered[:, 1:] = band
+        compressed.append(compressor.compress(filtered.tobytes()))
+    compressed.append(compressor.flush())
+
+    chunks = [b"\x89PNG\r\n\x1a\n", _png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, bit_depth, color_type, 0, 0, 0))]
+    if color_type == 3:
+        chunks.append(_png_chunk(b"PLTE", np.ascontiguousarray(palette[:, ::-1], dtype=np.uint8).tobytes()))
+    chunks.append(_png_chunk(b"IDAT", b"".join(compressed)))
+    chunks.append(_png_chunk(b"IEND", b""))
+    return b"".join(chunks)
+
+
+def encode_canvas(img, context, extension=".png"):
+    """
+    Encodes a canvas rendered with `context`. Palette and bilevel canvases are
+    written as palette and 1-bit pngs; other formats get them expanded to color.
+
+    Returns:
+        The encoded image as bytes.
+    """
+    if extension.lower() == ".png" and (isinstance(img, PackedBits) or context.canvas == "palette"):
+        return encode_png(img, canvas_palette(context) if context.canvas == "palette" else None)
+    if isinstance(img, PackedBits) or (img.ndim == 2 and context.canvas == "palette"):
+        img = to_bgr(img, context)
+    ok, encoded = cv.imencode(extension, img)
+    if not ok:
+        raise RuntimeError(f"Could not encode the pattern as {extension}.")
+    return encoded.tobytes()
+
+
+def save_canvas(file_path, img, context):
+    """Writes a canvas rendered with `context` to `file_path`, in the format of its extension."""
+    extension = os.path.splitext(file_path)[1] or ".png"
+    with open(file_path, "wb") as f:
+        f.write(encode_canvas(img, context, extension))
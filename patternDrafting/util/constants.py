@@ -1,9 +1,6 @@
-import cv2 as cv
-
-# --- Debugging ---
-DEBUG = True  # Set to False to disable all debug visualizations
-DRAFTING_LINES = True
-DRAW_GRID = True # Set to False to hide the 1-inch grid
+# Default drawing settings. Jobs that need other values pass a RenderContext,
+# see render_context.py; nothing here is changed at runtime.
+# Which debug lines, grids and contours get drawn is set per call, see render_profile.py.
 
 # --- Drawing Constants ---
 # Colors
@@ -15,9 +12,14 @@ GRID_COLOR = (40, 40, 40) # Dark grey for the grid
 THICKNESS = 10
 TEXT_THICKNESS = THICKNESS // 2
 SPACING = 2 # Inches between pattern pieces
-FONT = cv.FONT_HERSHEY_SIMPLEX
+FONT = 0 # cv.FONT_HERSHEY_SIMPLEX, kept numeric so drafting does not load OpenCV
 
 # Debug Colors
 DEBUG_CONTOUR_COLOR = (0, 255, 255)  # Yellow
 DEBUG_BBOX_COLOR = (255, 0, 255)     # Magenta
 DEBUG_POLE_COLOR = (0, 0, 255)       # Red
+DEBUG_OUTLINE_COLOR = (0, 165, 255)  # Orange
+
+# --- Piece Masks ---
+PADDING_IN = 1  # Inches of padding for temporary masks
+LABEL_BUFFER = 0.15 # Percentage of smallest dimension to inset for label placement
@@ -0,0 +1,82 @@
+import functools
+import math
+import numpy as np
+from .line import Line, spline_basis
+
+# Number of control points of the neckline templates
+TEMPLATE_POINTS = 50
+# The armscye passes this far inside the corner of the across chest/back and armscye depth lines.
+ARMSCYE_DIAGONAL_LEN = 0.5
+
+
+class CurveTemplate:
+    """
+    A smooth curve drafted once in the unit square together with its curve
+    samples. Mapping it onto a draft only scales and moves both, which gives
+    the same curve as fitting the mapped points because the spline is linear
+    in its control points.
+
+    Args:
+        unit_points: The control points, from (0, 0) to (1, 1).
+    """
+
+    def __init__(self, unit_points):
+        self.unit_points = np.asarray(unit_points, dtype=float)
+        self.samples = spline_basis(len(self.unit_points)) @ self.unit_points
+        self.unit_points.setflags(write=False)
+        self.samples.setflags(write=False)
+
+    def to_line(self, origin, size):
+        """
+        Returns the template as a smooth Line running from `origin` to `origin + size`.
+        Negative sizes mirror the curve.
+        """
+        origin = np.asarray(origin, dtype=float)
+        size = np.asarray(size, dtype=float)
+        line = Line([tuple(point) for point in (self.unit_points * size + origin).tolist()], smooth=True)
+        line.set_samples(self.samples * size + origin)
+        return line
+
+
+@functools.lru_cache(maxsize=None)
+def power_curve_template(exponent, point_count=TEMPLATE_POINTS):
+    """The template of y = x**exponent over [0, 1]. Higher exponents stay flat for longer."""
+    x = np.linspace(0, 1, point_count)
+    return CurveTemplate(np.stack((x, x ** exponent), axis=-1))
+
+
+def power_curve(exponent, shoulder_height, neckline_depth, neckline_radius):
+    """
+    A neckline curve from the center at `neckline_depth` to the side neck
+    point at (neckline_radius, shoulder_height).
+    """
+    template = power_curve_template(exponent)
+    return template.to_line((0, neckline_depth), (neckline_radius, shoulder_height - neckline_depth))
+
+
+def armscye_curve(shoulder_line, straight_len, corner, underarm_point, diagonal_len=ARMSCYE_DIAGONAL_LEN):
+    """
+    The armscye from the shoulder point down to the underarm point.
+
+    Unlike the necklines this is not a CurveTemplate: the perpendicular start
+    and the guide point are set in inches from the shoulder seam and the
+    corner, so the curve is not a scaled copy of one unit curve. Its four
+    control points still go through the cached `spline_basis`, one matrix
+    product per draft.
+
+    Args:
+        shoulder_line: The shoulder seam, ending at the shoulder point.
+        straight_len: The length of the start of the armscye that is perpendicular
+          to the shoulder seam.
+        corner: Where the across chest/back line meets the armscye depth line.
+        underarm_point: The end of the armscye on the side seam.
+        diagonal_len: How far inside `corner` the curve passes, on a 45 degree diagonal.
+
+    Returns:
+        A smooth Line.
+    """
+    shoulder_point = shoulder_line.points[-1]
+    curve_start_point = shoulder_line.get_perpendicular_point(shoulder_point, straight_len)
+    offset = diagonal_len * math.cos(math.radians(45))
+    guide_point = (corner[0] - offset, corner[1] - offset)
+    return Line([shoulder_point, curve_start_point, guide_point, underarm_point], smooth=True)
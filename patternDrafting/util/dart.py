@@ -1,6 +1,9 @@
 from .line import Line
+import logging
 import math
 
+logger = logging.getLogger(__name__)
+
 class Dart:
     """Represents a dart in a sewing pattern."""
 
@@ -22,33 +25,33 @@ class Dart:
         self.leg2 = None
         self.extended_legs = []
 
-        # This is a simplified approach for straight lines. A curved line would
-        # require walking along the curve's points to measure arc length.
-        if len(seam_line.points) == 2:
-            p1_x, p1_y = seam_line.points[0]
-            p2_x, p2_y = seam_line.points[1]
+        # The legs open symmetrically around the center, measured along the seam so
+        # darts on curved or multi-point seams open by the full width too.
+        seam_length = seam_line.length()
+        if seam_length == 0:
+            logger.warning("Cannot create a dart on a seam line without length.")
+            return
 
-            # Determine the direction vector of the seam line
-            line_length = math.dist((p1_x, p1_y), (p2_x, p2_y))
-            if line_length == 0: 
-                return
-            
-            vx = (p2_x - p1_x) / line_length
-            vy = (p2_y - p1_y) / line_length
+        center = seam_line.project(center_point_on_seam)
+        leg1_start, leg2_start = (tuple(point) for point in seam_line.point_at_length([center - dart_width / 2, center + dart_width / 2]).tolist())
+        self.leg1 = Line([leg1_start, dart_tip])
+        self.leg2 = Line([leg2_start, dart_tip])
 
-            # Calculate the positions of the dart legs on the seam line
-            leg1_x = center_point_on_seam[0] - (dart_width / 2) * vx
-            leg1_y = center_point_on_seam[1] - (dart_width / 2) * vy
-            leg2_x = center_point_on_seam[0] + (dart_width / 2) * vx
-            leg2_y = center_point_on_seam[1] + (dart_width / 2) * vy
-            
-            self.leg1 = Line([(leg1_x, leg1_y), dart_tip])
-            self.leg2 = Line([(leg2_x, leg2_y), dart_tip])
+    @classmethod
+    def from_legs(cls, seam_line, leg1, leg2, dart_tip, name=None, extended_legs=None):
+        """
+        Rebuilds a Dart from already computed legs without re-deriving them
+        from the seam line, e.g. when loading a saved pattern.
+        """
+        dart = cls.__new__(cls)
+        dart.tip = dart_tip
+        dart.name = name
+        dart.seam_line = seam_line
+        dart.leg1 = leg1
+        dart.leg2 = leg2
+        dart.extended_legs = extended_legs if extended_legs is not None else []
+        return dart
 
-        else:
-            # Fallback for curved lines or more complex scenarios
-            print("Warning: Dart creation on curved lines is not fully implemented.")
-    
     def get_lines(self):
         """
         Returns a list of all Line objects that constitute the dart.
@@ -107,10 +110,11 @@ class Dart:
                 extended_legs.append(Line([p_tip, closest_intersection]))
                 # Add the new point to the existing dart leg line
                 leg.points.append(closest_intersection)
+                leg.invalidate_cache()
             else:
                 # This might happen if the dart is very unusual or the cut line is complex.
                 # As a fallback, we can just use the original leg.
-                print(f"Warning: Could not extend dart leg to cut line. Using original leg.")
+                logger.warning("Could not extend dart leg to cut line. Using original leg.")
                 extended_legs.append(leg)
 
         self.extended_legs = extended_legs
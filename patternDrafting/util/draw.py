@@ -1,13 +1,24 @@
 import cv2 as cv
 import numpy as np
 from datetime import date
+import logging
 import math
 from .constants import *
 from .line import Line
+from .instrumentation import span, timed
+from .nesting import get_nested_layout, get_page_layout
+from .render_context import get_context
+from .canvas import BILEVEL_THRESHOLD, PackedBits, canvas_color, check_canvas_mode, save_canvas, sprite_is_coverage
 
+logger = logging.getLogger(__name__)
 
+BILEVEL_BAND_PX = 512 # Rows of a bilevel canvas rendered at a time before they are packed
+
+
+@timed("render.draw_pattern")
 def draw_pattern(
-    scale, pattern_pieces, seam_allowance, output_filepath, pattern_name, output=True
+    scale, pattern_pieces, seam_allowance, output_filepath, pattern_name, output=True, fabric_width=None,
+    page_size=None, grid=None, profile=None, context=None
 ):
     """
     Calculates layout, creates an image, and draws all pattern pieces onto it.
@@ -19,82 +30,271 @@ def draw_pattern(
       output_filepath: The path to save the final image file.
       pattern_name: The name of the overall pattern.
       output: A boolean to control if the image is saved to a file.
+      fabric_width: Optional fabric width in inches. When given, the pieces are
+        nested into a marker of that width instead of laid out side by side.
+      page_size: Optional (width, height) of the printer paper in inches. When
+        given, the pieces are packed onto as few pages as possible and the
+        canvas is a whole number of pages, each without the context's
+        `pdf_border_in`, so it tiles exactly as the pdf exporter prints it.
+      grid: Draw the 1-inch grid onto the canvas, defaults to the profile's
+        setting. Turn it off when the grid is added per output tile instead,
+        see grid_tile_callback.
+      profile: The RenderProfile, or its name, deciding which debug output is
+        drawn, see render_profile.py. Defaults to the context's profile.
+      context: The RenderContext with the colors, line widths, spacing and
+        canvas mode to draw with, DEFAULT_CONTEXT if None.
+
+    Returns:
+      A tuple of (image, layouts), with the layouts the pieces were drawn with,
+      see get_layout. The image is in the context's canvas mode, see canvas.py:
+      a BGR or single channel array, or a PackedBits for bilevel canvases.
     """
+    context = get_context(context, profile)
+    check_canvas_mode(context.canvas)
+
     # --- 1. Calculate Layout ---
-    layouts, canvas_width_in, canvas_height_in = get_layout(pattern_pieces, seam_allowance)
+    with span("render.layout"):
+        if page_size is not None:
+            layouts, canvas_width_in, canvas_height_in = get_page_layout(pattern_pieces, page_size, context.pdf_border_in)
+        elif fabric_width is not None:
+            layouts, canvas_width_in, canvas_height_in = get_nested_layout(pattern_pieces, fabric_width)
+        else:
+            layouts, canvas_width_in, canvas_height_in = get_layout(pattern_pieces, seam_allowance, context.spacing_in)
 
     # Image dimensions in pixels
     img_width_px = round(canvas_width_in * scale)
     img_height_px = round(canvas_height_in * scale)
-    img = np.full((img_height_px, img_width_px, 3), BACKGROUND_COLOR, dtype=np.uint8)
-
-    # --- Draw Optional Grid ---
-    if DRAW_GRID:
-        # Draw vertical grid lines every inch
-        for i in range(1, int(canvas_width_in)):
-            x_pos = round(i * scale)
-            cv.line(img, (x_pos, 0), (x_pos, img_height_px), GRID_COLOR, 1)
-        # Draw horizontal grid lines every inch
-        for i in range(1, int(canvas_height_in)):
-            y_pos = round(i * scale)
-            cv.line(img, (0, y_pos), (img_width_px, y_pos), GRID_COLOR, 1)
 
     # --- 2. Draw Pieces ---
-    for layout in layouts:
-        piece = layout['piece']
-        offset = layout['offset']
-        if DRAFTING_LINES:
-            draw_lines(img, piece.body_lines, BODY_COLOR, scale=scale, offset=offset)
-            draw_lines(img, piece.drafting_lines, DRAFTING_COLOR, scale=scale, offset=offset)
-        # Draw internal marking lines (like darts) with the main pattern line style
-        draw_lines(
-            img,
-            piece.get_drawable_marking_lines(),
-            LINE_COLOR,
-            scale=scale,
-            offset=offset,
-        )
-        # Draw the cut line (solid)
-        draw_lines(
-            img,
-            piece.cut_lines,
-            LINE_COLOR,
-            scale=scale,
-            offset=offset,
+    canvas_size_in = (canvas_width_in, canvas_height_in)
+    if context.canvas == "bilevel":
+        img = _render_bilevel(layouts, scale, pattern_name, canvas_size_in, (img_width_px, img_height_px), grid, context)
+    else:
+        img = render_region(
+            layouts, scale, pattern_name, canvas_size_in, size_px=(img_width_px, img_height_px), grid=grid,
+            context=context
         )
-        draw_lines(
-            img,
-            piece.pattern_lines,
-            LINE_COLOR,
-            scale=scale,
-            offset=offset,
-            is_dashed=True,
+
+    if output:
+        with span("render.encode"):
+            save_canvas(output_filepath, img, context)
+
+    return img, layouts
+
+
+def _render_bilevel(layouts, scale, pattern_name, canvas_size_in, size_px, grid, context):
+    """
+    Renders a bilevel canvas in bands of single channel rows, packing each band
+    before the next is drawn, so the full canvas is never held unpacked.
+    """
+    width_px, height_px = size_px
+    bits = np.empty((height_px, (width_px + 7) // 8), dtype=np.uint8)
+    for top in range(0, height_px, BILEVEL_BAND_PX):
+        band_height = min(BILEVEL_BAND_PX, height_px - top)
+        band = render_region(layouts, scale, pattern_name, canvas_size_in, (0, top), (width_px, band_height), grid=grid, context=context)
+        bits[top:top + band_height] = np.packbits(band >= BILEVEL_THRESHOLD, axis=1)
+    return PackedBits(bits, width_px)
+
+
+def new_canvas(height_px, width_px, color=BACKGROUND_COLOR):
+    """
+    Allocates a canvas filled with `color`: 3 channels for a (b, g, r) color,
+    a single channel for a gray value or palette index.
+    """
+    shape = (height_px, width_px, 3) if np.ndim(color) else (height_px, width_px)
+    if not np.any(color):
+        # Zeroed memory comes straight from the OS and is only touched once drawn on,
+        # so the parts of a black canvas that stay empty cost nothing.
+        return np.zeros(shape, dtype=np.uint8)
+    return np.full(shape, color, dtype=np.uint8)
+
+
+def _grid_positions(canvas_length_in, scale, start_px, length_px):
+    """Pixel positions, relative to `start_px`, of the inch lines that fall in [start_px, start_px + length_px)."""
+    positions = np.round(np.arange(1, int(canvas_length_in)) * scale).astype(np.intp) - start_px
+    return positions[(positions >= 0) & (positions < length_px)]
+
+
+def draw_grid(img, scale, canvas_size_in, origin_px=(0, 0), background_only=False, color=GRID_COLOR, background_color=BACKGROUND_COLOR):
+    """
+    Draws a line every inch of the canvas onto `img`.
+
+    Args:
+      img: The canvas, or a part of it, with 3 channels or a single one.
+      scale: The scale factor (pixels per inch).
+      canvas_size_in: (width, height) of the whole canvas in inches.
+      origin_px: (x, y) pixel position of `img` within the whole canvas.
+      background_only: Only recolor background pixels, so the grid can be added
+        after the pieces have been drawn.
+      color: The color of the grid lines, a gray value or palette index on single channel canvases.
+      background_color: The color of background pixels, in the same form.
+    """
+    height, width = img.shape[:2]
+    xs = _grid_positions(canvas_size_in[0], scale, origin_px[0], width)
+    ys = _grid_positions(canvas_size_in[1], scale, origin_px[1], height)
+    if not background_only:
+        img[:, xs] = color
+        img[ys] = color
+        return
+
+    is_background = (lambda pixels: (pixels == background_color).all(axis=-1)) if img.ndim == 3 else (lambda pixels: pixels == background_color)
+    # Fancy indexing copies, so recolor the copies and write them back.
+    columns = img[:, xs]
+    columns[is_background(columns)] = color
+    img[:, xs] = columns
+    rows = img[ys]
+    rows[is_background(rows)] = color
+    img[ys] = rows
+
+
+def grid_tile_callback(scale, canvas_size_in, context=None):
+    """
+    Returns a `tile_callback` for export_multi_page_pdf that adds the grid to
+    each emitted tile, for canvases drawn with `grid=False`.
+    """
+    context = get_context(context)
+
+    def add_grid(tile, origin_px):
+        tile = tile.copy()
+        draw_grid(
+            tile, scale, canvas_size_in, origin_px, background_only=True,
+            color=canvas_color(context.grid_color, context), background_color=canvas_color(context.background_color, context),
         )
+        return tile
+    return add_grid
 
-        if piece.grainline:
-            lines, text = piece.grainline
-            draw_lines(img, lines, LINE_COLOR, scale=scale, offset=offset, thickness=TEXT_THICKNESS)
-
-            label_font_size = _draw_label(img, piece, pattern_name, scale, offset)
-            # Draw the "CUT ON FOLD" text if it exists
-            if text:
-                # Assume the first line in the list is the main shaft
-                _draw_text_along_line(
-                    img,
-                    text,
-                    lines[0],
-                    offset,
-                    scale,
-                    LINE_COLOR,
-                    label_font_size,
-                )
 
-    cv.imwrite(output_filepath, img)
+def render_region(layouts, scale, pattern_name, canvas_size_in, origin_px=(0, 0), size_px=None, grid=None, profile=None, context=None):
+    """
+    Renders a rectangle of a laid out canvas, e.g. a single page, by compositing
+    the cached piece sprites that overlap it.
 
-def get_layout(pattern_pieces, seam_allowance):
+    Args:
+      layouts: The layouts from get_layout or one of the nesting layouts.
+      scale: The scale factor (pixels per inch).
+      pattern_name: The name of the overall pattern.
+      canvas_size_in: (width, height) of the whole canvas in inches.
+      origin_px: (x, y) pixel position of the region within the canvas.
+      size_px: (width, height) of the region in pixels, defaults to the rest of the canvas.
+      grid: Draw the 1-inch grid under the pieces, defaults to the profile's setting.
+      profile: The RenderProfile, or its name, the pieces are drawn with.
+        Defaults to the context's profile.
+      context: The RenderContext to draw with, DEFAULT_CONTEXT if None.
+    """
+    context = get_context(context, profile)
+    if grid is None:
+        grid = context.profile.grid
+    if size_px is None:
+        size_px = (round(canvas_size_in[0] * scale) - origin_px[0], round(canvas_size_in[1] * scale) - origin_px[1])
+    background_color = canvas_color(context.background_color, context)
+    img = new_canvas(size_px[1], size_px[0], background_color)
+
+    # --- Draw Optional Grid ---
+    if grid:
+        with span("render.grid"):
+            draw_grid(img, scale, canvas_size_in, origin_px, color=canvas_color(context.grid_color, context), background_color=background_color)
+
+    coverage_color = canvas_color(context.line_color, context) if sprite_is_coverage(context) else None
+    for layout in layouts:
+        with span("render.piece"):
+            sprite, sprite_origin_in = layout['piece'].get_sprite(scale, pattern_name, context=context)
+            x = round((sprite_origin_in[0] + layout['offset'][0]) * scale) - origin_px[0]
+            y = round((sprite_origin_in[1] + layout['offset'][1]) * scale) - origin_px[1]
+            composite_sprite(img, sprite, (x, y), coverage_color)
+    return img
+
+
+def composite_sprite(img, sprite, position_px, color=None):
+    """
+    Draws a premultiplied sprite over `img` with its top-left corner at
+    `position_px`, clipping it to the image, see canvas.render_sprite for the
+    sprite formats. Sprites with several channels have their alpha as the last
+    one. Single channel sprites are a coverage mask drawn in `color`, or
+    palette indices copied where they are not 0 if `color` is None.
+    """
+    x, y = position_px
+    height, width = sprite.shape[:2]
+    left, top = max(x, 0), max(y, 0)
+    right, bottom = min(x + width, img.shape[1]), min(y + height, img.shape[0])
+    if right <= left or bottom <= top:
+        return
+
+    source = sprite[top - y:bottom - y, left - x:right - x]
+    target = img[top:bottom, left:right]
+    if source.ndim == 2:
+        if color is None:
+            drawn = source != 0
+            target[drawn] = source[drawn]
+        else:
+            # out = color * coverage / 255 + dst * (255 - coverage) / 255, rounded
+            coverage = source.astype(np.uint16)
+            target[:] = (coverage * color + target * (255 - coverage) + 127) // 255
+        return
+
+    color, alpha = source[..., :-1], source[..., -1:]
+    if target.ndim == 2:
+        color, alpha = color[..., 0], alpha[..., 0]
+    # out = sprite + dst * (255 - alpha) / 255, rounded, in integer arithmetic
+    transparency = 255 - alpha.astype(np.uint16)
+    target[:] = color + (target * transparency + 127) // 255
+
+
+def _draw_piece(img, piece, offset, scale, pattern_name, context):
+    """Draws all lines, the grainline and the label of one piece at its layout offset."""
+    if context.profile.drafting_lines:
+        draw_lines(img, piece.body_lines, context.body_color, scale=scale, offset=offset, thickness=context.thickness)
+        draw_lines(img, piece.drafting_lines, context.drafting_color, scale=scale, offset=offset, thickness=context.thickness)
+    # Draw internal marking lines (like darts) with the main pattern line style
+    draw_lines(
+        img,
+        piece.get_drawable_marking_lines(),
+        context.line_color,
+        scale=scale,
+        offset=offset,
+        thickness=context.thickness,
+    )
+    # Draw the cut line (solid)
+    draw_lines(
+        img,
+        piece.cut_lines,
+        context.line_color,
+        scale=scale,
+        offset=offset,
+        thickness=context.thickness,
+    )
+    draw_lines(
+        img,
+        piece.pattern_lines,
+        context.line_color,
+        scale=scale,
+        offset=offset,
+        thickness=context.thickness,
+        is_dashed=True,
+    )
+
+    if piece.grainline:
+        lines, text = piece.grainline
+        draw_lines(img, lines, context.line_color, scale=scale, offset=offset, thickness=context.text_thickness)
+
+        with span("render.label"):
+            label_font_size = _draw_label(img, piece, pattern_name, scale, offset, context)
+        # Draw the "CUT ON FOLD" text if it exists
+        if text:
+            # Assume the first line in the list is the main shaft
+            _draw_text_along_line(
+                img,
+                text,
+                lines[0],
+                offset,
+                scale,
+                context,
+                label_font_size,
+            )
+
+def get_layout(pattern_pieces, seam_allowance, spacing_in=SPACING):
     # Simple horizontal side-by-side layout
     layouts = []
-    buffer_in = max(SPACING, seam_allowance * 1.5)
+    buffer_in = max(spacing_in, seam_allowance * 1.5)
     current_x = buffer_in
     largest_y = buffer_in
 
@@ -105,12 +305,10 @@ def get_layout(pattern_pieces, seam_allowance):
         if largest_y < max_y:
             largest_y = max_y
 
-        print(f"Piece '{piece.name}' has top y {min_y} inches.")
-        
         # The offset positions the top-left of the piece's bounding box
         offset_x = current_x - min_x
         offset_y = buffer_in - min_y
-        print(f"Offset for piece '{piece.name}': ({offset_x}, {offset_y})")
+        logger.debug("Piece '%s' has top y %s inches, offset (%s, %s).", piece.name, min_y, offset_x, offset_y)
         layouts.append({'offset': (offset_x, offset_y), 'piece': piece})
         
         current_x += piece_width + buffer_in
@@ -118,16 +316,17 @@ def get_layout(pattern_pieces, seam_allowance):
     return layouts, current_x, largest_y + buffer_in
 
 
-def _draw_label(img, piece, pattern_name, scale, offset):
-    """Draws the name, pattern name, and date on a pattern piece."""
+def _draw_label(img, piece, pattern_name, scale, offset, context):
+    """
+    Draws the name, pattern name, and date on a pattern piece. With a debug
+    profile, also draws the outline contour, the eroded area and the label box.
+    """
     # Get the label bounding box from the piece itself
-    label_box_data = piece.get_label_box(scale=scale)
+    label_box_data = piece.get_label_box(scale=scale, context=context)
     if label_box_data is None:
-        print(
-            f"Warning: Cannot draw label for piece '{piece.name}'. No safe area found after erosion."
-        )
+        logger.warning("Cannot draw label for piece '%s'. No safe area found after erosion.", piece.name)
         return
-    x_in, y_in, w_in, h_in, eroded_mask = label_box_data
+    x_in, y_in, w_in, h_in, eroded_contours = label_box_data
 
     # Apply the piece's layout offset to the label coordinates
     x = round((x_in + offset[0]) * scale) 
@@ -135,28 +334,27 @@ def _draw_label(img, piece, pattern_name, scale, offset):
     w = round(w_in * scale)
     h = round(h_in * scale)
 
-    if DEBUG:
-
-        print(f"Drawing label for piece '{piece.name}' at ({x}, {y}) with size ({w}, {h}).")
+    if context.profile.debug:
+        logger.debug("Drawing label for piece '%s' at (%s, %s) with size (%s, %s).", piece.name, x, y, w, h)
         # Draw the debug visualizations
-        piece_contour = piece.get_outline_contour(scale=scale)
+        piece_contour = piece.get_outline_contour(scale=scale, context=context)
         min_x_in, min_y_in, _, _ = piece.get_bounding_box()
         
         # Calculate the absolute offset for drawing debug contours on the main canvas
-        abs_contour_offset = (round((offset[0] + min_x_in - 1) * scale), round((offset[1] + min_y_in - 1) * scale))
+        padding_in = context.padding_in
+        abs_contour_offset = (round((offset[0] + min_x_in - padding_in) * scale), round((offset[1] + min_y_in - padding_in) * scale))
         
         # Draw the main outline contour
-        cv.drawContours(img, [piece_contour], -1, (0, 165, 255), 2, offset=abs_contour_offset)
+        cv.drawContours(img, [piece_contour], -1, context.debug_outline_color, 2, offset=abs_contour_offset)
 
         # Draw the eroded contour
-        # The eroded mask is relative to the temporary mask inside get_label_box.
-        # To place it correctly, we need to find the origin of that temporary mask on the final canvas.
-        eroded_contours, _ = cv.findContours(eroded_mask, cv.RETR_EXTERNAL, cv.CHAIN_APPROX_SIMPLE)
-        eroded_origin_on_canvas = (round((offset[0] + min_x_in - 1) * scale), round((offset[1] + min_y_in - 1) * scale))
-        cv.drawContours(img, eroded_contours, -1, DEBUG_CONTOUR_COLOR, 3, offset=eroded_origin_on_canvas)
+        # The eroded contours are relative to the temporary mask inside get_label_box.
+        # To place them correctly, we need to find the origin of that temporary mask on the final canvas.
+        eroded_origin_on_canvas = (round((offset[0] + min_x_in - padding_in) * scale), round((offset[1] + min_y_in - padding_in) * scale))
+        cv.drawContours(img, eroded_contours, -1, context.debug_contour_color, 3, offset=eroded_origin_on_canvas)
         
         # Draw the bounding box for the text area
-        cv.rectangle(img, (x, y), (x + w, y + h), DEBUG_BBOX_COLOR, 2)
+        cv.rectangle(img, (x, y), (x + w, y + h), context.debug_bbox_color, 2)
 
 
     today_str = date.today().strftime("%Y-%m-%d")
@@ -164,7 +362,8 @@ def _draw_label(img, piece, pattern_name, scale, offset):
 
     # Dynamically determine font scale
     # Get the size of the longest label at a reference scale of 1.0
-    base_text_size, _ = cv.getTextSize(max(labels, key=len), FONT, 1.0, TEXT_THICKNESS)
+    font, text_thickness = context.font, context.text_thickness
+    base_text_size, _ = cv.getTextSize(max(labels, key=len), font, 1.0, text_thickness)
     
     # Calculate scale based on width and height constraints
     scale_w = w / (base_text_size[0] * 1.25) # adding a bit of a buffer
@@ -172,32 +371,48 @@ def _draw_label(img, piece, pattern_name, scale, offset):
     scale_h = h / (base_text_size[1] * len(labels) * 1.5) 
     font_scale = min(scale_w, scale_h)
     
-    line_height = cv.getTextSize(labels[0], FONT, font_scale, TEXT_THICKNESS)[0][1] * 1.5
+    line_height = cv.getTextSize(labels[0], font, font_scale, text_thickness)[0][1] * 1.5
     # Calculate the total height of the text block
-    text_block_height = line_height * (len(labels) - 1) + cv.getTextSize(labels[0], FONT, font_scale, TEXT_THICKNESS)[0][1]
+    text_block_height = line_height * (len(labels) - 1) + cv.getTextSize(labels[0], font, font_scale, text_thickness)[0][1]
     
     # Calculate the top-most y-coordinate for the first line of text
-    start_y_px = y + (h - text_block_height) / 2 + cv.getTextSize(labels[0], FONT, font_scale, TEXT_THICKNESS)[0][1]
+    start_y_px = y + (h - text_block_height) / 2 + cv.getTextSize(labels[0], font, font_scale, text_thickness)[0][1]
 
     for i, text in enumerate(labels):
         # Calculate the width of the current line of text to center it horizontally
-        (text_w, _), _ = cv.getTextSize(text, FONT, font_scale, TEXT_THICKNESS)
+        (text_w, _), _ = cv.getTextSize(text, font, font_scale, text_thickness)
         text_x = x + (w - text_w) // 2
-        cv.putText(
-            img,
-            text,
-            (text_x, int(start_y_px + i * line_height)),
-            FONT,
-            font_scale,
-            LINE_COLOR,
-            TEXT_THICKNESS,
-        )
+        _put_text(img, text, (text_x, int(start_y_px + i * line_height)), font_scale, context)
 
     return font_scale
 
 
+def _put_text(img, text, origin, font_scale, context):
+    """
+    Draws text in the line color like cv.putText, which always antialiases.
+    Palette indices cannot be blended, so on palette canvases the text is
+    drawn onto a mask and only pixels it covers at least half are set.
+    """
+    font, thickness = context.font, context.text_thickness
+    if context.canvas != "palette":
+        cv.putText(img, text, origin, font, font_scale, context.line_color, thickness)
+        return
+
+    (text_w, text_h), baseline = cv.getTextSize(text, font, font_scale, thickness)
+    left, top = origin[0] - thickness, origin[1] - text_h - thickness
+    mask = np.zeros((text_h + baseline + 2 * thickness, text_w + 2 * thickness), dtype=np.uint8)
+    cv.putText(mask, text, (origin[0] - left, origin[1] - top), font, font_scale, 255, thickness)
+
+    x0, y0 = max(left, 0), max(top, 0)
+    x1, y1 = min(left + mask.shape[1], img.shape[1]), min(top + mask.shape[0], img.shape[0])
+    if x1 <= x0 or y1 <= y0:
+        return
+    region = img[y0:y1, x0:x1]
+    region[mask[y0 - top:y1 - top, x0 - left:x1 - left] >= 128] = context.line_color
+
+
 def _draw_text_along_line(
-    img, text, line, piece_offset, scale, color, max_font_scale
+    img, text, line, piece_offset, scale, context, max_font_scale
 ):
     """Calculates position and angle, then draws rotated text next to a line."""
     p1_in, p2_in = line.points[0], line.points[1]
@@ -210,7 +425,7 @@ def _draw_text_along_line(
 
     # 2. Estimate text height to calculate perpendicular offset
     temp_font_scale = min(1.0, max_font_scale)
-    (_, text_h_estimate), _ = cv.getTextSize(text, FONT, temp_font_scale, TEXT_THICKNESS)
+    (_, text_h_estimate), _ = cv.getTextSize(text, context.font, temp_font_scale, context.text_thickness)
     offset_from_line_px = text_h_estimate * 1.15  # 15% buffer
 
     # 3. Calculate the final center point for the text
@@ -235,22 +450,23 @@ def _draw_text_along_line(
         text,
         final_center_px,
         angle_deg,
-        color,
+        context,
         max_text_length_px,
         max_font_scale,
     )
 
 
 def _draw_rotated_text(
-    img, text, center_px, angle, color, max_length_px, max_font_scale
+    img, text, center_px, angle, context, max_length_px, max_font_scale
 ):
     """Draws rotated text on an image by creating a temporary image and overlaying it."""
+    font, text_thickness = context.font, context.text_thickness
     # Determine font scale
-    base_text_size_at_1_0_scale, _ = cv.getTextSize(text, FONT, 1.0, TEXT_THICKNESS)
+    base_text_size_at_1_0_scale, _ = cv.getTextSize(text, font, 1.0, text_thickness)
     calculated_font_scale = max_length_px / base_text_size_at_1_0_scale[0]
     font_scale = min(calculated_font_scale, max_font_scale)
 
-    (text_w, text_h), baseline = cv.getTextSize(text, FONT, font_scale, TEXT_THICKNESS)
+    (text_w, text_h), baseline = cv.getTextSize(text, font, font_scale, text_thickness)
 
     # Create a padded, transparent image for the text to prevent clipping during rotation
     padding = int(max(text_w, text_h) * 0.5)
@@ -264,10 +480,10 @@ def _draw_rotated_text(
         text_img,
         text,
         (text_x, text_y),
-        FONT,
+        font,
         font_scale,
         (255, 255, 255, 255),
-        TEXT_THICKNESS,
+        text_thickness,
     )
 
     # Rotate the text image
@@ -281,16 +497,23 @@ def _draw_rotated_text(
     x_offset = center_px[0] - (temp_w // 2)
     y_offset = center_px[1] - (temp_h // 2)
 
+    # Clip the rotated text to the main image
+    left, top = max(x_offset, 0), max(y_offset, 0)
+    right = min(x_offset + temp_w, img.shape[1])
+    bottom = min(y_offset + temp_h, img.shape[0])
+    if right <= left or bottom <= top:
+        return
+
     # Overlay the rotated text onto the main image using alpha blending
-    for r in range(rotated_text_img.shape[0]):
-        for c in range(rotated_text_img.shape[1]):
-            if rotated_text_img[r, c, 3] != 0:  # Check alpha channel
-                y_pos, x_pos = y_offset + r, x_offset + c
-                if 0 <= y_pos < img.shape[0] and 0 <= x_pos < img.shape[1]:
-                    alpha = rotated_text_img[r, c, 3] / 255.0
-                    img[y_pos, x_pos] = (1 - alpha) * img[
-                        y_pos, x_pos
-                    ] + alpha * np.array(color, dtype=np.float32)
+    alpha = rotated_text_img[top - y_offset:bottom - y_offset, left - x_offset:right - x_offset, 3:] / 255.0
+    region = img[top:bottom, left:right]
+    if region.ndim == 2:
+        alpha = alpha[..., 0]
+    if context.canvas == "palette":
+        # Indices cannot be blended, see _put_text.
+        region[alpha >= 0.5] = context.line_color
+        return
+    region[:] = (1 - alpha) * region + alpha * np.array(context.line_color, dtype=np.float32)
 
 
 def _draw_dashed_polyline(img, points, color, thickness):
@@ -336,7 +559,7 @@ def _draw_dashed_polyline(img, points, color, thickness):
 def draw_lines(img, lines, color, scale=100, offset=(0, 0), thickness=THICKNESS, is_dashed=False):
     for line in lines:
         # Get the final render points, which will be smoothed if the line is smooth.
-        render_points = line.get_render_points()
+        render_points = line.get_render_points(scale=scale)
         if render_points: # Apply offset (in inches), scale, and round to integer pixel coordinates
             offset_points = [
                 (round((p[0] + offset[0]) * scale), round((p[1] + offset[1]) * scale))
@@ -0,0 +1,185 @@
+import math
+from typing import NamedTuple
+import numpy as np
+from .instrumentation import timed
+from .nesting import NESTING_SPACING_IN
+
+YARD_IN = 36
+YARDAGE_STEP = 1 / 8 # Fabric is sold in eighths of a yard
+# Share of a marker covered by pieces that nesting typically reaches
+NESTING_EFFICIENCY = 0.8
+# Outline points this close to x=0 lie on the fold of pieces cut on the fold
+FOLD_TOLERANCE_IN = 1e-6
+
+
+class PieceEstimate(NamedTuple):
+    """The size of one pattern piece, measured from its outline. Lengths in inches, areas in square inches."""
+    name: str
+    area: float
+    perimeter: float
+    cut_area: float # Including the seam allowance
+    cut_perimeter: float
+    cut_width: float # Bounding box of the piece with its seam allowance
+    cut_height: float
+    cut_count: int = 1 # How many times the piece is cut
+
+
+class YardageEstimate(NamedTuple):
+    """How much fabric a pattern needs at one fabric width."""
+    length_in: float
+    yards: float # length_in rounded up to YARDAGE_STEP
+    cut_area: float
+    pieces: tuple
+
+
+def polygon_area(points):
+    """The area of a closed polygon given as an (N, 2) array, by the shoelace formula."""
+    x, y = points[:, 0], points[:, 1]
+    return abs(float(np.dot(x, np.roll(y, -1)) - np.dot(np.roll(x, -1), y))) / 2
+
+
+def polygon_perimeter(points):
+    """The perimeter of a closed polygon given as an (N, 2) array."""
+    steps = np.roll(points, -1, axis=0) - points
+    return float(np.sum(np.hypot(steps[:, 0], steps[:, 1])))
+
+
+def estimate_piece(piece, seam_allowance):
+    """
+    Measures a piece from its outline. The seam allowance is added as a
+    parallel offset (Steiner's formula), exact for convex pieces and a slight
+    overestimate of the area for pieces with inward corners. Pieces cut on the
+    fold are measured unfolded, as they lie on the fabric once cut.
+
+    Raises:
+        ValueError: If the piece has no outline, see `PatternPiece.set_outline`.
+    """
+    outline = piece.get_outline()
+    if outline is None or len(outline) < 3:
+        raise ValueError(f"'{piece.name}' has no outline to measure.")
+    area = polygon_area(outline)
+    perimeter = polygon_perimeter(outline)
+    width, height = np.ptp(outline, axis=0)
+    if piece.cut_on_fold:
+        # Mirror the half piece about the fold at x=0; the fold edge is not cut.
+        on_fold = np.abs(outline[:, 0]) <= FOLD_TOLERANCE_IN
+        steps = np.roll(outline, -1, axis=0) - outline
+        fold_length = float(np.sum(np.hypot(steps[:, 0], steps[:, 1])[on_fold & np.roll(on_fold, -1)]))
+        area, perimeter = 2 * area, 2 * (perimeter - fold_length)
+        width = 2 * np.max(np.abs(outline[:, 0]))
+    return PieceEstimate(
+        name=piece.name,
+        area=area,
+        perimeter=perimeter,
+        cut_area=area + perimeter * seam_allowance + math.pi * seam_allowance ** 2,
+        cut_perimeter=perimeter + 2 * math.pi * seam_allowance,
+        cut_width=float(width) + 2 * seam_allowance,
+        cut_height=float(height) + 2 * seam_allowance,
+        cut_count=piece.cut_count,
+    )
+
+
+def yardage_bound(cut_areas, cut_heights, fabric_width, efficiency=NESTING_EFFICIENCY, spacing_in=NESTING_SPACING_IN):
+    """
+    Estimates marker lengths for many patterns at once.
+
+    The marker must be at least as long as its tallest piece and cover the area
+    of all pieces, spaced apart, at the given nesting efficiency.
+
+    Args:
+        cut_areas: Per pattern, the total cut area in square inches, including
+          the spacing around the pieces.
+        cut_heights: Per pattern, the height of its tallest piece in inches.
+        fabric_width: The usable fabric width in inches.
+        efficiency: The share of the marker covered by pieces.
+        spacing_in: The gap kept around every piece.
+
+    Returns:
+        An array of marker lengths in inches.
+    """
+    cut_areas = np.asarray(cut_areas, dtype=float)
+    cut_heights = np.asarray(cut_heights, dtype=float)
+    area_length = cut_areas / (fabric_width * efficiency)
+    return np.maximum(area_length, cut_heights + spacing_in)
+
+
+def to_yards(length_in, step=YARDAGE_STEP):
+    """Converts a length in inches to yards, rounded up to whole steps."""
+    return np.ceil(np.asarray(length_in) / YARD_IN / step - 1e-9) * step
+
+
+def _spaced_area(piece, spacing_in=NESTING_SPACING_IN):
+    """The cut area of a piece together with half the spacing kept around it."""
+    margin = spacing_in / 2
+    return piece.cut_area + piece.cut_perimeter * margin + math.pi * margin ** 2
+
+
+def _measure_pattern(pattern_pieces, seam_allowance, fabric_width, copies=1):
+    """
+    Measures the pieces of one pattern for a yardage estimate.
+
+    Returns:
+        A tuple of (piece estimates, cut area, spaced area, height of the tallest piece).
+
+    Raises:
+        ValueError: If a piece is wider than the fabric.
+    """
+    pieces = tuple(estimate_piece(piece, seam_allowance) for piece in pattern_pieces)
+    for piece in pieces:
+        if piece.cut_width > fabric_width:
+            raise ValueError(f"'{piece.name}' is {piece.cut_width:.1f} in wide and does not fit {fabric_width} in fabric.")
+    cut_area = sum(piece.cut_area * piece.cut_count for piece in pieces) * copies
+    spaced_area = sum(_spaced_area(piece) * piece.cut_count for piece in pieces) * copies
+    return pieces, cut_area, spaced_area, max((piece.cut_height for piece in pieces), default=0.0)
+
+
+def estimate_yardage(pattern_pieces, seam_allowance, fabric_width, efficiency=NESTING_EFFICIENCY, copies=1):
+    """
+    Estimates the fabric needed to cut a pattern from its vector geometry,
+    without laying it out or rendering it.
+
+    Args:
+        pattern_pieces: The drafted pieces; seam allowances need not be added.
+        seam_allowance: The seam allowance in inches.
+        fabric_width: The usable fabric width in inches.
+        efficiency: The share of the marker covered by pieces.
+        copies: How many garments are cut, on top of each piece's own cut count.
+
+    Returns:
+        A YardageEstimate.
+
+    Raises:
+        ValueError: If a piece is wider than the fabric.
+    """
+    pieces, cut_area, spaced_area, tallest = _measure_pattern(pattern_pieces, seam_allowance, fabric_width, copies)
+    length_in = float(yardage_bound(spaced_area, tallest, fabric_width, efficiency))
+    return YardageEstimate(length_in, float(to_yards(length_in)), cut_area, pieces)
+
+
+@timed("estimate.quote")
+def quote_yardage(draft, measurement_sets, garment_specs, fabric_width, efficiency=NESTING_EFFICIENCY, copies=1):
+    """
+    Estimates the yardage of a garment for many customers, drafting geometry
+    only. Each entry matches `estimate_yardage(...).yards` for the same draft.
+
+    Args:
+        draft: A draft function taking (measurements, garment_specs, finish=False).
+        measurement_sets: An iterable of Measurements (or store views).
+        garment_specs: The GarmentSpecs of the garment.
+        fabric_width: The usable fabric width in inches.
+        efficiency: The share of the marker covered by pieces.
+        copies: How many garments are cut, on top of each piece's own cut count.
+
+    Returns:
+        An array of yards per measurement set, rounded up to YARDAGE_STEP.
+
+    Raises:
+        ValueError: If a piece is wider than the fabric.
+    """
+    spaced_areas, cut_heights = [], []
+    for measurements in measurement_sets:
+        pattern_pieces = draft(measurements, garment_specs, finish=False)
+        _, _, spaced_area, tallest = _measure_pattern(pattern_pieces, garment_specs.seam_allowance, fabric_width, copies)
+        spaced_areas.append(spaced_area)
+        cut_heights.append(tallest)
+    return to_yards(yardage_bound(spaced_areas, cut_heights, fabric_width, efficiency))
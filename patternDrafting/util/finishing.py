@@ -0,0 +1,39 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from .instrumentation import timed
+
+
+def finish_piece(piece, seam_allowance, scale=100, context=None):
+    """
+    Adds the seam allowance of one piece and computes its outline contour and
+    label box, so they are cached before the piece is drawn.
+    """
+    piece.add_seam_allowance(seam_allowance, scale=scale)
+    piece.get_outline_contour(scale=scale, context=context)
+    piece.get_label_box(scale=scale, context=context)
+    return piece
+
+
+@timed("draft.finish")
+def finish_pieces(pattern_pieces, seam_allowance, scale=100, max_workers=None, context=None):
+    """
+    Finishes drafted pieces concurrently. The work is mostly OpenCV calls that
+    release the GIL, so a garment takes about as long as its slowest piece.
+
+    Args:
+        pattern_pieces: The pieces to finish; each is finished in place.
+        seam_allowance: The seam allowance in inches.
+        scale: The resolution (pixels per inch) of the contours and label boxes.
+        max_workers: The number of threads, by default one per piece up to the CPU count.
+        context: The RenderContext the pieces will be drawn with, DEFAULT_CONTEXT if None.
+
+    Returns:
+        The pieces, in the order they were given.
+    """
+    pattern_pieces = list(pattern_pieces)
+    workers = min(len(pattern_pieces), max_workers or os.cpu_count() or 1)
+    if workers <= 1:
+        return [finish_piece(piece, seam_allowance, scale, context) for piece in pattern_pieces]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # map yields results in input order, whichever piece finishes first
+        return list(executor.map(lambda piece: finish_piece(piece, seam_allowance, scale, context), pattern_pieces))
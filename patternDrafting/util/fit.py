@@ -0,0 +1,111 @@
+import math
+from typing import NamedTuple
+import numpy as np
+from .dart import Dart
+from .instrumentation import timed
+
+BUST_DART_NAME = "Bust Dart"
+FIT_SAMPLES = 128
+
+
+class FitParameters(NamedTuple):
+    """Drafting choices that are tuned to the customer rather than measured."""
+    dart_back_off: float = 0.2 # Share of the apex to side seam distance the bust dart tip stops short of the apex
+    dart_rotation_threshold: float = 1.0 # Inches of back waist suppression below which the shoulder dart moves into the waist dart
+
+
+DEFAULT_FIT = FitParameters()
+
+# The ranges `optimise_fit` searches. The hem dip at waist darts is not tuned:
+# it only shows in the seam allowance, which is not drafted while optimising.
+PARAMETER_BOUNDS = {
+    "dart_back_off": (0.0, 0.4),
+    "dart_rotation_threshold": (0.0, 3.0),
+}
+
+
+class FitTargets(NamedTuple):
+    """What a good fit looks like, and how much each deviation costs."""
+    max_dart_angle: float = 25.0 # Degrees at the dart tip above which darts pucker
+    angle_weight: float = 0.01 # Per squared degree above max_dart_angle
+    target_tip_gap: float = 1.0 # Inches the bust dart tip should stop short of the bust apex
+    tip_gap_weight: float = 1.0 # Per squared inch the tip is off target_tip_gap
+
+
+# The columns of the arrays returned by `measure_fit`
+FEATURES = ("max_dart_angle", "bust_tip_gap")
+
+
+def dart_angle(dart):
+    """The angle in degrees between the legs of a dart at its tip."""
+    tip = dart.tip
+    (x1, y1), (x2, y2) = dart.leg1.points[0], dart.leg2.points[0]
+    angle = math.atan2(y2 - tip[1], x2 - tip[0]) - math.atan2(y1 - tip[1], x1 - tip[0])
+    return abs(math.degrees((angle + math.pi) % (2 * math.pi) - math.pi))
+
+
+def measure_fit(pattern_pieces, measurements):
+    """
+    Measures a drafted pattern for the fit objective.
+
+    Args:
+        pattern_pieces: The drafted pieces.
+        measurements: The Measurements they were drafted for, to locate the bust apex.
+
+    Returns:
+        An array with one value per name in FEATURES.
+    """
+    darts = [marking for piece in pattern_pieces for marking in piece.marking_lines if isinstance(marking, Dart) and marking.leg1 and marking.leg2]
+    max_angle = max((dart_angle(dart) for dart in darts), default=0.0)
+
+    apex = (measurements.bust_point_separation / 2, measurements.shoulder_to_bust)
+    bust_darts = [dart for dart in darts if dart.name == BUST_DART_NAME]
+    tip_gap = math.dist(bust_darts[0].tip, apex) if bust_darts else 0.0
+    return np.array([max_angle, tip_gap])
+
+
+def fit_objective(features, targets=FitTargets()):
+    """
+    Scores measured fits, lower is better. Seam lengths are not scored, the
+    drafts true their seams so sewn seams always match.
+
+    Args:
+        features: An (N, len(FEATURES)) array from stacked `measure_fit` results.
+        targets: The FitTargets to score against.
+
+    Returns:
+        An array of N scores.
+    """
+    features = np.atleast_2d(features)
+    angle_excess = np.maximum(features[:, 0] - targets.max_dart_angle, 0)
+    return (targets.angle_weight * angle_excess ** 2
+            + targets.tip_gap_weight * (features[:, 1] - targets.target_tip_gap) ** 2)
+
+
+@timed("fit.optimise")
+def optimise_fit(draft, measurements, garment_specs, targets=FitTargets(), samples=FIT_SAMPLES, seed=0, base=DEFAULT_FIT):
+    """
+    Searches PARAMETER_BOUNDS for the FitParameters that score best for one
+    customer. Candidates are drafted as geometry only and scored together.
+
+    Args:
+        draft: A draft function taking (measurements, garment_specs, fit=..., finish=...).
+        measurements: The customer's Measurements.
+        garment_specs: The GarmentSpecs of the garment.
+        targets: The FitTargets to score against.
+        samples: How many parameter sets to try, including `base`.
+        seed: Seed for the random candidates, so results are reproducible.
+        base: The parameters tried first; parameters without bounds are kept.
+
+    Returns:
+        A tuple of the best FitParameters and its score.
+    """
+    rng = np.random.default_rng(seed)
+    candidates = [base]
+    for _ in range(samples - 1):
+        candidates.append(base._replace(**{name: float(rng.uniform(low, high)) for name, (low, high) in PARAMETER_BOUNDS.items()}))
+
+    features = np.stack([measure_fit(draft(measurements, garment_specs, fit=fit, finish=False), measurements) for fit in candidates])
+    scores = fit_objective(features, targets)
+    best = int(np.argmin(scores))
+    return candidates[best], float(scores[best])
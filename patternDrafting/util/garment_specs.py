@@ -1,33 +1,55 @@
-import yaml
+import logging
 from .necklines import create_neckline
+from .schema import Field, SchemaError, fill_defaults, load_yaml, read_fields
+
+logger = logging.getLogger(__name__)
+
+# Where each spec lives in the garment spec YAML files. Lengths are in inches.
+SCHEMA = (
+    Field("sleeve_length", None, "sleeve_length"),
+    Field("cuff_ease", None, "cuff_ease"),
+    Field("waist_to_hem", None, "waist_to_hem"),
+    Field("bust_ease", None, "bust_ease"),
+    Field("waist_ease", None, "waist_ease"),
+    Field("hip_ease", None, "hip_ease"),
+    Field("seam_allowance", None, "seam_allowance", 0.5),
+    # Nested 'neckline' specs
+    Field("front_neckline_depth", "neckline", "front depth"),
+    Field("back_neckline_depth", "neckline", "back depth"),
+    Field("neckline_radius", "neckline", "radius"),
+    # A single shape for both sides, or different front and back shapes
+    Field("neckline_shape", "neckline", "shape", "scoop", kind="text"),
+    Field("front_neckline_shape", "neckline", "front shape", lambda s: s["neckline_shape"], kind="text"),
+    Field("back_neckline_shape", "neckline", "back shape", lambda s: s["neckline_shape"], kind="text"),
+)
+
+FIELDS = tuple(field.name for field in SCHEMA)
 
 class GarmentSpecs:
     """A class to hold garment specification data."""
+    __slots__ = FIELDS
 
-    def __init__(self, **kwargs):
+    def __init__(self, strict=False, **kwargs):
         """
         Initializes the GarmentSpecs object.
 
         Args:
+            strict: Raise a SchemaError for missing specs instead of using the defaults.
             **kwargs: Keyword arguments matching the garment spec names.
+
+        Raises:
+            SchemaError: If a spec has the wrong type.
         """
-        self.sleeve_length = kwargs.get('sleeve_length', 0)
-        self.cuff_ease = kwargs.get('cuff_ease', 0)
-        self.waist_to_hem = kwargs.get('waist_to_hem', 0)
-        self.bust_ease = kwargs.get('bust_ease', 0)
-        self.waist_ease = kwargs.get('waist_ease', 0)
-        self.hip_ease = kwargs.get('hip_ease', 0)
-        self.seam_allowance = kwargs.get('seam_allowance', 0.5)
-
-        neckline_specs = kwargs.get('neckline', {})
-        self.front_neckline_depth = neckline_specs.get('front depth', 0)
-        self.back_neckline_depth = neckline_specs.get('back depth', 0)
-        self.neckline_radius = neckline_specs.get('radius', 0)
-
-        # Handle single shape or different front/back shapes
-        single_shape = neckline_specs.get('shape', 'scoop') # Default if no shapes are specified
-        self.front_neckline_shape = neckline_specs.get('front shape', single_shape)
-        self.back_neckline_shape = neckline_specs.get('back shape', single_shape)
+        for name, value in read_fields(SCHEMA, kwargs, strict).items():
+            setattr(self, name, value)
+
+    @classmethod
+    def from_values(cls, **values):
+        """Creates GarmentSpecs from flat values by attribute name."""
+        garment_specs = cls.__new__(cls)
+        for name, value in fill_defaults(SCHEMA, values).items():
+            setattr(garment_specs, name, value)
+        return garment_specs
 
     def create_bodice_neckline(self, side, shoulder_height):
         """
@@ -48,7 +70,7 @@ class GarmentSpecs:
             shape = self.back_neckline_shape
         else:
             # Fallback for safety, though it shouldn't be reached with current code
-            print(f"Warning: Unknown side '{side}' for neckline. Defaulting to back depth.")
+            logger.warning("Unknown side '%s' for neckline. Defaulting to back depth.", side)
             depth_value = self.back_neckline_depth
             shape = self.back_neckline_shape
 
@@ -56,8 +78,9 @@ class GarmentSpecs:
         return create_neckline(shape, shoulder_height, depth_value, self.neckline_radius), self.neckline_radius
 
     @classmethod
-    def from_file(cls, filepath):
+    def from_file(cls, filepath, strict=False):
         """Loads garment specs from a YAML file."""
-        with open(filepath, 'r') as f:
-            data = yaml.safe_load(f)
-        return cls(**data)
\ No newline at end of file
+        try:
+            return cls(strict=strict, **load_yaml(filepath))
+        except SchemaError as e:
+            raise SchemaError(f"{filepath}: {e}") from None
\ No newline at end of file
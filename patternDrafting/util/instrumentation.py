@@ -0,0 +1,158 @@
+import functools
+import logging
+import time
+
+# Timing spans and counters are emitted as log records below DEBUG on a dedicated
+# logger. Nothing listens to that logger unless profiling is enabled, in which case
+# `span` and `count` are a single cached level check. Keeping the state inside the
+# logging module also means every copy of this module (e.g. imported as both
+# `util.instrumentation` and `patternDrafting.util.instrumentation`) shares it.
+TIMING = 5
+logging.addLevelName(TIMING, "TIMING")
+
+_timing_logger = logging.getLogger("sewing.timing")
+_timing_logger.propagate = False
+if _timing_logger.level == logging.NOTSET:
+    _timing_logger.setLevel(logging.WARNING)
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.start
+        _timing_logger.log(TIMING, "%s took %.6fs", self.name, elapsed,
+                           extra={"metric": self.name, "kind": "span", "value": elapsed})
+        return False
+
+
+def profiling_enabled():
+    """Returns True if any timing hook is installed."""
+    return _timing_logger.isEnabledFor(TIMING)
+
+
+def span(name):
+    """
+    Context manager timing the enclosed block as `name`.
+    Returns a shared no-op object when profiling is disabled.
+    """
+    if not _timing_logger.isEnabledFor(TIMING):
+        return _NULL_SPAN
+    return _Span(name)
+
+
+def timed(name):
+    """Decorator timing every call of the wrapped function as `name`."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _timing_logger.isEnabledFor(TIMING):
+                return fn(*args, **kwargs)
+            with _Span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def count(name, value=1):
+    """Adds `value` to the counter `name` when profiling is enabled."""
+    if _timing_logger.isEnabledFor(TIMING):
+        _timing_logger.log(TIMING, "%s += %s", name, value,
+                           extra={"metric": name, "kind": "counter", "value": value})
+
+
+class MetricsCollector(logging.Handler):
+    """Aggregates span durations into histograms and counter increments into totals."""
+
+    def __init__(self):
+        super().__init__(TIMING)
+        self.counters = {}
+        self.histograms = {}
+
+    def emit(self, record):
+        kind = getattr(record, "kind", None)
+        if kind == "span":
+            self.histograms.setdefault(record.metric, []).append(record.value)
+        elif kind == "counter":
+            self.counters[record.metric] = self.counters.get(record.metric, 0) + record.value
+
+    def reset(self):
+        with self.lock:
+            self.counters = {}
+            self.histograms = {}
+
+    def summary(self):
+        """
+        Returns a dict with the counters and, per span name, the call count,
+        total, mean, p50, p95 and max duration in seconds.
+        """
+        spans = {}
+        for name, values in self.histograms.items():
+            ordered = sorted(values)
+            spans[name] = {
+                "count": len(ordered),
+                "total": sum(ordered),
+                "mean": sum(ordered) / len(ordered),
+                "p50": ordered[len(ordered) // 2],
+                "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+                "max": ordered[-1],
+            }
+        return {"counters": dict(self.counters), "spans": spans}
+
+
+class _HookHandler(logging.Handler):
+    """Forwards every metric to `hook(kind, name, value)`."""
+
+    def __init__(self, hook):
+        super().__init__(TIMING)
+        self.hook = hook
+
+    def emit(self, record):
+        kind = getattr(record, "kind", None)
+        if kind is not None:
+            self.hook(kind, record.metric, record.value)
+
+
+def enable_profiling(hook=None):
+    """
+    Installs a timing hook and enables spans and counters.
+
+    Args:
+        hook: Optional callable `hook(kind, name, value)` where kind is "span"
+          (value in seconds) or "counter". Defaults to a new MetricsCollector.
+
+    Returns:
+        The installed handler; pass it to `disable_profiling` to remove it.
+        For the default collector, call `.summary()` on it to read the metrics.
+    """
+    handler = MetricsCollector() if hook is None else _HookHandler(hook)
+    _timing_logger.addHandler(handler)
+    _timing_logger.setLevel(TIMING)
+    return handler
+
+
+def disable_profiling(handler):
+    """Removes a handler installed by `enable_profiling`."""
+    _timing_logger.removeHandler(handler)
+    if not _timing_logger.handlers:
+        _timing_logger.setLevel(logging.WARNING)
@@ -1,33 +1,201 @@
-from scipy.interpolate import make_interp_spline
 import numpy as np
+import functools
 import math
 import enum
+from .instrumentation import span
+
+# Smooth curves are sampled at 2**level + 1 points. Every level contains the samples
+# of the coarser levels, so one evaluation at MAX_LOD_LEVEL serves every scale.
+MIN_LOD_LEVEL = 3
+MAX_LOD_LEVEL = 10
+DEFAULT_TOLERANCE_PX = 0.25 # Maximum chord error in pixels when a render scale is given
+DEFAULT_TOLERANCE_IN = 0.002 # Maximum chord error in inches when no scale is given
 
 class Line:
   def __init__(self, points, smooth=False):
+    self._version = 0
     self.points = points
     self.smooth = smooth
+    self._lod = None
+    self._arc = None
+
+  @property
+  def points(self):
+    return self._points
+
+  @points.setter
+  def points(self, points):
+    self._points = points
+    self.invalidate_cache()
+
+  def invalidate_cache(self):
+    """Drops the cached curve samples and arc lengths, call after editing `points` in place."""
+    self._version += 1
 
-  def get_render_points(self):
+  def get_render_points(self, scale=None, tolerance_px=DEFAULT_TOLERANCE_PX):
     """
     Returns the list of points that make up the line, generating points for a
     smooth curve if necessary.
+
+    Smooth curves are sampled with just enough points that no chord deviates
+    from the curve by more than `tolerance_px` at the given scale.
+
+    Args:
+      scale: Optional render scale in pixels per inch. Without it the curve is
+        sampled to DEFAULT_TOLERANCE_IN.
+      tolerance_px: The allowed chord error in pixels when a scale is given.
     """
     if not self.smooth or len(self.points) <= 2:
       return self.points
 
-    k = min(len(self.points) - 1, 3)
-    points_arr = np.array(self.points)
-    t = np.arange(len(self.points))
-    steps = np.linspace(t.min(), t.max(), 500)
+    samples, errors = self._get_lod()
+    tolerance = tolerance_px / scale if scale else DEFAULT_TOLERANCE_IN
+    level = MAX_LOD_LEVEL
+    for candidate in range(MIN_LOD_LEVEL, MAX_LOD_LEVEL):
+      # Chord errors are only worked out for the levels that are actually tried
+      if errors[candidate] is None:
+        errors[candidate] = _lod_error(samples, candidate)
+      if errors[candidate] <= tolerance:
+        level = candidate
+        break
+    return list(samples[::2 ** (MAX_LOD_LEVEL - level)])
 
-    # Use 'natural' boundary conditions only when appropriate (cubic splines)
-    bc_type = 'natural' if k == 3 else None
+  def _get_lod(self):
+    """
+    Returns the finest curve samples and the chord error of every level (None
+    until calculated), evaluating the spline again only if the control points
+    changed since the last call.
+    """
+    key = self._version
+    if self._lod is not None and self._lod[0] == key:
+      return self._lod[1], self._lod[2]
+
+    with span("line.spline"):
+      samples = spline_basis(len(self.points)) @ np.array(self.points, dtype=float)
+      errors = _new_lod_errors()
 
-    fx = make_interp_spline(t, points_arr[:, 0], k=k, bc_type=bc_type)
-    fy = make_interp_spline(t, points_arr[:, 1], k=k, bc_type=bc_type)
+    self._lod = (key, samples, errors)
+    return samples, errors
 
-    return list(np.stack((fx(steps), fy(steps)), axis=-1))
+  def set_samples(self, samples):
+    """
+    Supplies the finest curve samples of a smooth line that were computed
+    elsewhere, e.g. by mapping a curve template, so they are not evaluated again.
+    They must match what `spline_basis` gives for the current points.
+    """
+    self._lod = (self._version, samples, _new_lod_errors())
+
+  def _get_arc(self):
+    """
+    Returns the rendered points as an array together with the cumulative arc
+    length at each of them, recalculating only if the line changed since the last call.
+    """
+    key = (self._version, self.smooth)
+    if self._arc is not None and self._arc[0] == key:
+      return self._arc[1], self._arc[2]
+
+    points = np.array(self.get_render_points(), dtype=float).reshape(-1, 2)
+    lengths = np.zeros(len(points))
+    np.cumsum(np.hypot(*np.diff(points, axis=0).T), out=lengths[1:])
+    self._arc = (key, points, lengths)
+    return points, lengths
+
+  def _locate(self, distance):
+    """
+    Finds the segment and the fraction along it at each arc length in `distance`
+    with a binary search. Distances beyond the ends continue along the first or
+    last segment.
+    """
+    points, lengths = self._get_arc()
+    distance = np.asarray(distance, dtype=float)
+    index = np.clip(np.searchsorted(lengths, distance, side='right') - 1, 0, max(len(points) - 2, 0))
+    if len(points) < 2:
+      return points, index, np.zeros_like(distance)
+    segment = lengths[index + 1] - lengths[index]
+    t = (distance - lengths[index]) / np.where(segment == 0, 1, segment)
+    return points, index, t
+
+  def length(self):
+    """Returns the arc length of the line, following the curve for smooth lines."""
+    return float(self._get_arc()[1][-1]) if self.points else 0.0
+
+  def point_at_length(self, distance):
+    """
+    Returns the point at arc length `distance` from the start of the line.
+
+    Args:
+      distance: A distance in inches, or an array of them.
+
+    Returns:
+      An (x, y) tuple, or an (N, 2) array for an array of distances.
+    """
+    points, index, t = self._locate(distance)
+    if len(points) < 2:
+      result = np.broadcast_to(points[0], np.shape(t) + (2,))
+    else:
+      start = points[index]
+      result = start + (points[np.minimum(index + 1, len(points) - 1)] - start) * t[..., None]
+    return tuple(result.tolist()) if result.ndim == 1 else result
+
+  def tangent_at(self, distance):
+    """
+    Returns the unit direction of the line at arc length `distance`, as an (x, y)
+    tuple or an (N, 2) array for an array of distances.
+    """
+    points, index, _ = self._locate(distance)
+    if len(points) < 2:
+      return None
+    direction = points[index + 1] - points[index]
+    norm = np.hypot(direction[..., 0], direction[..., 1])[..., None]
+    result = direction / np.where(norm == 0, 1, norm)
+    return tuple(result.tolist()) if result.ndim == 1 else result
+
+  def normal_at(self, distance):
+    """
+    Returns the unit normal of the line at arc length `distance`, the tangent
+    turned by 90 degrees like `get_perpendicular_point`.
+    """
+    tangent = self.tangent_at(distance)
+    if tangent is None:
+      return None
+    if isinstance(tangent, tuple):
+      return (-tangent[1], tangent[0])
+    return np.stack((-tangent[:, 1], tangent[:, 0]), axis=-1)
+
+  def project(self, point):
+    """Returns the arc length along the line of the point on it closest to `point`."""
+    points, lengths = self._get_arc()
+    if len(points) < 2:
+      return 0.0
+    starts = points[:-1]
+    segments = points[1:] - starts
+    length_sq = np.einsum('ij,ij->i', segments, segments)
+    t = np.einsum('ij,ij->i', np.asarray(point, dtype=float) - starts, segments) / np.where(length_sq == 0, 1, length_sq)
+    t = np.minimum(np.maximum(t, 0), 1)
+    distance_sq = np.sum((starts + segments * t[:, None] - point) ** 2, axis=1)
+    index = int(np.argmin(distance_sq))
+    return float(lengths[index] + t[index] * (lengths[index + 1] - lengths[index]))
+
+  def split_at_length(self, distance):
+    """
+    Splits the line at arc length `distance` into two lines that share the
+    split point. Smooth lines are split along their rendered points, so both
+    halves are returned as polylines.
+    """
+    distance = min(max(distance, 0.0), self.length())
+    points, index, t = self._locate(distance)
+    split_point = self.point_at_length(distance)
+    if len(points) < 2:
+      return Line([split_point]), Line([split_point])
+    index = int(index)
+    if not self.smooth or len(self.points) <= 2:
+      points = self.points
+    else:
+      points = [tuple(point) for point in points.tolist()]
+    # Do not repeat a vertex the split falls on
+    first = list(points[:index + 1]) + ([split_point] if t > 0 else [])
+    second = [split_point] + (list(points[index + 1:]) if t < 1 else [])
+    return Line(first), Line(second)
 
   def __add__(self, other):
     """Combines two Line objects by concatenating their points."""
@@ -37,17 +205,22 @@ class Line:
     return Line(new_points, smooth=self.smooth or other.smooth)
 
   def get_midpoint(self):
-      """Calculates the midpoint of a straight line."""
+      """Calculates the point halfway along the line, following curves and polylines."""
       if len(self.points) != 2:
-          # For polylines, this would be more complex (finding the center of the arc length)
-          return self.points[len(self.points) // 2]
+          return self.point_at_length(self.length() / 2)
       p1, p2 = self.points
       return ((p1[0] + p2[0]) / 2, (p1[1] + p2[1]) / 2)
 
   def get_perpendicular_point(self, from_point, distance):
-      """Calculates a point at a given distance perpendicular to the line from a specific point."""
+      """
+      Calculates a point at a given distance perpendicular to the line from a specific point.
+      For curves and polylines the direction is taken where the line passes closest to `from_point`.
+      """
       if len(self.points) != 2:
-          return None # Not implemented for curves
+          normal = self.normal_at(self.project(from_point))
+          if normal is None:
+              return None
+          return (from_point[0] + distance * normal[0], from_point[1] + distance * normal[1])
       p1, p2 = self.points
       angle_rad = math.atan2(p2[1] - p1[1], p2[0] - p1[0])
       perp_angle_rad = angle_rad + math.pi / 2
@@ -171,3 +344,55 @@ class Line:
               # Intersection point
               return (x1 + t * (x2 - x1), y1 + t * (y2 - y1))
       return None
+
+
+@functools.lru_cache(maxsize=64)
+def spline_basis(point_count):
+  """
+  Returns the matrix that maps the control points of a smooth line to its
+  2**MAX_LOD_LEVEL + 1 curve samples.
+
+  The interpolating spline through the points is linear in them, so the matrix
+  only depends on their count and one matrix product replaces a spline fit.
+  """
+  # scipy is only needed once a curve is actually evaluated, so keep it out of module import.
+  from scipy.interpolate import make_interp_spline
+
+  k = min(point_count - 1, 3)
+  t = np.arange(point_count)
+  steps = np.linspace(t.min(), t.max(), 2 ** MAX_LOD_LEVEL + 1)
+
+  # Use 'natural' boundary conditions only when appropriate (cubic splines)
+  bc_type = 'natural' if k == 3 else None
+
+  # Fitting the identity gives the weight of every control point at every sample
+  basis = make_interp_spline(t, np.eye(point_count), k=k, bc_type=bc_type)(steps)
+  basis.setflags(write=False)
+  return basis
+
+
+def _new_lod_errors():
+  errors = [None] * (MAX_LOD_LEVEL + 1)
+  errors[MAX_LOD_LEVEL] = 0.0
+  return errors
+
+
+def _lod_error(samples, level):
+  """
+  Calculates the largest distance between the finest samples and the chords
+  of a level of detail.
+  """
+  stride = 2 ** (MAX_LOD_LEVEL - level)
+  # Every chord of the level against the finest samples it spans
+  spans = samples[:-1].reshape(-1, stride, 2)
+  starts = spans[:, :1]
+  chord = samples[stride::stride, None] - starts
+  offsets = spans - starts
+  # Working on the coordinate planes directly is cheaper than einsum for these small arrays
+  cx, cy = chord[..., 0], chord[..., 1]
+  ox, oy = offsets[..., 0], offsets[..., 1]
+  length_sq = cx * cx + cy * cy
+  t = (ox * cx + oy * cy) / np.where(length_sq == 0, 1, length_sq)
+  t = np.minimum(np.maximum(t, 0), 1)
+  dx, dy = ox - cx * t, oy - cy * t
+  return float(np.sqrt(np.max(dx * dx + dy * dy)))
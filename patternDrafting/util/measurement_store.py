@@ -0,0 +1,178 @@
+import os
+import numpy as np
+from .measurements import FIELDS, Measurements
+from .schema import SchemaError, read_csv_columns
+
+ID_FIELD = "customer_id"
+# The files of a store directory
+IDS_FILE = "ids.npy"
+FIELDS_FILE = "fields.npy"
+VALUES_FILE = "values.npy"
+
+
+def _id_dtype(customer_ids):
+    if all(isinstance(customer_id, (int, np.integer)) for customer_id in customer_ids):
+        return np.int64
+    width = max((len(str(customer_id)) for customer_id in customer_ids), default=1)
+    return f"U{max(width, 1)}"
+
+
+def write_store(dirpath, customer_ids, rows):
+    """
+    Writes a measurement store: a directory of .npy files holding the customer
+    ids in sorted order, so lookups are a binary search, and a
+    (measurements x customers) float64 block, so each measurement of every
+    customer is one contiguous row.
+
+    Args:
+        dirpath: The directory to write, created if needed.
+        customer_ids: The unique customer ids, all ints or all strings.
+        rows: For each customer, a Measurements object or a dict of values by
+          attribute name (missing values use the defaults).
+    """
+    customer_ids = list(customer_ids)
+    records = [row if isinstance(row, Measurements) else Measurements.from_values(**row) for row in rows]
+    if len(records) != len(customer_ids):
+        raise SchemaError("There must be one row of measurements per customer id.")
+    ids = np.array(customer_ids, dtype=_id_dtype(customer_ids))
+    order = np.argsort(ids, kind="stable")
+    ids = ids[order]
+    if len(ids) > 1 and (ids[1:] == ids[:-1]).any():
+        raise SchemaError("Customer ids must be unique.")
+    values = np.array([[getattr(record, name) for name in FIELDS] for record in records], dtype=np.float64).reshape(-1, len(FIELDS))
+    values = np.ascontiguousarray(values[order].T)
+
+    os.makedirs(dirpath, exist_ok=True)
+    np.save(os.path.join(dirpath, IDS_FILE), ids, allow_pickle=False)
+    np.save(os.path.join(dirpath, FIELDS_FILE), np.array(FIELDS), allow_pickle=False)
+    np.save(os.path.join(dirpath, VALUES_FILE), values, allow_pickle=False)
+
+
+def write_store_from_files(dirpath, customer_files):
+    """Builds a store from a dict of customer id to measurement YAML file."""
+    write_store(dirpath, customer_files.keys(), (Measurements.from_file(path) for path in customer_files.values()))
+
+
+def write_store_from_csv(dirpath, csv_filepath):
+    """Builds a store from a CSV table with a customer_id column and FIELDS as the other columns."""
+    columns = read_csv_columns(csv_filepath)
+    if ID_FIELD not in columns:
+        raise SchemaError(f"{csv_filepath}: Missing the '{ID_FIELD}' column.")
+    customer_ids = columns[ID_FIELD]
+    if all(customer_id.lstrip("-").isdigit() for customer_id in customer_ids):
+        customer_ids = [int(customer_id) for customer_id in customer_ids]
+    write_store(dirpath, customer_ids, Measurements.from_columns(columns))
+
+
+class MeasurementView:
+    """
+    Read-only Measurements-compatible access to one customer of a store.
+    Values are read from the mapped file when accessed, nothing is copied up front.
+    """
+    __slots__ = ("_store", "_index")
+
+    def __init__(self, store, index):
+        self._store = store
+        self._index = index
+
+    @property
+    def customer_id(self):
+        return self._store.ids[self._index].item()
+
+    def to_values(self):
+        return {name: getattr(self, name) for name in FIELDS}
+
+    def to_measurements(self):
+        """Copies the record into a standalone Measurements object."""
+        return Measurements.from_values(**self.to_values())
+
+    def __repr__(self):
+        return f"MeasurementView({self.customer_id!r})"
+
+
+def _field_property(name):
+    return property(lambda self: float(self._store.values[self._store.rows[name], self._index]))
+
+
+for _name in FIELDS:
+    setattr(MeasurementView, _name, _field_property(_name))
+
+
+class MeasurementStore:
+    """
+    A memory-mapped columnar table of measurements indexed by customer id.
+
+    Only the pages holding the measurements and customers that are actually
+    read are loaded from disk, so opening a store with millions of customers is
+    instant and scanning one measurement reads it at disk speed.
+
+    Args:
+        dirpath: A store written by `write_store`.
+    """
+
+    def __init__(self, dirpath):
+        try:
+            self.ids = np.load(os.path.join(dirpath, IDS_FILE), mmap_mode="r", allow_pickle=False)
+            fields = np.load(os.path.join(dirpath, FIELDS_FILE), allow_pickle=False).tolist()
+            self.values = np.load(os.path.join(dirpath, VALUES_FILE), mmap_mode="r", allow_pickle=False)
+        except (OSError, ValueError) as e:
+            raise SchemaError(f"{dirpath} is not a measurement store: {e}") from None
+        if self.values.shape != (len(fields), len(self.ids)):
+            raise SchemaError(f"{dirpath} is not a measurement store: the values do not match the ids and fields.")
+        # The row of each measurement, so stores written with other field orders still read correctly
+        self.rows = {name: row for row, name in enumerate(fields)}
+        missing = [name for name in FIELDS if name not in self.rows]
+        if missing:
+            raise SchemaError(f"{dirpath} is missing the measurements {', '.join(missing)}.")
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _index(self, customer_id):
+        index = int(np.searchsorted(self.ids, customer_id))
+        if index < len(self.ids) and self.ids[index] == customer_id:
+            return index
+        return None
+
+    def __contains__(self, customer_id):
+        return self._index(customer_id) is not None
+
+    def __getitem__(self, customer_id):
+        """Returns the MeasurementView of a customer, raising KeyError if there is none."""
+        index = self._index(customer_id)
+        if index is None:
+            raise KeyError(customer_id)
+        return MeasurementView(self, index)
+
+    def get(self, customer_id, default=None):
+        index = self._index(customer_id)
+        return default if index is None else MeasurementView(self, index)
+
+    def views(self, customer_ids=None):
+        """
+        Yields a MeasurementView for each of `customer_ids`, or for every
+        customer in id order. Unknown ids raise KeyError.
+        """
+        if customer_ids is None:
+            for index in range(len(self.ids)):
+                yield MeasurementView(self, index)
+            return
+
+        # Without a dtype, so longer string ids are not truncated into a false match
+        customer_ids = np.asarray(customer_ids)
+        # One vectorized binary search for the whole batch
+        indices = np.searchsorted(self.ids, customer_ids)
+        found = indices < len(self.ids)
+        found[found] = self.ids[indices[found]] == customer_ids[found]
+        for customer_id, index, ok in zip(customer_ids, indices, found):
+            if not ok:
+                raise KeyError(customer_id.item())
+            yield MeasurementView(self, int(index))
+
+    def column(self, name):
+        """Returns one measurement of every customer as a contiguous read-only array, in id order."""
+        if name == ID_FIELD:
+            return self.ids
+        if name not in FIELDS:
+            raise KeyError(name)
+        return self.values[self.rows[name]]
@@ -1,58 +1,115 @@
-import yaml
+from .schema import Field, SchemaError, fill_defaults, load_yaml, read_csv_columns, read_fields
+
+# Where each measurement lives in the measurement YAML files, in inches.
+# Defaults given as functions are derived from measurements listed before them.
+SCHEMA = (
+    # Nested 'shoulders' measurements
+    Field("shoulders", "shoulders", "full"),
+    Field("shoulder_length", "shoulders", "front shoulder length"),
+    Field("back_shoulder_length", "shoulders", "back shoulder length"),
+    Field("nape_to_shoulder_blade", "shoulders", "nape to shoulder blade"),
+    Field("shoulder_to_armpit", "shoulders", "armscye depth"),
+    Field("side_neck_rise", "shoulders", "side neck rise", 0.5),
+    Field("shoulder_slope", "shoulders", "shoulder slope", 1.75),
+    Field("neck_circumference", "shoulders", "neck circumference"),
+    # Nested 'bust' measurements
+    Field("bust", "bust", "full bust"),
+    Field("upper_bust", "bust", "upper bust"),
+    Field("shoulder_to_bust", "bust", "shoulder to apex"),
+    Field("back_bust_height", "bust", "nape to bust"),
+    Field("front_bust", "bust", "front bust", lambda m: m["bust"] / 2),
+    Field("back_bust", "bust", "back bust", lambda m: m["bust"] / 2),
+    Field("bust_point_separation", "bust", "apex to apex"),
+    Field("across_back", "bust", "back width", lambda m: m["upper_bust"] / 2),
+    Field("front_upper_bust", "bust", "front upper bust", lambda m: m["upper_bust"] / 2),
+    # Nested 'waist' measurements
+    Field("waist", "waist", "full"),
+    Field("front_waist", "waist", "front", lambda m: m["waist"] / 2),
+    Field("back_waist", "waist", "back", lambda m: m["waist"] / 2),
+    Field("shoulder_to_waist", "waist", "nape to waist"),
+    # Nested 'hip' measurements
+    Field("high_hip", "hip", "high hip"),
+    Field("hip", "hip", "full hip"),
+    Field("waist_to_high_hip", "hip", "waist to high hip"),
+    Field("waist_to_hip", "hip", "waist to hip"),
+    # Measured along the body's side curve rather than straight down
+    Field("waist_to_high_hip_curve", "hip", "waist to high hip curve", lambda m: m["waist_to_high_hip"]),
+    Field("waist_to_hip_curve", "hip", "waist to hip curve", lambda m: m["waist_to_hip"]),
+    # Nested 'arm' measurements
+    Field("above_elbow_circumference", "arm", "above_elbow_circumference"),
+    Field("bicep", "arm", "bicep"),
+)
+
+FIELDS = tuple(field.name for field in SCHEMA)
+
 
 class Measurements:
     """A class to hold body measurement data."""
+    __slots__ = FIELDS
 
-    def __init__(self, **kwargs):
+    def __init__(self, strict=False, **kwargs):
         """
         Initializes the Measurements object.
-        
+
         Args:
-            **kwargs: Keyword arguments matching the measurement names.
+            strict: Raise a SchemaError for missing measurements instead of
+              defaulting them to 0.
+            **kwargs: The measurement sections as laid out in the YAML files,
+              e.g. bust={'full bust': 36}.
+
+        Raises:
+            SchemaError: If a section or measurement has the wrong type.
         """
-        # Nested 'shoulders' measurements
-        shoulder_specs = kwargs.get('shoulders', {})
-        self.shoulders = shoulder_specs.get('full', 0)
-        self.shoulder_length = shoulder_specs.get('front shoulder length', 0)
-        self.back_shoulder_length = shoulder_specs.get('back shoulder length', 0)
-        self.nape_to_shoulder_blade = shoulder_specs.get('nape to shoulder blade', 0)
-        self.shoulder_to_armpit = shoulder_specs.get('armscye depth', 0)
-        self.side_neck_rise = shoulder_specs.get('side neck rise', 0.5) # Default if not in YAML
-        self.shoulder_slope = shoulder_specs.get('shoulder slope', 1.75) # Default if not in YAML
-        self.neck_circumference = shoulder_specs.get('neck circumference', 0)
-
-        # Nested 'bust' measurements
-        bust_specs = kwargs.get('bust', {})
-        self.bust = bust_specs.get('full bust', 0)
-        self.upper_bust = bust_specs.get('upper bust', 0)
-        self.shoulder_to_bust = bust_specs.get('shoulder to apex', 0)
-        self.back_bust_height = bust_specs.get('nape to bust', 0)
-        self.front_bust = bust_specs.get('front bust', self.bust / 2)
-        self.back_bust = bust_specs.get('back bust', self.bust / 2)
-        self.bust_point_separation = bust_specs.get('apex to apex', 0)
-        self.across_back = bust_specs.get('back width', self.upper_bust / 2)
-        self.front_upper_bust = bust_specs.get('front upper bust', self.upper_bust / 2)
-
-        # Nested 'waist' measurements
-        waist_specs = kwargs.get('waist', {})
-        self.waist = waist_specs.get('full', 0)
-        self.shoulder_to_waist = waist_specs.get('nape to waist', 0)
-
-        # Nested 'hip' measurements
-        hip_specs = kwargs.get('hip', {})
-        self.high_hip = hip_specs.get('high hip', 0)
-        self.hip = hip_specs.get('full hip', 0)
-        self.waist_to_high_hip = hip_specs.get('waist to high hip', 0)
-        self.waist_to_hip = hip_specs.get('waist to hip', 0)
-
-        # Nested 'arm' measurements
-        arm_specs = kwargs.get('arm', {})
-        self.above_elbow_circumference = arm_specs.get('above_elbow_circumference', 0)
-        self.bicep = arm_specs.get('bicep', 0)
+        for name, value in read_fields(SCHEMA, kwargs, strict).items():
+            setattr(self, name, value)
 
     @classmethod
-    def from_file(cls, filepath):
+    def from_values(cls, **values):
+        """Creates Measurements from flat values by attribute name, e.g. one table row."""
+        measurements = cls.__new__(cls)
+        for name, value in fill_defaults(SCHEMA, values).items():
+            setattr(measurements, name, value)
+        return measurements
+
+    @classmethod
+    def from_file(cls, filepath, strict=False):
         """Loads measurements from a YAML file."""
-        with open(filepath, 'r') as f:
-            data = yaml.safe_load(f)
-        return cls(**data)
\ No newline at end of file
+        try:
+            return cls(strict=strict, **load_yaml(filepath))
+        except SchemaError as e:
+            raise SchemaError(f"{filepath}: {e}") from None
+
+    @classmethod
+    def from_columns(cls, columns):
+        """
+        Creates one Measurements object per row of a columnar table.
+
+        Args:
+            columns: A mapping of column name to equally long sequences, with
+              columns named like the attributes in FIELDS, e.g. an npz file or
+              the columns of a parquet table. Other columns are ignored and
+              missing ones use the defaults.
+
+        Returns:
+            A list of Measurements.
+        """
+        present = [name for name in FIELDS if name in columns]
+        if not present:
+            raise SchemaError("The table has none of the measurement columns.")
+        if len({len(columns[name]) for name in present}) > 1:
+            raise SchemaError("All measurement columns must have the same length.")
+        # Walk the columns once instead of indexing them per row and field.
+        rows = zip(*(columns[name] for name in present))
+        return [cls.from_values(**dict(zip(present, row))) for row in rows]
+
+    @classmethod
+    def from_csv(cls, filepath):
+        """Loads a table of measurements, one person per row, with FIELDS as the header."""
+        try:
+            return cls.from_columns(read_csv_columns(filepath))
+        except SchemaError as e:
+            raise SchemaError(f"{filepath}: {e}") from None
+
+    def to_values(self):
+        """Returns the measurements as a dict by attribute name, the inverse of from_values."""
+        return {name: getattr(self, name) for name in FIELDS}
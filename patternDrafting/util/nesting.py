@@ -0,0 +1,302 @@
+import logging
+import math
+import random
+import time
+import numpy as np
+from .instrumentation import span
+
+logger = logging.getLogger(__name__)
+
+NESTING_RESOLUTION = 4 # Grid cells per inch used for placement
+NESTING_SPACING_IN = 0.25 # Minimum gap between nested pieces
+PAGE_BORDER_IN = 0.5 # Unprinted page border left by the pdf exporter
+PAGES_ACROSS_SPREAD = 2 # Sheet widths tried either side of the estimate when pages_across is not given
+
+# Rotations that keep the grainline parallel to the selvage, and the extra
+# quarter turns that are allowed when cutting on the cross grain.
+GRAIN_ROTATIONS = (0, 180)
+CROSSGRAIN_ROTATIONS = (0, 90, 180, 270)
+
+
+class _Candidate:
+    """One allowed orientation of a piece together with its occupancy mask."""
+
+    def __init__(self, index, piece, angle, mask, origin_in):
+        self.index = index # Position of the source piece in the caller's list
+        self.piece = piece
+        self.angle = angle
+        self.mask = mask
+        self.origin_in = origin_in # Piece coordinates of the mask's top-left cell
+        self.area = int(np.count_nonzero(mask))
+
+
+def _points(lines):
+    return [np.asarray(line.get_render_points(), dtype=float).reshape(-1, 2) for line in lines]
+
+
+def piece_mask(piece, resolution=NESTING_RESOLUTION, spacing_in=NESTING_SPACING_IN):
+    """
+    Rasterizes the filled outline of a piece onto a coarse grid, grown by half the
+    spacing on every side so that non-overlapping masks keep pieces `spacing_in` apart.
+
+    Returns:
+        A tuple of (uint8 mask, (x, y) piece coordinates of the mask's top-left cell).
+    """
+    import cv2 as cv
+
+    min_x, min_y, max_x, max_y = piece.get_bounding_box()
+    grow_px = max(1, math.ceil(spacing_in / 2 * resolution))
+    origin = (min_x - grow_px / resolution, min_y - grow_px / resolution)
+    width = math.ceil((max_x - min_x) * resolution) + 2 * grow_px + 1
+    height = math.ceil((max_y - min_y) * resolution) + 2 * grow_px + 1
+    mask = np.zeros((height, width), dtype=np.uint8)
+
+    to_cells = lambda lines: [
+        np.round((points - origin) * resolution).astype(np.int32).reshape(-1, 1, 2)
+        for points in _points(lines) if len(points)
+    ]
+    # Cut lines of pieces cut on the fold stop at the fold, so close them explicitly.
+    cv.polylines(mask, to_cells(piece.cut_lines), True, 1, 1)
+    cv.polylines(mask, to_cells(piece.pattern_lines), False, 1, 1)
+    contours, _ = cv.findContours(mask, cv.RETR_EXTERNAL, cv.CHAIN_APPROX_SIMPLE)
+    cv.drawContours(mask, contours, -1, 1, -1)
+    mask = cv.dilate(mask, np.ones((2 * grow_px + 1, 2 * grow_px + 1), np.uint8))
+    return mask, origin
+
+
+def _candidates(index, piece, rotations, resolution, spacing_in):
+    candidates = []
+    for angle in rotations:
+        rotated = piece if angle % 360 == 0 else piece.rotated(angle)
+        mask, origin = piece_mask(rotated, resolution, spacing_in)
+        candidates.append(_Candidate(index, rotated, angle, mask, origin))
+    return candidates
+
+
+class _PageGrid:
+    """Tracks which printed pages of a tiled sheet already hold part of a piece."""
+
+    def __init__(self, tile_cells, total_rows, width_cells):
+        self.tile_w, self.tile_h = tile_cells
+        self.used = np.zeros((math.ceil(total_rows / self.tile_h) + 1, math.ceil(width_cells / self.tile_w)), dtype=bool)
+
+    def new_pages(self, xs, ys, width, height):
+        """Counts the pages not used yet that a width x height box at each (x, y) would touch."""
+        # Prefix sums over the unused pages make each count O(1).
+        free = np.zeros((self.used.shape[0] + 1, self.used.shape[1] + 1), dtype=np.int64)
+        free[1:, 1:] = np.cumsum(np.cumsum(~self.used, axis=0), axis=1)
+        x0 = (xs // self.tile_w).astype(np.int64)
+        x1 = ((xs + width - 1) // self.tile_w).astype(np.int64) + 1
+        y0 = (ys // self.tile_h).astype(np.int64)
+        y1 = ((ys + height - 1) // self.tile_h).astype(np.int64) + 1
+        return free[y1, x1] - free[y0, x1] - free[y1, x0] + free[y0, x0]
+
+    def mark(self, mask, x, y):
+        cell_ys, cell_xs = np.nonzero(mask)
+        self.used[((cell_ys + y) // self.tile_h).astype(int), ((cell_xs + x) // self.tile_w).astype(int)] = True
+
+
+def _best_position(occupancy, used_rows, mask, pages=None):
+    """
+    Finds the free position for `mask` with the lowest bottom edge, then the
+    leftmost one. With `pages`, positions that start the fewest new pages win
+    first. Only rows down to the current marker length plus the mask height
+    need to be searched, as anything lower is always free and worse.
+
+    Returns:
+        (score, x, y) with x and y in cells, or None if the mask does not fit the width.
+    """
+    import cv2 as cv
+
+    height, width = mask.shape
+    if width > occupancy.shape[1]:
+        return None
+    window = occupancy[:used_rows + height]
+    # Cross-correlating the occupancy with the mask counts the overlapping cells
+    # for every placement in one call.
+    overlap = cv.matchTemplate(window, mask.astype(np.float32), cv.TM_CCORR)
+    ys, xs = np.nonzero(overlap < 0.5)
+    if len(ys) == 0:
+        return None
+    score = (ys + height).astype(np.int64) * occupancy.shape[1] + xs
+    if pages is not None:
+        score += pages.new_pages(xs, ys, width, height) * occupancy.size
+    best = np.argmin(score)
+    return int(score[best]), int(xs[best]), int(ys[best])
+
+
+def _pack(ordered, width_cells, tile_cells=None):
+    """
+    Places pieces in the given order. `tile_cells` (width, height) switches to
+    minimising the number of used pages of that size.
+
+    Returns:
+        (placements, used rows, page usage matrix or None).
+    """
+    total_rows = sum(max(c.mask.shape[0] for c in candidates) for candidates in ordered)
+    occupancy = np.zeros((total_rows + 1, width_cells), dtype=np.float32)
+    pages = _PageGrid(tile_cells, total_rows, width_cells) if tile_cells else None
+    used_rows = 0
+    placements = []
+    for candidates in ordered:
+        best = None
+        for candidate in candidates:
+            position = _best_position(occupancy, used_rows, candidate.mask, pages)
+            if position is not None and (best is None or position[0] < best[0]):
+                best = (*position, candidate)
+        if best is None:
+            raise ValueError(f"Pattern piece '{candidates[0].piece.name}' is wider than the fabric in every allowed orientation.")
+        _, x, y, candidate = best
+        height, width = candidate.mask.shape
+        occupancy[y:y + height, x:x + width] += candidate.mask
+        if pages is not None:
+            pages.mark(candidate.mask, x, y)
+        used_rows = max(used_rows, y + height)
+        placements.append(((x, y), candidate))
+    return placements, used_rows, pages.used if pages is not None else None
+
+
+def _search(all_candidates, width_cells, time_budget_s, seed, tile_cells=None):
+    """
+    Packs the pieces in several orders and keeps the best result: the fewest
+    pages when packing onto pages, then the shortest marker.
+    """
+    start = time.perf_counter()
+    orders = [
+        sorted(all_candidates, key=lambda c: -c[0].area),
+        sorted(all_candidates, key=lambda c: -c[0].mask.shape[0]),
+        sorted(all_candidates, key=lambda c: -c[0].mask.shape[1]),
+    ]
+    best, best_key = None, None
+    rng = random.Random(seed)
+    attempts = 0
+    while True:
+        if attempts < len(orders):
+            ordered = orders[attempts]
+        elif time_budget_s is not None and time.perf_counter() - start < time_budget_s and len(all_candidates) > 1:
+            ordered = rng.sample(all_candidates, len(all_candidates))
+        else:
+            break
+        result = _pack(ordered, width_cells, tile_cells)
+        key = (int(result[2].sum()) if result[2] is not None else 0, result[1])
+        if best_key is None or key < best_key:
+            best, best_key = result, key
+        attempts += 1
+    logger.debug("Packed %d pieces in %d attempts, best (pages, rows): %s.", len(all_candidates), attempts, best_key)
+    return best
+
+
+def _to_layouts(placements, resolution):
+    layouts = []
+    # Keep the caller's piece order in the layouts.
+    for (x, y), candidate in sorted(placements, key=lambda placement: placement[1].index):
+        offset = (x / resolution - candidate.origin_in[0], y / resolution - candidate.origin_in[1])
+        layouts.append({'offset': offset, 'piece': candidate.piece, 'rotation': candidate.angle})
+    return layouts
+
+
+def get_nested_layout(pattern_pieces, fabric_width_in, resolution=NESTING_RESOLUTION, spacing_in=NESTING_SPACING_IN, allow_crossgrain=False, time_budget_s=None, seed=0):
+    """
+    Nests pattern pieces into a marker of bounded width, keeping the marker as
+    short as possible. The fabric width runs across the canvas and the marker
+    length down it, so pieces keep their vertical grainlines parallel to the
+    selvage and may only be turned by 180 degrees unless `allow_crossgrain` is set.
+
+    Placement is greedy bottom-left on a coarse occupancy grid. Several piece
+    orders are tried; with a time budget, random orders are tried until it runs out.
+
+    Args:
+        pattern_pieces: A list of PatternPiece objects.
+        fabric_width_in: The usable fabric (or paper) width in inches.
+        resolution: Grid cells per inch used for placement.
+        spacing_in: The minimum gap between pieces in inches.
+        allow_crossgrain: Also allow quarter turns.
+        time_budget_s: Optional number of seconds to spend on extra orders.
+        seed: Seed for the random orders.
+
+    Returns:
+        A tuple of (layouts, canvas_width_in, canvas_height_in) like get_layout.
+        Each layout also has a 'rotation' entry, and rotated pieces are copies.
+    """
+    with span("layout.nesting"):
+        rotations = CROSSGRAIN_ROTATIONS if allow_crossgrain else GRAIN_ROTATIONS
+        width_cells = math.floor(fabric_width_in * resolution)
+        all_candidates = [_candidates(i, piece, rotations, resolution, spacing_in) for i, piece in enumerate(pattern_pieces)]
+        placements, used_rows, _ = _search(all_candidates, width_cells, time_budget_s, seed)
+    return _to_layouts(placements, resolution), width_cells / resolution, used_rows / resolution
+
+
+def tile_size(page_size_in, border_in=PAGE_BORDER_IN):
+    """Returns the printable (width, height) of a page in inches, as used by the pdf exporter."""
+    return (page_size_in[0] - 2 * border_in, page_size_in[1] - 2 * border_in)
+
+
+def get_page_layout(pattern_pieces, page_size_in, border_in=PAGE_BORDER_IN, pages_across=None, resolution=NESTING_RESOLUTION, spacing_in=NESTING_SPACING_IN, allow_crossgrain=False, time_budget_s=None, seed=0):
+    """
+    Lays pieces out on a sheet made of whole printed pages, placing each piece
+    where it starts the fewest new pages so that as few pages as possible have
+    anything on them.
+
+    Args:
+        pattern_pieces: A list of PatternPiece objects.
+        page_size_in: (width, height) of the paper in inches, e.g. from
+          `inches_from_format_name`.
+        border_in: The unprinted border the pdf exporter leaves on each page.
+        pages_across: Number of pages per row of the sheet. By default the
+          few widths around a roughly square sheet are tried and the one
+          with the fewest occupied pages is kept.
+        Other arguments are as for get_nested_layout.
+
+    Returns:
+        A tuple of (layouts, canvas_width_in, canvas_height_in) like get_layout.
+        The canvas is a whole number of pages so it tiles exactly; use
+        `occupied_pages` to find the pages worth printing.
+    """
+    with span("layout.pages"):
+        tile_w_in, tile_h_in = tile_size(page_size_in, border_in)
+        rotations = CROSSGRAIN_ROTATIONS if allow_crossgrain else GRAIN_ROTATIONS
+        all_candidates = [_candidates(i, piece, rotations, resolution, spacing_in) for i, piece in enumerate(pattern_pieces)]
+
+        if pages_across is not None:
+            widths = [pages_across]
+        else:
+            widest = max((min(c.mask.shape[1] for c in candidates) for candidates in all_candidates), default=0) / resolution
+            total_area = sum(candidates[0].area for candidates in all_candidates) / resolution ** 2
+            narrowest = max(math.ceil(widest / tile_w_in), 1)
+            estimate = max(narrowest, math.ceil(math.sqrt(total_area / (tile_w_in * tile_h_in))))
+            widths = range(max(narrowest, estimate - PAGES_ACROSS_SPREAD), estimate + PAGES_ACROSS_SPREAD + 1)
+        if time_budget_s is not None:
+            time_budget_s /= len(widths)
+
+        tile_cells = (tile_w_in * resolution, tile_h_in * resolution)
+        best, best_key = None, None
+        for across in widths:
+            placements, used_rows, _ = _search(all_candidates, math.floor(across * tile_w_in * resolution), time_budget_s, seed, tile_cells)
+            layouts = _to_layouts(placements, resolution)
+            pages_down = max(1, math.ceil(used_rows / tile_cells[1]))
+            # Fewest printed pages, then the smallest sheet
+            key = (len(occupied_pages(layouts, page_size_in, border_in, resolution)), across * pages_down)
+            if best_key is None or key < best_key:
+                best, best_key = (layouts, across * tile_w_in, pages_down * tile_h_in), key
+        logger.debug("Tried %d pages across, best (pages, sheet pages): %s.", len(widths), best_key)
+    return best
+
+
+def occupied_pages(layouts, page_size_in, border_in=PAGE_BORDER_IN, resolution=NESTING_RESOLUTION):
+    """
+    Finds the pages of a tiled canvas that contain part of a piece outline.
+
+    Returns:
+        A set of (row, column) page indices, matching the tiles of the pdf exporter.
+    """
+    tile_w_in, tile_h_in = tile_size(page_size_in, border_in)
+    pages = set()
+    for layout in layouts:
+        mask, origin = piece_mask(layout['piece'], resolution, spacing_in=0)
+        cell_ys, cell_xs = np.nonzero(mask)
+        xs_in = origin[0] + layout['offset'][0] + cell_xs / resolution
+        ys_in = origin[1] + layout['offset'][1] + cell_ys / resolution
+        rows = np.floor(np.clip(ys_in, 0, None) / tile_h_in).astype(int)
+        cols = np.floor(np.clip(xs_in, 0, None) / tile_w_in).astype(int)
+        pages.update(zip(rows.tolist(), cols.tolist()))
+    return pages
@@ -1,17 +1,51 @@
 from util.line import Line
 from util.dart import Dart
+from util.instrumentation import timed
+from util.render_cache import RENDER_CACHE, new_owner_id
+from util.constants import PADDING_IN
+from util.render_context import get_context
+from util.topology import PieceTopology
+import copy
+import logging
 import math
-import cv2 as cv
+import weakref
+from datetime import date
 import numpy as np
 
-PADDING_IN = 1  # Inches of padding for temporary masks
-LABEL_BUFFER = 0.15 # Percentage of smallest dimension to inset for label placement
+logger = logging.getLogger(__name__)
+
+HEM_DIP_RATIO = 0.25 # How far the hem dips at a waist dart, as a share of the dart width
+FOLD_TEXT = "CUT ON FOLD" # Grainline text of pieces cut on the fold at x=0
+
+def _geometry_attribute(name):
+  """A property that invalidates the piece's render cache whenever the attribute is replaced."""
+  private_name = "_" + name
+
+  def getter(self):
+    return getattr(self, private_name)
+
+  def setter(self, value):
+    setattr(self, private_name, value)
+    self.invalidate_cache()
+
+  return property(getter, setter)
 
 class PatternPiece:
   """
   Represents a single piece of a sewing pattern, like a front, back, or sleeve.
+
+  Contours, label boxes and bounding boxes are kept in the shared render cache.
+  Replacing any of the line lists or the grainline clears them; code that edits
+  lines in place must call `invalidate_cache()` afterwards.
   """
-  def __init__(self, name, body_lines=None, drafting_lines=None, pattern_lines=None, marking_lines=None):
+  body_lines = _geometry_attribute("body_lines")
+  drafting_lines = _geometry_attribute("drafting_lines")
+  pattern_lines = _geometry_attribute("pattern_lines")
+  marking_lines = _geometry_attribute("marking_lines")
+  cut_lines = _geometry_attribute("cut_lines")
+  grainline = _geometry_attribute("grainline")
+
+  def __init__(self, name, body_lines=None, drafting_lines=None, pattern_lines=None, marking_lines=None, cut_count=1):
     """
     Initializes a PatternPiece.
 
@@ -21,7 +55,10 @@ class PatternPiece:
       drafting_lines: An optional list of drafting Line objects.
       pattern_lines: An optional list of pattern Line objects.
       marking_lines: An optional list of internal marking Line objects (e.g., darts).
+      cut_count: How many times the piece is cut, e.g. 2 for the left and
+        right halves of a bodice. A piece cut on the fold counts once.
     """
+    self._register_cache()
     self.name = name
     self.body_lines = body_lines if body_lines is not None else []
     self.drafting_lines = drafting_lines if drafting_lines is not None else []
@@ -29,8 +66,27 @@ class PatternPiece:
     self.marking_lines = marking_lines if marking_lines is not None else []
     self.cut_lines = []
     self.grainline = None # Will be a tuple of (list[Line], "text")
-    self._contour_cache = {}
-    self._bounding_box_cache = None
+    self.cut_count = cut_count
+    self.topology = None # The named outline edges once set_outline is called
+
+  def _register_cache(self):
+    # A fresh id per instance (also for copies and unpickled pieces) keeps cache
+    # entries from being shared, and they are dropped once the piece is collected.
+    self._cache_id = new_owner_id()
+    weakref.finalize(self, RENDER_CACHE.invalidate, self._cache_id)
+
+  def __getstate__(self):
+    state = self.__dict__.copy()
+    del state["_cache_id"]
+    return state
+
+  def __setstate__(self, state):
+    self.__dict__.update(state)
+    self._register_cache()
+
+  def invalidate_cache(self):
+    """Drops all cached render results of this piece, call after changing its geometry."""
+    RENDER_CACHE.invalidate(self._cache_id)
 
   def get_drawable_marking_lines(self):
       """
@@ -45,6 +101,53 @@ class PatternPiece:
               drawable_lines.extend(marking.get_lines())
       return drawable_lines
 
+  def set_outline(self, edges):
+      """
+      Sets the pattern lines from named edges ordered around the piece, so
+      seams can be looked up by name and the outline read without rendering.
+
+      Args:
+        edges: (name, Line) pairs in order around the piece, e.g. ("Side Seam", line).
+          Neighbouring edges must share their end points.
+
+      Raises:
+        ValueError: If the edges do not form a closed ring.
+      """
+      self.topology = PieceTopology(edges)
+      self.pattern_lines = self.topology.lines
+
+  def get_seam(self, name):
+      """Returns the outline edge called `name`, or None if the piece has no such edge."""
+      if self.topology is None:
+          return None
+      return self.topology.get(name)
+
+  def replace_seam(self, name, line):
+      """
+      Replaces the outline edge called `name` by `line` in both the topology and
+      the pattern lines.
+
+      Returns:
+        The replaced Line.
+
+      Raises:
+        ValueError: If no outline was set or `line` does not meet its neighbours.
+      """
+      if self.topology is None:
+          raise ValueError(f"Piece '{self.name}' has no outline, call set_outline before replacing seams.")
+      old_line = self.topology.replace(name, line)
+      self.pattern_lines = [line if existing is old_line else existing for existing in self.pattern_lines]
+      return old_line
+
+  def get_outline(self, scale=None):
+      """
+      Returns the outline as an (N, 2) array of points in order around the
+      piece, or None if no outline was set. See `PieceTopology.outline`.
+      """
+      if self.topology is None:
+          return None
+      return self.topology.outline(scale)
+
   def get_marking_by_name(self, name):
       """
       Finds a marking object (Line or Dart) in the marking_lines list by its name.
@@ -54,55 +157,95 @@ class PatternPiece:
               return marking
       return None
 
+  def _iter_lines(self):
+      """Yields every Line object of the piece once, including dart and grainline lines."""
+      seen = set()
+      groups = [self.body_lines, self.drafting_lines, self.pattern_lines, self.cut_lines]
+      for marking in self.marking_lines:
+          if isinstance(marking, Dart):
+              groups.append([marking.seam_line, marking.leg1, marking.leg2] + marking.extended_legs)
+          else:
+              groups.append([marking])
+      if self.grainline:
+          groups.append(self.grainline[0])
+      for group in groups:
+          for line in group:
+              if line is not None and id(line) not in seen:
+                  seen.add(id(line))
+                  yield line
+
+  def rotated(self, angle):
+      """
+      Returns a copy of the piece rotated by `angle` degrees about the origin,
+      e.g. for layouts that turn pieces within their grainline constraints.
+      """
+      piece = copy.deepcopy(self)
+      if angle % 360 == 0:
+          return piece
+
+      angle_rad = math.radians(angle)
+      cos_a, sin_a = math.cos(angle_rad), math.sin(angle_rad)
+      rotate = lambda p: (p[0] * cos_a - p[1] * sin_a, p[0] * sin_a + p[1] * cos_a)
+      for line in piece._iter_lines():
+          line.points = [rotate(p) for p in line.points]
+      for marking in piece.marking_lines:
+          if isinstance(marking, Dart) and marking.tip is not None:
+              marking.tip = rotate(marking.tip)
+      piece.invalidate_cache()
+      return piece
 
   def get_bounding_box(self):
     """
     Calculates the bounding box that encompasses all lines in this piece.
     Returns (min_x, min_y, max_x, max_y) in inches.
     """
-    if self._bounding_box_cache:
-        return self._bounding_box_cache
-
-    all_points = []
-    for line in self.pattern_lines + self.cut_lines:
-        # Use get_render_points to account for smoothed curves
-        all_points.extend(line.get_render_points())
-    
-    if not all_points:
+    key = (self._cache_id, "bounding_box")
+    bounding_box = RENDER_CACHE.get(key)
+    if bounding_box is not None:
+        return bounding_box
+
+    # Use get_render_points to account for smoothed curves
+    point_arrays = [np.asarray(line.get_render_points(), dtype=float).reshape(-1, 2) for line in self.pattern_lines + self.cut_lines]
+    point_arrays = [points for points in point_arrays if len(points)]
+    if not point_arrays:
         return (0, 0, 0, 0)
 
-    min_x = min(p[0] for p in all_points)
-    max_x = max(p[0] for p in all_points)
-    min_y = min(p[1] for p in all_points)
-    max_y = max(p[1] for p in all_points)
+    all_points = np.concatenate(point_arrays)
+    min_x, min_y = all_points.min(axis=0).tolist()
+    max_x, max_y = all_points.max(axis=0).tolist()
     
-    self._bounding_box_cache = (min_x, min_y, max_x, max_y)
-    return self._bounding_box_cache
+    return RENDER_CACHE.put(key, (min_x, min_y, max_x, max_y))
 
-  def get_outline_contour(self, scale=100):
+  @timed("piece.outline_contour")
+  def get_outline_contour(self, scale=100, context=None):
       """
       Generates a single, continuous contour for the pattern piece's outline
-      by drawing it on a temporary mask. Caches the result based on scale.
+      by drawing it on a temporary mask. Caches the result per scale and padding.
 
       Args:
           scale (int): The resolution (pixels per inch) to use for rendering.
+          context: The RenderContext giving the mask padding, DEFAULT_CONTEXT if None.
 
       Returns:
           A NumPy array of contour points in pixel coordinates, or None.
       """
-      if scale in self._contour_cache:
-          return self._contour_cache[scale]
+      padding_in = get_context(context).padding_in
+      key = (self._cache_id, "contour", scale, padding_in)
+      return RENDER_CACHE.get_or_compute(key, lambda: self._compute_outline_contour(scale, padding_in))
+
+  def _compute_outline_contour(self, scale, padding_in=PADDING_IN):
+      import cv2 as cv # Imported lazily so pure-geometry drafting does not load OpenCV
 
       if not self.pattern_lines:
           return None
 
       # Create a temporary mask just large enough for this piece
       min_x, min_y, max_x, max_y = self.get_bounding_box()
-      width_in = (max_x - min_x) + 2 * PADDING_IN
-      height_in = (max_y - min_y) + 2 * PADDING_IN
+      width_in = (max_x - min_x) + 2 * padding_in
+      height_in = (max_y - min_y) + 2 * padding_in
       
       # The offset to draw the piece within this temporary mask
-      temp_offset = (-min_x + PADDING_IN, -min_y + PADDING_IN)
+      temp_offset = (-min_x + padding_in, -min_y + padding_in)
 
       mask = np.zeros((round(height_in * scale), round(width_in * scale)), dtype=np.uint8)
 
@@ -114,11 +257,10 @@ class PatternPiece:
       contours, _ = cv.findContours(mask, cv.RETR_EXTERNAL, cv.CHAIN_APPROX_SIMPLE)
       cv.drawContours(mask, contours, -1, 255, -1)
       
-      result = max(contours, key=cv.contourArea) if contours else None
-      self._contour_cache[scale] = result
-      return result
+      return max(contours, key=cv.contourArea) if contours else None
 
-  def get_label_box(self, scale=100):
+  @timed("piece.label_box")
+  def get_label_box(self, scale=100, context=None):
       """
       Calculates the optimal bounding box for placing a label inside the piece.
       This is done by eroding the piece's shape and finding the largest
@@ -126,31 +268,50 @@ class PatternPiece:
 
       Args:
           scale (int): The resolution (pixels per inch) to use for rendering.
+          context: The RenderContext giving the mask padding and label inset,
+            DEFAULT_CONTEXT if None.
 
       Returns:
-          A tuple (x, y, w, h) for the bounding box in pixel coordinates,
-          and the eroded mask for debug drawing, or None.
+          A tuple (x, y, w, h) for the bounding box in piece coordinates in
+          inches, and the contours of the eroded area in pixels of the piece's
+          mask for debug drawing, or None.
       """
-      outline_contour = self.get_outline_contour(scale=scale)
+      context = get_context(context)
+      key = (self._cache_id, "label_box", scale, context.padding_in, context.label_buffer)
+      return RENDER_CACHE.get_or_compute(key, lambda: self._compute_label_box(scale, context))
+
+  def _compute_label_box(self, scale, context):
+      outline_contour = self.get_outline_contour(scale=scale, context=context)
+      padding_in = context.padding_in
       if outline_contour is None:
           return None
 
+      import cv2 as cv # Imported lazily so pure-geometry drafting does not load OpenCV
+
       # Create a mask from the contour to perform erosion. This mask is the same
       # size as the one used to generate the contour, ensuring a consistent coordinate system.
       min_x, min_y, max_x, max_y = self.get_bounding_box()
-      width_in = (max_x - min_x) + 2 * PADDING_IN
-      height_in = (max_y - min_y) + 2 * PADDING_IN
+      width_in = (max_x - min_x) + 2 * padding_in
+      height_in = (max_y - min_y) + 2 * padding_in
       mask = np.zeros((round(height_in * scale), round(width_in * scale)), dtype=np.uint8)
       cv.drawContours(mask, [outline_contour], -1, 255, -1)
 
       # Erode the mask to find a safe inner area
-      inset_px = int(min(mask.shape) * LABEL_BUFFER) # Inset by a percentage of the smallest dimension
+      inset_px = int(min(mask.shape) * context.label_buffer) # Inset by a percentage of the smallest dimension
       kernel = np.ones((inset_px, inset_px), np.uint8)
-      eroded_mask = cv.erode(mask, kernel, iterations=1)
-
-      # Find the "pole of inaccessibility" to center the label box
-      dist_transform = cv.distanceTransform(eroded_mask, cv.DIST_L2, 5)
-      _, radius, _, center_point = cv.minMaxLoc(dist_transform)
+      eroded_mask = cv.erode(mask, kernel, dst=mask, iterations=1)
+      eroded_contours, _ = cv.findContours(eroded_mask, cv.RETR_EXTERNAL, cv.CHAIN_APPROX_SIMPLE)
+
+      # Find the "pole of inaccessibility" to center the label box. Only the eroded
+      # area can hold it, so distances are computed within its bounding rectangle.
+      # Two background pixels around it keep them exact, as the 5x5 distance mask
+      # steps at most two pixels, and outside the image counts as infinitely far.
+      left, top, width, height = cv.boundingRect(eroded_mask)
+      left, top = max(left - 2, 0), max(top - 2, 0)
+      window = eroded_mask[top:top + height + 4, left:left + width + 4]
+      dist_transform = cv.distanceTransform(window, cv.DIST_L2, 5)
+      _, radius, _, (pole_x, pole_y) = cv.minMaxLoc(dist_transform)
+      center_point = (pole_x + left, pole_y + top)
 
       if radius == 0:
           return None # No safe area found
@@ -158,17 +319,55 @@ class PatternPiece:
       # Calculate the largest square that fits, centered on the pole
       box_half_width = int(radius / math.sqrt(2) * 0.9)
 
-      print(f"Radius: {radius}, Box half width: {box_half_width}")
-      print(f"Center point: {center_point}")
+      logger.debug("Label box for '%s': radius %s, box half width %s, center %s", self.name, radius, box_half_width, center_point)
       
       # Switch back to piece coordinates
       min_x_in, min_y_in, _, _ = self.get_bounding_box()
-      x = (center_point[0] - box_half_width) / scale - PADDING_IN + min_x_in
-      y = (center_point[1] - box_half_width) / scale - PADDING_IN + min_y_in
+      x = (center_point[0] - box_half_width) / scale - padding_in + min_x_in
+      y = (center_point[1] - box_half_width) / scale - padding_in + min_y_in
       w = h = (box_half_width * 2) / scale
 
-      return (x, y, w, h, eroded_mask)
+      return (x, y, w, h, eroded_contours)
 
+  @timed("piece.sprite")
+  def get_sprite(self, scale=100, pattern_name="", profile=None, context=None):
+      """
+      Renders the piece with its lines, grainline and label into its own image,
+      so layouts and page tiles can be composited from it without drawing again.
+      Caches the result per scale, pattern name and context.
+
+      Args:
+          scale (int): The resolution (pixels per inch) to use for rendering.
+          pattern_name (str): The pattern name printed on the label.
+          profile: The RenderProfile, or its name, deciding which debug output
+            is drawn. Defaults to the context's profile.
+          context: The RenderContext to draw with, DEFAULT_CONTEXT if None.
+
+      Returns:
+          A tuple of (image premultiplied over black, (x, y) piece coordinates
+          in inches of its top-left pixel). The image is at the depth of the
+          context's canvas mode, see canvas.render_sprite.
+      """
+      # The label carries the date, so a sprite from yesterday is stale.
+      context = get_context(context, profile)
+      key = (self._cache_id, "sprite", scale, pattern_name, context, date.today())
+      return RENDER_CACHE.get_or_compute(key, lambda: self._render_sprite(scale, pattern_name, context))
+
+  def _render_sprite(self, scale, pattern_name, context):
+      min_x, min_y, max_x, max_y = self.get_bounding_box()
+      padding_in = context.padding_in
+      width_in = (max_x - min_x) + 2 * padding_in
+      height_in = (max_y - min_y) + 2 * padding_in
+      temp_offset = (-min_x + padding_in, -min_y + padding_in)
+      size_px = (round(height_in * scale), round(width_in * scale))
+
+      from .draw import _draw_piece # Local import to avoid circular dependency
+      from .canvas import render_sprite # Local import, only rendering needs OpenCV
+      draw = lambda img, layer_context: _draw_piece(img, self, temp_offset, scale, pattern_name, layer_context)
+      sprite, (left, top) = render_sprite(draw, size_px, context)
+      return sprite, (left / scale - temp_offset[0], top / scale - temp_offset[1])
+
+  @timed("piece.seam_allowance")
   def add_seam_allowance(self, allowance_in, scale=100):
       """
       Generates a seam allowance outline and stores it in `cut_lines`.
@@ -182,6 +381,8 @@ class PatternPiece:
       if not self.pattern_lines:
           return
 
+      import cv2 as cv # Imported lazily so pure-geometry drafting does not load OpenCV
+
       # Create a temporary mask to draw the piece and generate the seam allowance.
       min_x, min_y, max_x, max_y = self.get_bounding_box()
       allowance_px = round(allowance_in * scale)
@@ -206,9 +407,10 @@ class PatternPiece:
           new_contour_px = max(contours, key=cv.contourArea)
           new_points_in = [((p[0][0] / scale) + min_x - allowance_in, (p[0][1] / scale) + min_y - allowance_in) for p in new_contour_px]
           new_line = Line(new_points_in)
-          if self.grainline and self.grainline[1] == "CUT ON FOLD":
+          if self.cut_on_fold:
               new_line.truncate_horizontal(min_x=0)
           self.cut_lines.append(new_line)
+          self.invalidate_cache()
 
   def add_grainline(self, length_in=5, angle=90, arrowhead_length=0.5, arrowhead_angle=25):
       """Adds a standard grainline arrow to the center of the piece."""
@@ -245,7 +447,7 @@ class PatternPiece:
       # Find the min and max Y of the center front line from the pattern lines
       cf_points = [p for line in self.pattern_lines for p in line.get_render_points() if p[0] == x_coord]
       if not cf_points:
-          print("Warning: Could not add fold line. No line found at x={x_coord}.")
+          logger.warning("Could not add fold line to '%s'. No line found at x=%s.", self.name, x_coord)
           return
 
       min_y = min(p[1] for p in cf_points)
@@ -258,12 +460,22 @@ class PatternPiece:
       top_t = Line([(line_x - margin_in, top_y), (line_x, top_y)])
       bottom_t = Line([(line_x - margin_in, bottom_y), (line_x, bottom_y)])
 
-      self.grainline = ([shaft, top_t, bottom_t], "CUT ON FOLD")
+      self.grainline = ([shaft, top_t, bottom_t], FOLD_TEXT)
 
-  def true_dart(self, dart_legs, is_waist_dart=False):
+  @property
+  def cut_on_fold(self):
+      """True if the piece is half of a piece cut on the fold at x=0, see add_fold_line."""
+      return bool(self.grainline) and self.grainline[1] == FOLD_TEXT
+
+  def true_dart(self, dart_legs, is_waist_dart=False, dip_ratio=HEM_DIP_RATIO):
       """
       Adjusts the cut line to 'true' a dart, adding a dart cap or dipping the hem.
       This ensures seam lines match up after the dart is sewn.
+
+      Args:
+        dart_legs: The two legs of the dart, each starting on the seam.
+        is_waist_dart: Dip the hem instead of adding a dart cap.
+        dip_ratio: How far the hem dips, as a share of the dart width.
       """
       if not self.cut_lines or not dart_legs:
           return
@@ -291,13 +503,14 @@ class PatternPiece:
       if is_waist_dart:
           # Dip the hemline to true the waist dart
           dart_width = math.dist(leg1_start, leg2_start)
-          dip_depth = dart_width * 0.25  # Heuristic for dip amount
+          dip_depth = dart_width * dip_ratio
           mid_idx = (start_idx + end_idx) // 2
           if mid_idx < len(cut_points):
               original_point = cut_points[mid_idx]
               dipped_point = (original_point[0], original_point[1] + dip_depth)
               new_cut_points = cut_points[:mid_idx] + [dipped_point] + cut_points[mid_idx+1:]
               self.cut_lines[0] = Line(new_cut_points, smooth=True)
+              self.invalidate_cache()
       else: # Side seam dart
           # Add a dart cap to true the side seam dart
           dart_midpoint_on_seam = ((leg1_start[0] + leg2_start[0]) / 2, (leg1_start[1] + leg2_start[1]) / 2)
@@ -306,3 +519,4 @@ class PatternPiece:
           cap_point = (dart_midpoint_on_seam[0] + vx * 0.1, dart_midpoint_on_seam[1] + vy * 0.1) # Project a point outwards
           new_cut_points = cut_points[:start_idx+1] + [cap_point] + cut_points[end_idx:]
           self.cut_lines[0] = Line(new_cut_points, smooth=True)
+          self.invalidate_cache()
@@ -0,0 +1,110 @@
+import itertools
+import sys
+import threading
+from collections import OrderedDict
+import numpy as np
+
+RENDER_CACHE_MAX_BYTES = 256 * 1024 * 1024 # Upper bound for all cached render results
+
+_owner_ids = itertools.count()
+_MISSING = object()
+
+
+def new_owner_id():
+    """Returns a process unique id to key cache entries by, unlike id() it is never reused."""
+    return next(_owner_ids)
+
+
+def _size_of(value):
+    """Estimates the memory held by a cached value in bytes."""
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (tuple, list)):
+        return sys.getsizeof(value) + sum(_size_of(item) for item in value)
+    return sys.getsizeof(value)
+
+
+class RenderCache:
+    """
+    A least recently used cache bounded by the memory of its values.
+
+    Entries are keyed by (owner, kind, *params), e.g. (piece id, "contour", scale),
+    so everything computed for one owner can be dropped at once when its
+    geometry changes. The cache is shared by all pieces, so keeping renders at
+    preview and print resolutions never grows beyond `max_bytes`.
+    """
+
+    def __init__(self, max_bytes=RENDER_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict() # key -> (value, size in bytes)
+        self._owners = {} # owner -> set of keys
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        """Stores `value`, evicting the least recently used entries to stay within `max_bytes`."""
+        size = _size_of(value)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if size > self.max_bytes:
+                return value
+            self._entries[key] = (value, size)
+            self._owners.setdefault(key[0], set()).add(key)
+            self.size_bytes += size
+            while self.size_bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+        return value
+
+    def get_or_compute(self, key, compute):
+        """Returns the cached value for `key`, calling `compute()` to fill it on a miss."""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = self.put(key, compute())
+        return value
+
+    def invalidate(self, owner):
+        """Drops every entry of `owner`."""
+        with self._lock:
+            for key in self._owners.pop(owner, ()):
+                _, size = self._entries.pop(key)
+                self.size_bytes -= size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._owners.clear()
+            self.size_bytes = 0
+
+    def _remove(self, key):
+        _, size = self._entries.pop(key)
+        self.size_bytes -= size
+        keys = self._owners[key[0]]
+        keys.discard(key)
+        if not keys:
+            del self._owners[key[0]]
+
+    def stats(self):
+        return {"entries": len(self._entries), "bytes": self.size_bytes, "hits": self.hits, "misses": self.misses}
+
+
+# Cache shared by all pattern pieces
+RENDER_CACHE = RenderCache()
@@ -0,0 +1,81 @@
+from typing import NamedTuple
+from .constants import (
+    BACKGROUND_COLOR, BODY_COLOR, DEBUG_BBOX_COLOR, DEBUG_CONTOUR_COLOR, DEBUG_OUTLINE_COLOR, DRAFTING_COLOR, FONT, GRID_COLOR,
+    LABEL_BUFFER, LINE_COLOR, PADDING_IN, SPACING, TEXT_THICKNESS, THICKNESS,
+)
+from .nesting import PAGE_BORDER_IN
+from .render_profile import DEFAULT_PROFILE, RenderProfile, get_profile
+
+# Defaults of the vision script, which runs without this package
+VISION_THRESHOLD = 200
+
+
+class RenderContext(NamedTuple):
+    """
+    Every setting of one job's drafting, rendering, vision and pdf export.
+
+    Contexts are immutable and passed per call, so one process can serve jobs
+    with different settings at the same time. Derive variations with
+    `_replace`, e.g. `DEFAULT_CONTEXT._replace(thickness=4)`.
+
+    The pdf and vision scripts also run without the drafting package, so they
+    read their fields from any object that has them and fall back to their
+    own defaults.
+    """
+    profile: RenderProfile = DEFAULT_PROFILE
+    # The pixel format of rendered canvases, one of util.canvas.CANVAS_MODES
+    canvas: str = "color"
+    # Drawing
+    line_color: tuple = LINE_COLOR
+    body_color: tuple = BODY_COLOR
+    drafting_color: tuple = DRAFTING_COLOR
+    background_color: tuple = BACKGROUND_COLOR
+    grid_color: tuple = GRID_COLOR
+    debug_contour_color: tuple = DEBUG_CONTOUR_COLOR
+    debug_bbox_color: tuple = DEBUG_BBOX_COLOR
+    debug_outline_color: tuple = DEBUG_OUTLINE_COLOR
+    thickness: int = THICKNESS
+    text_thickness: int = TEXT_THICKNESS
+    font: int = FONT
+    spacing_in: float = SPACING # Between pieces of the side by side layout
+    # Piece masks for outlines and labels
+    padding_in: float = PADDING_IN
+    label_buffer: float = LABEL_BUFFER
+    # Vision, see visionComponents/getIndividualPieces.py
+    vision_threshold: int = VISION_THRESHOLD
+    # Pdf export, see pdfManagement/convertImageToMultiPagePdf.py
+    pdf_border_in: float = PAGE_BORDER_IN
+
+
+DEFAULT_CONTEXT = RenderContext()
+
+# The fields holding colors pieces are drawn with
+COLOR_FIELDS = (
+    "line_color", "body_color", "drafting_color", "debug_contour_color", "debug_bbox_color", "debug_outline_color",
+)
+COVERAGE_COLOR = 255
+
+
+def get_context(context=None, profile=None):
+    """
+    Returns `context`, or DEFAULT_CONTEXT if it is None, with its profile
+    replaced by `profile` when one is given.
+
+    Args:
+        context: A RenderContext or None.
+        profile: A RenderProfile, its name, or None to keep the context's profile.
+    """
+    context = DEFAULT_CONTEXT if context is None else context
+    if profile is not None:
+        profile = get_profile(profile)
+        if profile != context.profile:
+            context = context._replace(profile=profile)
+    return context
+
+
+def coverage_context(context):
+    """
+    Returns `context` with every drawing color replaced by COVERAGE_COLOR, for
+    drawing what a piece covers onto a single channel mask.
+    """
+    return context._replace(**{field: COVERAGE_COLOR for field in COLOR_FIELDS})
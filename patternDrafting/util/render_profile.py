@@ -0,0 +1,42 @@
+from typing import NamedTuple
+
+
+class RenderProfile(NamedTuple):
+    """
+    What a draft and its rendering include besides the pattern itself. Passed
+    per call, so jobs with different profiles can run side by side.
+    """
+    name: str
+    drafting_lines: bool # Keep and draw the body and drafting lines the pattern was constructed from
+    grid: bool # Draw the 1-inch grid under the pieces
+    debug: bool # Draw the contours and label areas computed for each piece
+
+
+# Only the pattern, for printing and customer downloads
+PRODUCTION = RenderProfile("production", drafting_lines=False, grid=False, debug=False)
+# The pattern on a grid together with how it was constructed, for checking drafts
+PREVIEW = RenderProfile("preview", drafting_lines=True, grid=True, debug=False)
+# Everything, for working on the drafting and layout code
+DEBUG = RenderProfile("debug", drafting_lines=True, grid=True, debug=True)
+
+PROFILES = {profile.name: profile for profile in (PRODUCTION, PREVIEW, DEBUG)}
+# Used by the drafting scripts when no profile is given
+DEFAULT_PROFILE = DEBUG
+
+
+def get_profile(profile=None):
+    """
+    Returns the RenderProfile for `profile`, which may be a RenderProfile, the
+    name of one in PROFILES, or None for DEFAULT_PROFILE.
+
+    Raises:
+        ValueError: If there is no profile of that name.
+    """
+    if profile is None:
+        return DEFAULT_PROFILE
+    if isinstance(profile, RenderProfile):
+        return profile
+    try:
+        return PROFILES[profile]
+    except KeyError:
+        raise ValueError(f"Unknown render profile '{profile}', expected one of {', '.join(PROFILES)}.") from None
@@ -0,0 +1,152 @@
+import csv
+import logging
+import numbers
+import yaml
+
+# libyaml's C loader parses an order of magnitude faster than the pure Python one.
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+logger = logging.getLogger(__name__)
+
+
+class SchemaError(ValueError):
+    """Raised when measurement or garment spec data does not match its schema."""
+
+
+class Field:
+    """
+    One value of a record: where it is stored in the nested YAML layout and its default.
+
+    Args:
+        name: The attribute name, also used as the column name in tables.
+        section: The top level YAML key the value is nested under, or None.
+        key: The YAML key of the value.
+        default: A value, or a callable taking the values read so far. Fields
+          without a default are required when reading strictly and are 0 otherwise.
+        kind: "number" or "text".
+    """
+    __slots__ = ("name", "section", "key", "default", "kind")
+
+    def __init__(self, name, section, key, default=None, kind="number"):
+        self.name = name
+        self.section = section
+        self.key = key
+        self.default = default
+        self.kind = kind
+
+    def default_value(self, values):
+        if self.default is None:
+            return 0
+        return self.default(values) if callable(self.default) else self.default
+
+    @property
+    def path(self):
+        return f"{self.section}.{self.key}" if self.section else self.key
+
+
+def _check_value(field, value):
+    if field.kind == "number":
+        # bool is a Number too, but never a valid measurement
+        if not isinstance(value, numbers.Real) or isinstance(value, bool):
+            raise SchemaError(f"'{field.path}' must be a number, got {value!r}.")
+        return value
+    if not isinstance(value, str):
+        raise SchemaError(f"'{field.path}' must be text, got {value!r}.")
+    return value
+
+
+def _unknown_keys(fields, data):
+    """The paths of the keys in `data` that no field reads, e.g. misspelt names."""
+    known = {}
+    for field in fields:
+        known.setdefault(field.section, set()).add(field.key)
+    unknown = []
+    for key, value in data.items():
+        if key in known.get(None, ()):
+            continue
+        if key not in known:
+            unknown.append(key)
+        elif isinstance(value, dict):
+            unknown.extend(f"{key}.{inner}" for inner in value if inner not in known[key])
+    return unknown
+
+
+def read_fields(fields, data, strict=False):
+    """
+    Reads the values of `fields` from nested `data` as loaded from YAML.
+
+    Args:
+        fields: The Field tuple of the record.
+        data: A dict of sections (dicts) and top level values.
+        strict: Raise for missing values of fields without a default and for
+          keys no field reads. Otherwise unknown keys are logged as warnings.
+
+    Returns:
+        A dict from field name to value, in field order.
+
+    Raises:
+        SchemaError: If a section is not a mapping, a value has the wrong type, or,
+          when strict, a required value is missing or a key is unknown.
+    """
+    unknown = _unknown_keys(fields, data)
+    if unknown:
+        if strict:
+            raise SchemaError(f"Unknown {', '.join(repr(key) for key in unknown)}.")
+        logger.warning("Ignoring unknown %s.", ", ".join(repr(key) for key in unknown))
+    values = {}
+    for field in fields:
+        container = data
+        if field.section is not None:
+            container = data.get(field.section)
+            if container is None:
+                container = {}
+            elif not isinstance(container, dict):
+                raise SchemaError(f"'{field.section}' must be a mapping, got {container!r}.")
+        value = container.get(field.key)
+        if value is None:
+            if strict and field.default is None:
+                raise SchemaError(f"Missing '{field.path}'.")
+            value = field.default_value(values)
+        else:
+            value = _check_value(field, value)
+        values[field.name] = value
+    return values
+
+
+def fill_defaults(fields, columns):
+    """
+    Reads flat values by field name, e.g. one row of a table, using the
+    defaults for missing or empty values.
+    """
+    values = {}
+    for field in fields:
+        value = columns.get(field.name)
+        if value is None or value == "":
+            value = field.default_value(values)
+        elif field.kind == "number":
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                raise SchemaError(f"'{field.name}' must be a number, got {value!r}.") from None
+        values[field.name] = value
+    return values
+
+
+def load_yaml(filepath):
+    """Parses a YAML file with the C loader when libyaml is available."""
+    with open(filepath, "rb") as f:
+        data = yaml.load(f, Loader=YAML_LOADER)
+    if data is None:
+        return {}
+    if not isinstance(data, dict):
+        raise SchemaError(f"{filepath} must contain a mapping at the top level.")
+    return data
+
+
+def read_csv_columns(filepath):
+    """Reads a CSV file with a header row into a dict of column name to list of strings."""
+    with open(filepath, newline="") as f:
+        reader = csv.reader(f)
+        header = [name.strip() for name in next(reader)]
+        rows = list(reader)
+    return {name: [row[i] if i < len(row) else "" for row in rows] for i, name in enumerate(header)}
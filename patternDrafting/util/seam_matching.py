@@ -0,0 +1,189 @@
+import logging
+import math
+import numpy as np
+from .dart import Dart
+from .instrumentation import timed
+from .line import spline_basis
+
+logger = logging.getLogger(__name__)
+
+# Seams are matched to within this many inches
+LENGTH_TOLERANCE_IN = 1e-6
+MAX_ITERATIONS = 20
+# Dart legs starting further than this from a seam do not open on it
+DART_TOLERANCE_IN = 1e-3
+
+
+class SeamPair:
+    """
+    Two seams that are sewn together, so their lengths must match once the
+    darts on them are closed. The first seam is adjusted by sliding one of its
+    points in a fixed direction.
+
+    Args:
+        piece: The PatternPiece holding the seam that is adjusted.
+        seam: The name of that seam in the piece's outline.
+        other_piece: The PatternPiece holding the seam it is sewn to.
+        other_seam: The name of that seam.
+        vertex: The index of the control point of `seam` that moves. If it is
+          an end of the seam, the neighbouring outline edge follows it.
+        direction: The (x, y) direction the point moves in, e.g. (0, 1) to
+          lengthen a side seam at the waist.
+        ease: How much longer `seam` should be than `other_seam`, e.g. for an
+          eased sleeve cap.
+    """
+    __slots__ = ("piece", "seam", "other_piece", "other_seam", "vertex", "direction", "ease")
+
+    def __init__(self, piece, seam, other_piece, other_seam, vertex=-1, direction=(0, 1), ease=0.0):
+        self.piece = piece
+        self.seam = seam
+        self.other_piece = other_piece
+        self.other_seam = other_seam
+        self.vertex = vertex
+        length = math.hypot(*direction)
+        if length == 0:
+            raise ValueError("The direction of a seam adjustment cannot be zero.")
+        self.direction = (direction[0] / length, direction[1] / length)
+        self.ease = ease
+
+    def __repr__(self):
+        return f"SeamPair({self.piece.name}.{self.seam} ~ {self.other_piece.name}.{self.other_seam})"
+
+
+def _get_seam(piece, name):
+    line = piece.get_seam(name)
+    if line is None:
+        raise KeyError(f"'{piece.name}' has no seam called '{name}'.")
+    return line
+
+
+def _darts_on(piece, seam_line):
+    """Yields each dart of `piece` that opens on `seam_line` with the seam distances of its leg starts."""
+    for marking in piece.marking_lines:
+        if not isinstance(marking, Dart) or not marking.leg1 or not marking.leg2:
+            continue
+        starts = (marking.leg1.points[0], marking.leg2.points[0])
+        distances = [seam_line.project(start) for start in starts]
+        if all(math.dist(seam_line.point_at_length(distance), start) <= DART_TOLERANCE_IN for distance, start in zip(distances, starts)):
+            yield marking, distances
+
+
+def dart_openings(piece, seam_line):
+    """
+    Returns the total length of `seam_line` taken up by the darts of `piece`
+    that open on it, measured along the seam between the dart legs.
+    """
+    return sum(abs(distances[1] - distances[0]) for _, distances in _darts_on(piece, seam_line))
+
+
+def closed_length(piece, seam):
+    """The length of a seam of `piece` with its darts closed."""
+    line = _get_seam(piece, seam)
+    return line.length() - dart_openings(piece, line)
+
+
+def _segments(line, vertex, direction):
+    """
+    Returns the segment vectors of the rendered seam and how they change per
+    inch the vertex moves. Curve samples are linear in the control points, so
+    both are exact for any move.
+    """
+    points = np.array(line.points, dtype=float)
+    delta = np.zeros_like(points)
+    delta[vertex] = direction
+    if line.smooth and len(points) > 2:
+        basis = spline_basis(len(points))
+        points, delta = basis @ points, basis @ delta
+    return np.diff(points, axis=0), np.diff(delta, axis=0)
+
+
+def _move_vertex(pair, line, offset):
+    """
+    Moves the seam's vertex by `offset` along its direction, taking the
+    neighbouring edge end along. Darts on the seam keep their distance along it
+    from the end that does not move, so their openings stay the same.
+    """
+    index = pair.vertex % len(line.points)
+    from_end = index == 0
+    length = line.length()
+    darts = [(dart, [length - d if from_end else d for d in distances]) for dart, distances in _darts_on(pair.piece, line)]
+
+    old_point = line.points[index]
+    new_point = (old_point[0] + offset * pair.direction[0], old_point[1] + offset * pair.direction[1])
+    line.points[index] = new_point
+    line.invalidate_cache()
+
+    length = line.length()
+    for dart, distances in darts:
+        for leg, distance in zip((dart.leg1, dart.leg2), distances):
+            leg.points[0] = line.point_at_length(length - distance if from_end else distance)
+            leg.invalidate_cache()
+
+    topology = pair.piece.topology
+    if index in (0, len(line.points) - 1) and topology is not None:
+        for neighbour in set(topology.neighbours(pair.seam)) - {pair.seam}:
+            neighbour_line = topology[neighbour]
+            for end in (0, -1):
+                if math.dist(neighbour_line.points[end], old_point) <= topology.tolerance:
+                    neighbour_line.points[end] = new_point
+                    neighbour_line.invalidate_cache()
+    pair.piece.invalidate_cache()
+
+
+@timed("draft.true_seams")
+def true_seams(pairs, tolerance=LENGTH_TOLERANCE_IN, max_iterations=MAX_ITERATIONS):
+    """
+    Adjusts the seams of every pair so they match their partners, solving all
+    pairs together with Newton's method on their closed lengths.
+
+    Each pair must move a different point. Target lengths are measured before
+    anything moves, so a seam that is adjusted should not also be the partner
+    of another pair.
+
+    Args:
+        pairs: The SeamPairs to true.
+        tolerance: The largest remaining length difference in inches.
+        max_iterations: The number of Newton steps after which to give up.
+
+    Pairs that are still further than `tolerance` from their target after
+    `max_iterations` steps, or whose length does not change when their point
+    moves, are logged as warnings and left at the closest length reached.
+
+    Returns:
+        An array with the distance in inches each pair's point was moved.
+    """
+    pairs = list(pairs)
+    if not pairs:
+        return np.zeros(0)
+
+    lines = [_get_seam(pair.piece, pair.seam) for pair in pairs]
+    targets = np.array([closed_length(pair.other_piece, pair.other_seam) + pair.ease for pair in pairs])
+    openings = np.array([dart_openings(pair.piece, line) for pair, line in zip(pairs, lines)])
+
+    # The segments of every seam in one array, with the pair each belongs to
+    segments, deltas = zip(*(_segments(line, pair.vertex, pair.direction) for pair, line in zip(pairs, lines)))
+    owner = np.repeat(np.arange(len(pairs)), [len(s) for s in segments])
+    segments, deltas = np.concatenate(segments), np.concatenate(deltas)
+
+    offsets = np.zeros(len(pairs))
+    derivatives = np.ones(len(pairs))
+    for iteration in range(max_iterations + 1):
+        moved = segments + deltas * offsets[owner, None]
+        lengths = np.hypot(moved[:, 0], moved[:, 1])
+        residuals = np.bincount(owner, lengths, len(pairs)) - openings - targets
+        if np.all(np.abs(residuals) <= tolerance) or iteration == max_iterations:
+            break
+        # Every seam only depends on its own offset, so the Jacobian is diagonal.
+        slopes = np.einsum("ij,ij->i", moved, deltas) / np.where(lengths == 0, 1, lengths)
+        derivatives = np.bincount(owner, slopes, len(pairs))
+        offsets -= np.divide(residuals, derivatives, out=np.zeros_like(residuals), where=derivatives != 0)
+
+    for pair, residual, derivative in zip(pairs, residuals, derivatives):
+        if abs(residual) > tolerance:
+            reason = "moving its point does not change its length" if derivative == 0 else f"not solved in {max_iterations} steps"
+            logger.warning("Could not true %r, its closed length is off by %.4g in: %s.", pair, residual, reason)
+
+    for pair, line, offset in zip(pairs, lines, offsets):
+        if offset != 0:
+            _move_vertex(pair, line, float(offset))
+    return offsets
@@ -0,0 +1,216 @@
+import json
+import struct
+import numpy as np
+from .line import Line
+from .dart import Dart
+from .pattern_piece import PatternPiece
+
+# File layout:
+#   header   - magic, format version, float item size and metadata length
+#   metadata - UTF-8 JSON describing every piece, padded to an 8 byte boundary
+#   points   - one packed (N, 2) float32/float64 array holding every line's points
+# Lines reference their points in the metadata as [offset, count, smooth].
+MAGIC = b"SPPC"
+FORMAT_VERSION = 1
+_HEADER = struct.Struct("<4sHBxQ")
+_ALIGNMENT = 8
+
+LINE_GROUPS = ("body_lines", "drafting_lines", "pattern_lines", "cut_lines")
+
+
+class _PointPacker:
+    """Collects the points of every saved line into a single array."""
+
+    def __init__(self):
+        self.chunks = []
+        self.count = 0
+
+    def add(self, line):
+        if line is None:
+            return None
+        points = np.asarray(line.points, dtype=np.float64).reshape(-1, 2)
+        ref = [self.count, len(points), bool(line.smooth)]
+        self.chunks.append(points)
+        self.count += len(points)
+        return ref
+
+    def to_bytes(self, dtype):
+        if not self.chunks:
+            return b""
+        return np.concatenate(self.chunks).astype(dtype).tobytes()
+
+
+def _pack_marking(packer, marking):
+    if isinstance(marking, Dart):
+        return {"dart": {
+            "name": marking.name,
+            "tip": [float(v) for v in marking.tip] if marking.tip is not None else None,
+            "seam": packer.add(marking.seam_line),
+            "leg1": packer.add(marking.leg1),
+            "leg2": packer.add(marking.leg2),
+            "extended": [packer.add(leg) for leg in marking.extended_legs],
+        }}
+    return {"line": packer.add(marking)}
+
+
+def _seam_names(piece):
+    """The outline edge names, if the pattern lines are still exactly the outline edges in ring order."""
+    if piece.topology is None or len(piece.pattern_lines) != len(piece.topology):
+        return None
+    if any(line is not edge for line, edge in zip(piece.pattern_lines, piece.topology.lines)):
+        return None
+    return list(piece.topology.names)
+
+
+def dumps_pieces(pattern_pieces, dtype=np.float64):
+    """
+    Serializes pattern pieces into the compact binary format.
+
+    Args:
+        pattern_pieces (list[PatternPiece]): The pieces to serialize.
+        dtype: np.float64 (exact) or np.float32 (half the size).
+
+    Returns:
+        bytes: The encoded pieces.
+    """
+    dtype = np.dtype(dtype).newbyteorder("<")
+    if dtype.kind != "f" or dtype.itemsize not in (4, 8):
+        raise ValueError(f"Unsupported point dtype '{dtype}'. Use float32 or float64.")
+
+    packer = _PointPacker()
+    pieces_meta = []
+    for piece in pattern_pieces:
+        meta = {"name": piece.name, "cut_count": piece.cut_count}
+        for group in LINE_GROUPS:
+            meta[group] = [packer.add(line) for line in getattr(piece, group)]
+        meta["marking_lines"] = [_pack_marking(packer, marking) for marking in piece.marking_lines]
+        meta["seams"] = _seam_names(piece)
+        if piece.grainline:
+            lines, text = piece.grainline
+            meta["grainline"] = {"lines": [packer.add(line) for line in lines], "text": text}
+        else:
+            meta["grainline"] = None
+        pieces_meta.append(meta)
+
+    metadata = json.dumps({"pieces": pieces_meta}, separators=(",", ":")).encode("utf-8")
+    padding = -(_HEADER.size + len(metadata)) % _ALIGNMENT
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, dtype.itemsize, len(metadata) + padding)
+    return b"".join([header, metadata, b" " * padding, packer.to_bytes(dtype)])
+
+
+def save_pieces(pattern_pieces, filepath, dtype=np.float64):
+    """Writes pattern pieces to a binary pattern file. See `dumps_pieces`."""
+    with open(filepath, "wb") as f:
+        f.write(dumps_pieces(pattern_pieces, dtype=dtype))
+
+
+def loads_pieces(buffer):
+    """
+    Opens serialized pattern pieces from any bytes-like object without copying
+    the point data.
+
+    Returns:
+        PieceArchive: Lazy access to the stored pieces.
+    """
+    return PieceArchive(buffer)
+
+
+def load_pieces(filepath, mmap=True):
+    """
+    Opens a binary pattern file. With `mmap` the point data is memory-mapped and
+    only paged in for the pieces that are actually used.
+
+    Returns:
+        PieceArchive: Lazy access to the stored pieces.
+    """
+    if mmap:
+        return PieceArchive(np.memmap(filepath, dtype=np.uint8, mode="r"))
+    with open(filepath, "rb") as f:
+        return PieceArchive(f.read())
+
+
+class PieceArchive:
+    """
+    A read-only view over serialized pattern pieces. The point data stays in the
+    original buffer; `point_view` returns zero-copy arrays into it, while indexing
+    the archive builds a regular PatternPiece on demand.
+    """
+
+    def __init__(self, buffer):
+        magic, version, itemsize, metadata_len = _HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            raise ValueError("Not a serialized pattern file.")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported pattern file version {version}.")
+
+        metadata_end = _HEADER.size + metadata_len
+        metadata = bytes(buffer[_HEADER.size:metadata_end]).decode("utf-8")
+        self._pieces = json.loads(metadata)["pieces"]
+        self._buffer = buffer
+        self.points = np.frombuffer(buffer, dtype=f"<f{itemsize}", offset=metadata_end).reshape(-1, 2)
+
+    def __len__(self):
+        return len(self._pieces)
+
+    def __getitem__(self, index):
+        return self._build_piece(self._pieces[index])
+
+    def __iter__(self):
+        for meta in self._pieces:
+            yield self._build_piece(meta)
+
+    @property
+    def names(self):
+        return [meta["name"] for meta in self._pieces]
+
+    def point_view(self, piece_index, group, line_index):
+        """
+        Returns the (N, 2) point array of one stored line as a view into the buffer.
+
+        Args:
+            piece_index (int): Index of the piece in the archive.
+            group (str): One of LINE_GROUPS.
+            line_index (int): Index of the line within that group.
+        """
+        offset, count, _ = self._pieces[piece_index][group][line_index]
+        return self.points[offset:offset + count]
+
+    def _line(self, ref):
+        if ref is None:
+            return None
+        offset, count, smooth = ref
+        return Line([tuple(p) for p in self.points[offset:offset + count].tolist()], smooth=smooth)
+
+    def _marking(self, entry):
+        if "line" in entry:
+            return self._line(entry["line"])
+        dart = entry["dart"]
+        return Dart.from_legs(
+            self._line(dart["seam"]),
+            self._line(dart["leg1"]),
+            self._line(dart["leg2"]),
+            tuple(dart["tip"]) if dart["tip"] is not None else None,
+            name=dart["name"],
+            extended_legs=[self._line(ref) for ref in dart["extended"]],
+        )
+
+    def _build_piece(self, meta):
+        piece = PatternPiece(
+            meta["name"],
+            body_lines=[self._line(ref) for ref in meta["body_lines"]],
+            drafting_lines=[self._line(ref) for ref in meta["drafting_lines"]],
+            pattern_lines=[self._line(ref) for ref in meta["pattern_lines"]],
+            marking_lines=[self._marking(entry) for entry in meta["marking_lines"]],
+            cut_count=meta.get("cut_count", 1),
+        )
+        if meta.get("seams"):
+            try:
+                piece.set_outline(zip(meta["seams"], piece.pattern_lines))
+            except ValueError:
+                # Lines edited into a gap after drafting; keep them as plain pattern lines.
+                piece.topology = None
+        piece.cut_lines = [self._line(ref) for ref in meta["cut_lines"]]
+        if meta["grainline"] is not None:
+            grainline = meta["grainline"]
+            piece.grainline = ([self._line(ref) for ref in grainline["lines"]], grainline["text"])
+        return piece
@@ -0,0 +1,146 @@
+import math
+import numpy as np
+
+# Largest gap in inches allowed between the ends of neighbouring edges
+GAP_TOLERANCE_IN = 1e-3
+
+
+class PieceTopology:
+    """
+    The outline of a pattern piece as a closed ring of named edges, e.g. the
+    center front, neckline, shoulder, armscye, side seam and hem of a bodice.
+    Each edge ends where the next one starts, so the ring gives the outline in
+    order without rasterizing the piece.
+
+    Edges may be drafted in either direction; the ring remembers which ones it
+    walks backwards. Points of the edge Lines can be edited in place as long as
+    shared ends are moved together.
+
+    Args:
+        edges: (name, Line) pairs in order around the piece.
+        tolerance: The largest gap in inches allowed between neighbouring edges.
+
+    Raises:
+        ValueError: If names repeat or neighbouring edges do not meet.
+    """
+
+    def __init__(self, edges, tolerance=GAP_TOLERANCE_IN):
+        edges = list(edges)
+        if not edges:
+            raise ValueError("A piece outline needs at least one edge.")
+        self.tolerance = tolerance
+        self._names = [name for name, _ in edges]
+        self._lines = [line for _, line in edges]
+        self._index = {name: i for i, name in enumerate(self._names)}
+        if len(self._index) != len(self._names):
+            raise ValueError("Edge names must be unique.")
+        self._reversed = [False] * len(edges)
+        self._orient()
+
+    def _ends(self, i):
+        points = self._lines[i].points
+        return (points[-1], points[0]) if self._reversed[i] else (points[0], points[-1])
+
+    def _orient(self):
+        """Walks the ring once, deciding the direction of every edge and checking the joins."""
+        first = self._lines[0].points
+        if len(self._lines) > 1:
+            following = self._lines[1].points
+            gap = lambda point: min(math.dist(point, following[0]), math.dist(point, following[-1]))
+            self._reversed[0] = gap(first[0]) < gap(first[-1])
+        for i in range(1, len(self._lines)):
+            self._reversed[i] = self._orient_edge(i)
+        self._check_join(len(self._lines) - 1)
+
+    def _orient_edge(self, i):
+        previous_end = self._ends(i - 1)[1]
+        points = self._lines[i].points
+        start_gap, end_gap = math.dist(points[0], previous_end), math.dist(points[-1], previous_end)
+        if min(start_gap, end_gap) > self.tolerance:
+            raise ValueError(f"Edge '{self._names[i]}' does not meet '{self._names[i - 1]}' (gap {min(start_gap, end_gap):.4f} in).")
+        return end_gap < start_gap
+
+    def _check_join(self, i):
+        """Checks that edge i ends where the next edge starts."""
+        following = (i + 1) % len(self._lines)
+        gap = math.dist(self._ends(i)[1], self._ends(following)[0])
+        if gap > self.tolerance:
+            raise ValueError(f"Edge '{self._names[following]}' does not meet '{self._names[i]}' (gap {gap:.4f} in).")
+
+    def __len__(self):
+        return len(self._lines)
+
+    def __contains__(self, name):
+        return name in self._index
+
+    def __getitem__(self, name):
+        """Returns the Line of the edge called `name`, raising KeyError if there is none."""
+        return self._lines[self._index[name]]
+
+    def get(self, name, default=None):
+        index = self._index.get(name)
+        return default if index is None else self._lines[index]
+
+    def index(self, name):
+        return self._index[name]
+
+    @property
+    def names(self):
+        return tuple(self._names)
+
+    @property
+    def lines(self):
+        """The edge Lines in ring order, as a new list."""
+        return list(self._lines)
+
+    def items(self):
+        return zip(self._names, self._lines)
+
+    def is_reversed(self, name):
+        """Whether the ring walks the edge from its last point to its first."""
+        return self._reversed[self._index[name]]
+
+    def neighbours(self, name):
+        """Returns the names of the edges before and after `name` around the ring."""
+        i = self._index[name]
+        return self._names[i - 1], self._names[(i + 1) % len(self._names)]
+
+    def vertices(self):
+        """Returns the corner points of the outline, the start of every edge in ring order."""
+        return [self._ends(i)[0] for i in range(len(self._lines))]
+
+    def replace(self, name, line):
+        """
+        Puts `line` in place of the edge called `name`, keeping its position in the ring.
+
+        Returns:
+            The replaced Line.
+
+        Raises:
+            ValueError: If the new line does not meet its neighbours.
+        """
+        i = self._index[name]
+        old_line, old_reversed = self._lines[i], self._reversed[i]
+        self._lines[i] = line
+        try:
+            self._reversed[i] = self._orient_edge(i) if len(self._lines) > 1 else False
+            self._check_join(i)
+        except ValueError:
+            self._lines[i], self._reversed[i] = old_line, old_reversed
+            raise
+        return old_line
+
+    def outline(self, scale=None):
+        """
+        Returns the outline as an (N, 2) array of points in ring order, following
+        curves at the detail `Line.get_render_points` gives for `scale`. The
+        shared point between two edges is listed once and the ring is not closed
+        with a repeat of the first point.
+        """
+        chunks = []
+        for line, reversed_ in zip(self._lines, self._reversed):
+            points = np.asarray(line.get_render_points(scale), dtype=float).reshape(-1, 2)
+            if reversed_:
+                points = points[::-1]
+            chunks.append(points[:-1])
+        return np.concatenate(chunks)
@@ -0,0 +1,103 @@
+#!/usr/bin/python
+# Minimal client for the pattern job server, used for local testing.
+import argparse
+import http.client
+import json
+import sys
+
+import yaml
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+CHUNK_SIZE = 64 * 1024
+
+
+class JobError(RuntimeError):
+    """The server refused or failed a job."""
+
+    def __init__(self, status, message, retry_after=None):
+        super().__init__(f"{status}: {message}")
+        self.status = status
+        self.retry_after = retry_after
+
+
+def request_pattern(payload, output_file, host=DEFAULT_HOST, port=DEFAULT_PORT, timeout=None):
+    """
+    Requests a pattern and streams the answer into `output_file`, a binary file object.
+
+    Returns:
+        The job id reported by the server.
+
+    Raises:
+        JobError: If the server answered with an error, e.g. 503 when it is busy.
+    """
+    connection = http.client.HTTPConnection(host, port, timeout=timeout)
+    try:
+        connection.request("POST", "/patterns", body=json.dumps(payload), headers={"Content-Type": "application/json"})
+        response = connection.getresponse()
+        if response.status != 200:
+            message = json.loads(response.read() or b"{}").get("error", response.reason)
+            raise JobError(response.status, message, response.getheader("Retry-After"))
+        # http.client removes the chunked framing
+        while chunk := response.read(CHUNK_SIZE):
+            output_file.write(chunk)
+        return response.getheader("X-Job-Id")
+    finally:
+        connection.close()
+
+
+def cancel_job(job_id, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """Cancels a job for everybody waiting on it. Returns False if it was not running."""
+    connection = http.client.HTTPConnection(host, port)
+    try:
+        connection.request("DELETE", f"/jobs/{job_id}")
+        return json.loads(connection.getresponse().read())["cancelled"]
+    finally:
+        connection.close()
+
+
+def server_status(host=DEFAULT_HOST, port=DEFAULT_PORT):
+    connection = http.client.HTTPConnection(host, port)
+    try:
+        connection.request("GET", "/status")
+        return json.loads(connection.getresponse().read())
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Requests a pattern from the pattern job server.")
+    parser.add_argument("measurements", metavar="MEASUREMENTS_YAML", help="Measurements file")
+    parser.add_argument("garment_specs", metavar="GARMENT_SPECS_YAML", help="Garment specs file")
+    parser.add_argument("--draft", "-d", default="bodice-sloper", help="Draft to run")
+    parser.add_argument("--format", "-f", choices=("png", "pdf"), default="png", help="Output format")
+    parser.add_argument("--scale", "-s", type=int, default=100, help="Pixels per inch")
+    parser.add_argument("--pagesize", "-P", default="letter", help="Paper size name for pdf output")
+    parser.add_argument("--profile", "-r", choices=("production", "preview", "debug"), default="production", help="What is drawn besides the pattern")
+    parser.add_argument("--output", "-o", help="Output file, defaults to pattern.<format>")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", "-p", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args()
+
+    with open(args.measurements) as f:
+        measurements = yaml.safe_load(f)
+    with open(args.garment_specs) as f:
+        garment_specs = yaml.safe_load(f)
+    payload = {
+        "draft": args.draft,
+        "measurements": measurements,
+        "garment_specs": garment_specs,
+        "format": args.format,
+        "scale": args.scale,
+        "page_size": args.pagesize,
+        "profile": args.profile,
+    }
+
+    output = args.output or f"pattern.{args.format}"
+    try:
+        with open(output, "wb") as f:
+            job = request_pattern(payload, f, args.host, args.port)
+    except JobError as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
+    print(f"Job {job[:12]} written to {output}")
@@ -0,0 +1,398 @@
+#!/usr/bin/python
+# Local HTTP service that drafts and renders patterns on demand.
+#
+# Requests are JSON payloads with the measurements and garment specs; the CPU work
+# runs in a process pool and the PNG or PDF is streamed back with chunked transfer
+# encoding. Identical requests that arrive while a job is running share its result.
+import argparse
+import asyncio
+import hashlib
+import itertools
+import json
+import logging
+import os
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DRAFTING_DIR = os.path.join(REPO_ROOT, "patternDrafting")
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, DRAFTING_DIR)
+
+from pdfManagement.convertImageToMultiPagePdf import inches_from_format_name
+from util.garment_specs import FIELDS as GARMENT_SPEC_FIELDS, GarmentSpecs
+from util.measurements import FIELDS as MEASUREMENT_FIELDS, Measurements
+from util.render_profile import PROFILES
+from util.schema import SchemaError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MAX_BODY_BYTES = 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+RETRY_AFTER_S = 5
+
+FORMATS = {"png": "image/png", "pdf": "application/pdf"}
+DRAFT_NAMES = ("bodice-sloper", "batwing-top")
+
+
+class BadRequest(ValueError):
+    """A request the client has to fix, answered with 400."""
+
+
+def job_id(payload):
+    """Returns the id of the job for `payload`: the sha256 of its canonical JSON form."""
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def validate_payload(payload):
+    """
+    Checks a job payload and fills in the defaults. A payload looks like
+    {"draft": "bodice-sloper", "measurements": {...}, "garment_specs": {...},
+     "format": "png" | "pdf", "scale": 100, "page_size": "letter", "name": "...",
+     "profile": "production" | "preview" | "debug"}
+    where measurements and garment_specs have the layout of the YAML files.
+
+    The returned payload holds measurements and garment_specs as flat values by
+    attribute name, read once here, so requests that differ only in layout or
+    defaults share a job id and workers do not read the schema again.
+    """
+    if not isinstance(payload, dict):
+        raise BadRequest("The payload must be a JSON object.")
+    for key in ("measurements", "garment_specs"):
+        if not isinstance(payload.get(key), dict):
+            raise BadRequest(f"'{key}' must be an object.")
+    payload = {
+        "draft": "bodice-sloper",
+        "format": "png",
+        "scale": 100,
+        "page_size": "letter",
+        "name": None,
+        "profile": "production",
+        **payload,
+    }
+    if payload["draft"] not in DRAFT_NAMES:
+        raise BadRequest(f"Unknown draft '{payload['draft']}', expected one of {', '.join(DRAFT_NAMES)}.")
+    if payload["format"] not in FORMATS:
+        raise BadRequest(f"Unknown format '{payload['format']}', expected one of {', '.join(FORMATS)}.")
+    if not isinstance(payload["scale"], (int, float)) or not 10 <= payload["scale"] <= 600:
+        raise BadRequest("'scale' must be between 10 and 600 pixels per inch.")
+    if payload["profile"] not in PROFILES:
+        raise BadRequest(f"Unknown profile '{payload['profile']}', expected one of {', '.join(PROFILES)}.")
+    if inches_from_format_name(payload["page_size"]) is None:
+        raise BadRequest(f"Unknown page size '{payload['page_size']}'.")
+    try:
+        measurements = Measurements(**payload["measurements"])
+        garment_specs = GarmentSpecs(**payload["garment_specs"])
+    except (SchemaError, TypeError) as e:
+        raise BadRequest(str(e))
+    payload["measurements"] = {name: getattr(measurements, name) for name in MEASUREMENT_FIELDS}
+    payload["garment_specs"] = {name: getattr(garment_specs, name) for name in GARMENT_SPEC_FIELDS}
+    return payload
+
+
+def render_job(payload, output_file):
+    """
+    Drafts and renders one pattern into `output_file`. Runs in a worker
+    process, so it only takes plain data, and the result is handed back on
+    disk rather than through the pool.
+
+    Args:
+        payload: A payload returned by validate_payload.
+        output_file: The path to write the PNG or PDF to.
+    """
+    import draftBatwingTop
+    import draftBodiceSloper
+    from util.canvas import encode_canvas
+    from util.draw import draw_pattern
+    from util.render_context import get_context
+    from pdfManagement.convertImageToMultiPagePdf import export_multi_page_pdf
+
+    drafts = {"bodice-sloper": draftBodiceSloper.draft, "batwing-top": draftBatwingTop.draft}
+    measurements = Measurements.from_values(**payload["measurements"])
+    garment_specs = GarmentSpecs.from_values(**payload["garment_specs"])
+    # Each job gets its own context, so worker settings never leak between jobs.
+    context = get_context(profile=payload["profile"])
+    if payload["profile"] == "production":
+        # Production renders are white lines on black only, so one channel holds them exactly.
+        context = context._replace(canvas="gray")
+    pattern_pieces = drafts[payload["draft"]](measurements, garment_specs, context=context)
+    pattern_name = payload["name"] or payload["draft"].replace("-", " ").title()
+    scale = payload["scale"]
+
+    if payload["format"] == "png":
+        img, _ = draw_pattern(scale, pattern_pieces, garment_specs.seam_allowance, None, pattern_name, output=False, context=context)
+        with open(output_file, "wb") as f:
+            f.write(encode_canvas(img, context))
+        return
+
+    from util.nesting import occupied_pages
+    page_size = inches_from_format_name(payload["page_size"])
+    img, layouts = draw_pattern(scale, pattern_pieces, garment_specs.seam_allowance, None, pattern_name, output=False, page_size=page_size, context=context)
+    image_size = (img.shape[1] / scale, img.shape[0] / scale)
+    export_multi_page_pdf(img, page_size, image_size, output_file, True, occupied_tiles=occupied_pages(layouts, page_size, context.pdf_border_in), assembly_map=True, context=context)
+
+
+class _Job:
+    """
+    A job running in the pool together with the number of requests waiting for
+    it and the file its result is written to.
+    """
+
+    def __init__(self, output_file):
+        self.future = None
+        self.waiters = 0
+        self.output_file = output_file
+
+
+class JobServer:
+    """
+    Serves pattern jobs over HTTP.
+
+    Endpoints:
+        POST /patterns      JSON payload, see validate_payload. Answers with the
+                            PNG or PDF, streamed in chunks. The X-Job-Id header
+                            holds the job id.
+        DELETE /jobs/<id>   Cancels the job for every waiting request.
+        GET /status         Running jobs and worker settings as JSON.
+
+    Args:
+        max_workers: Number of worker processes.
+        max_jobs: Distinct jobs that may be queued or running at once. Further
+          requests are answered with 503 and a Retry-After header instead of
+          queueing without bound. Requests joining a running job do not count.
+        job_timeout_s: Jobs taking longer are cancelled.
+    """
+
+    def __init__(self, max_workers=None, max_jobs=None, job_timeout_s=120):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_jobs = max_jobs or 2 * self.max_workers
+        self.job_timeout_s = job_timeout_s
+        self._executor = None
+        self._slots = None
+        self._jobs = {}
+        self._server = None
+        self._output_dir = None
+        self._output_ids = itertools.count()
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        # Results are written here by the workers and streamed from disk.
+        self._output_dir = tempfile.TemporaryDirectory(prefix="patterns-")
+        self._slots = asyncio.Semaphore(self.max_jobs)
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        logger.info("Serving patterns on %s", ", ".join(str(s.getsockname()) for s in self._server.sockets))
+        return self._server
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for job in list(self._jobs.values()):
+            job.future.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        if self._output_dir is not None:
+            self._output_dir.cleanup()
+
+    def status(self):
+        return {
+            "jobs": {key: job.waiters for key, job in self._jobs.items()},
+            "max_jobs": self.max_jobs,
+            "max_workers": self.max_workers,
+        }
+
+    def cancel(self, key):
+        """Cancels a job. Returns False if there is no such job."""
+        job = self._jobs.get(key)
+        if job is None:
+            return False
+        job.future.cancel()
+        return True
+
+    # --- Jobs ---
+
+    async def _run(self, key, job, payload):
+        loop = asyncio.get_running_loop()
+        try:
+            await asyncio.wait_for(loop.run_in_executor(self._executor, render_job, payload, job.output_file), self.job_timeout_s)
+        finally:
+            # A job that already started keeps its worker busy until it is done,
+            # only its result is dropped. Queued jobs are removed from the pool.
+            self._jobs.pop(key, None)
+            self._slots.release()
+
+    async def _get_job(self, key, payload):
+        """Returns the job for `key`, starting it if needed, or None when the server is full."""
+        job = self._jobs.get(key)
+        if job is None:
+            if self._slots.locked():
+                return None
+            # Does not suspend as a slot is free, so no other request can take it first.
+            await self._slots.acquire()
+            # A fresh file per job, so a repeated job never overwrites a result that is still being sent.
+            job = self._jobs[key] = _Job(os.path.join(self._output_dir.name, f"{key[:16]}-{next(self._output_ids)}.{payload['format']}"))
+            job.future = asyncio.ensure_future(self._run(key, job, payload))
+        return job
+
+    async def _wait_for_job(self, key, job, reader):
+        """
+        Waits for the job and returns its result file opened for reading. The
+        job is cancelled when the last request waiting for it disconnects, and
+        its file is deleted once every waiting request has opened it.
+        """
+        job.waiters += 1
+        # Clients send nothing more after the request, so the read only finishes
+        # when the connection is closed.
+        disconnected = asyncio.ensure_future(reader.read(1))
+        try:
+            # asyncio.shield keeps one waiter from cancelling the job for the others.
+            shielded = asyncio.shield(job.future)
+            await asyncio.wait({shielded, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+            if not shielded.done():
+                shielded.cancel()
+                raise ConnectionResetError("Client disconnected.")
+            shielded.result()
+            return open(job.output_file, "rb")
+        finally:
+            disconnected.cancel()
+            job.waiters -= 1
+            if job.waiters == 0:
+                if not job.future.done():
+                    logger.info("Cancelling job %s, nobody is waiting for it.", key[:12])
+                    job.future.cancel()
+                else:
+                    # Open files stay readable after the name is removed.
+                    try:
+                        os.remove(job.output_file)
+                    except FileNotFoundError:
+                        pass
+
+    # --- HTTP ---
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            method, path, body = await self._read_request(reader)
+            await self._dispatch(method, path, body, reader, writer)
+        except BadRequest as e:
+            await self._send_json(writer, 400, {"error": str(e)})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            logger.debug("Client went away.")
+        except Exception:
+            logger.exception("Request failed.")
+            try:
+                await self._send_json(writer, 500, {"error": "Internal server error."})
+            except ConnectionError:
+                pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _read_request(self, reader):
+        request_line = (await reader.readline()).decode("latin-1").split()
+        if len(request_line) != 3:
+            raise BadRequest("Malformed request line.")
+        method, path, _ = request_line
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        length = int(headers.get("content-length", 0))
+        if length > MAX_BODY_BYTES:
+            raise BadRequest("Request body too large.")
+        body = await reader.readexactly(length) if length else b""
+        return method, path, body
+
+    async def _dispatch(self, method, path, body, reader, writer):
+        if method == "GET" and path == "/status":
+            await self._send_json(writer, 200, self.status())
+        elif method == "DELETE" and path.startswith("/jobs/"):
+            found = self.cancel(path[len("/jobs/"):])
+            await self._send_json(writer, 200 if found else 404, {"cancelled": found})
+        elif method == "POST" and path == "/patterns":
+            try:
+                payload = validate_payload(json.loads(body or b"null"))
+            except json.JSONDecodeError as e:
+                raise BadRequest(f"Invalid JSON: {e}")
+            await self._serve_pattern(payload, reader, writer)
+        else:
+            await self._send_json(writer, 404, {"error": f"No route for {method} {path}."})
+
+    async def _serve_pattern(self, payload, reader, writer):
+        key = job_id(payload)
+        job = await self._get_job(key, payload)
+        if job is None:
+            await self._send_json(writer, 503, {"error": "Too many jobs, try again later."}, {"Retry-After": str(RETRY_AFTER_S)})
+            return
+        try:
+            result = await self._wait_for_job(key, job, reader)
+        except asyncio.CancelledError:
+            if not job.future.cancelled():
+                raise
+            await self._send_json(writer, 409, {"error": "The job was cancelled."}, {"X-Job-Id": key})
+            return
+        except asyncio.TimeoutError:
+            await self._send_json(writer, 504, {"error": "The job timed out."}, {"X-Job-Id": key})
+            return
+
+        with result:
+            self._send_head(writer, 200, {
+                "Content-Type": FORMATS[payload["format"]],
+                "Transfer-Encoding": "chunked",
+                "X-Job-Id": key,
+            })
+            # Only one chunk of the result is in memory at a time.
+            while chunk := result.read(CHUNK_SIZE):
+                writer.write(b"%x\r\n" % len(chunk))
+                writer.write(chunk)
+                writer.write(b"\r\n")
+                # Waits while the client's receive buffer is full.
+                await writer.drain()
+            writer.write(b"0\r\n\r\n")
+            await writer.drain()
+
+    def _send_head(self, writer, status, headers):
+        reasons = {200: "OK", 400: "Bad Request", 404: "Not Found", 409: "Conflict", 500: "Internal Server Error", 503: "Service Unavailable", 504: "Gateway Timeout"}
+        lines = [f"HTTP/1.1 {status} {reasons.get(status, '')}", "Connection: close"]
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+
+    async def _send_json(self, writer, status, data, headers=None):
+        body = json.dumps(data).encode("utf-8")
+        self._send_head(writer, status, {"Content-Type": "application/json", "Content-Length": str(len(body)), **(headers or {})})
+        writer.write(body)
+        await writer.drain()
+
+
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, **kwargs):
+    server = JobServer(**kwargs)
+    await server.start(host, port)
+    try:
+        await server._server.serve_forever()
+    finally:
+        await server.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serves pattern drafting and rendering jobs over HTTP.")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="Address to listen on")
+    parser.add_argument("--port", "-p", type=int, default=DEFAULT_PORT, help="Port to listen on")
+    parser.add_argument("--workers", "-w", type=int, help="Worker processes, defaults to the number of CPUs")
+    parser.add_argument("--max-jobs", "-j", type=int, help="Jobs queued or running before requests are refused")
+    parser.add_argument("--timeout", "-t", type=float, default=120, help="Seconds before a job is cancelled")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+    try:
+        asyncio.run(serve(args.host, args.port, max_workers=args.workers, max_jobs=args.max_jobs, job_timeout_s=args.timeout))
+    except KeyboardInterrupt:
+        pass
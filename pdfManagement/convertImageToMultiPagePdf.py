@@ -1,13 +1,22 @@
 #!/usr/bin/python 
-from pdf2image import convert_from_path
-import cv2 as cv
-from reportlab.pdfgen import canvas
-from reportlab.lib.utils import ImageReader
-import os
+import logging
 import math
-import time
+from collections import Counter
 from string import ascii_uppercase as letters
 
+try:
+  from patternDrafting.util.instrumentation import span
+except ImportError: # Run as a standalone script without the repository root on the path
+  from contextlib import nullcontext as span
+try:
+  from pdfManagement.streamingPdf import StreamingPdfWriter
+  from pdfManagement.tileEncoding import DEFAULT_JPEG_QUALITY, encode_tile
+except ImportError:
+  from streamingPdf import StreamingPdfWriter
+  from tileEncoding import DEFAULT_JPEG_QUALITY, encode_tile
+
+logger = logging.getLogger(__name__)
+
 REPORT_LAB_DPI = 72
 BORDER_INCHES = 0.5
 BORDER_POINTS = int(BORDER_INCHES * REPORT_LAB_DPI)
@@ -15,8 +24,12 @@ ALIGNMENT_MARK_LEN = 6
 LABEL_FONT_SIZE = 18
 
 def divide_image(image, page_size, image_size_inch):
+  with span("pdf.tile"):
+    return _divide_image(image, page_size, image_size_inch)
+
+def _divide_image(image, page_size, image_size_inch):
 
-    img_height_px, img_width_px, _ = image.shape
+    img_height_px, img_width_px = image.shape[:2]
     img_width_in, img_height_in = image_size_inch[0], image_size_inch[1]
 
     # Calculate pixels per inch for the image
@@ -47,19 +60,23 @@ def divide_image(image, page_size, image_size_inch):
     return pages, x_page_count, y_page_count
 
 
-def convert_image(numpy_img):
-  new_file_name = f"testFiles/tmp_image{time.time()}.png"
-  cv.imwrite(new_file_name, numpy_img)
-  return new_file_name
+def draw_encoded_image(doc, image, x, y, width, height):
+  """Draws an EncodedImage centered in a box, keeping its aspect ratio, and outlines it."""
+  scale = min(width / image.width, height / image.height)
+  draw_width, draw_height = image.width * scale, image.height * scale
+  x += (width - draw_width) / 2
+  y += (height - draw_height) / 2
+  doc.draw_image(image, x, y, draw_width, draw_height)
+  doc.rect(x, y, draw_width, draw_height)
 
-def add_page_markings(doc, page_label, usable_width, usable_height, page_size):
+def add_page_markings(doc, page_label, usable_width, usable_height, page_size, border_points=BORDER_POINTS):
    # Draw border rectangle
     doc.setStrokeColorRGB(0, 0, 0)
     doc.setLineWidth(2)
-    doc.rect(BORDER_POINTS, BORDER_POINTS, usable_width, usable_height)
+    doc.rect(border_points, border_points, usable_width, usable_height)
 
-    x_mid = BORDER_POINTS + usable_width / 2
-    y_mid = BORDER_POINTS + usable_height / 2
+    x_mid = border_points + usable_width / 2
+    y_mid = border_points + usable_height / 2
 
     doc.saveState()
     doc.setFont("Helvetica-Bold", LABEL_FONT_SIZE)
@@ -67,20 +84,20 @@ def add_page_markings(doc, page_label, usable_width, usable_height, page_size):
 
     # Draw alignment marks
     # Top center
-    top_edge_y = page_size[1] - BORDER_POINTS
+    top_edge_y = page_size[1] - border_points
     doc.line(x_mid, top_edge_y - ALIGNMENT_MARK_LEN, x_mid, top_edge_y + ALIGNMENT_MARK_LEN)
     doc.drawCentredString(x_mid, top_edge_y + ALIGNMENT_MARK_LEN + LABEL_FONT_SIZE/2, page_label)
     
     # Bottom center
-    doc.line(x_mid, BORDER_POINTS - ALIGNMENT_MARK_LEN, x_mid, BORDER_POINTS + ALIGNMENT_MARK_LEN)
-    doc.drawCentredString(x_mid, BORDER_POINTS - ALIGNMENT_MARK_LEN - LABEL_FONT_SIZE, page_label)
+    doc.line(x_mid, border_points - ALIGNMENT_MARK_LEN, x_mid, border_points + ALIGNMENT_MARK_LEN)
+    doc.drawCentredString(x_mid, border_points - ALIGNMENT_MARK_LEN - LABEL_FONT_SIZE, page_label)
     
     # Left center
-    doc.line(BORDER_POINTS + ALIGNMENT_MARK_LEN, y_mid, BORDER_POINTS - ALIGNMENT_MARK_LEN, y_mid)
-    doc.drawCentredString(BORDER_POINTS - LABEL_FONT_SIZE, y_mid, page_label)
+    doc.line(border_points + ALIGNMENT_MARK_LEN, y_mid, border_points - ALIGNMENT_MARK_LEN, y_mid)
+    doc.drawCentredString(border_points - LABEL_FONT_SIZE, y_mid, page_label)
 
     # Right center
-    right_edge_x = page_size[0] - BORDER_POINTS
+    right_edge_x = page_size[0] - border_points
     doc.line(right_edge_x - ALIGNMENT_MARK_LEN, y_mid, right_edge_x + ALIGNMENT_MARK_LEN, y_mid)
     doc.drawCentredString(right_edge_x + LABEL_FONT_SIZE, y_mid, page_label)
 
@@ -88,59 +105,124 @@ def add_page_markings(doc, page_label, usable_width, usable_height, page_size):
     doc.restoreState()
 
 def check_proportions(image, image_size, force_dimensions):
-  img_height_px, img_width_px, _ = image.shape
+  img_height_px, img_width_px = image.shape[:2]
   img_width_in, img_height_in = image_size[0], image_size[1]
   if img_width_in / img_height_in != img_width_px / img_height_px:
-    print("This image is not the same dimensions as the output file.")
-    print(f"\twidth match dimensions: ({img_width_in}, {img_height_in * img_width_px/img_height_px})")
-    print(f"\theight match dimensions: ({img_width_in * img_height_px/img_width_px}, {img_height_in})")
+    logger.warning("This image is not the same dimensions as the output file.")
+    logger.warning("\twidth match dimensions: (%s, %s)", img_width_in, img_height_in * img_width_px/img_height_px)
+    logger.warning("\theight match dimensions: (%s, %s)", img_width_in * img_height_px/img_width_px, img_height_in)
     if not force_dimensions:
-      print("Either fix the dimensions or run again with the --force/-f flag")
+      logger.error("Either fix the dimensions or run again with the --force/-f flag")
       exit(1)
-    print("Continuing with non-matching dimensions, this may cause distortion.")
-
-def export_multi_page_pdf(image, page_size_inches, image_size_inches, output_file_name, force_dimensions=False):
+    logger.warning("Continuing with non-matching dimensions, this may cause distortion.")
+
+def page_label(row, column):
+  """Returns the label of the page at a (row, column) tile: A1, A2, ..., Z1, AA1, ..."""
+  letter = ""
+  row += 1
+  while row > 0:
+    row, remainder = divmod(row - 1, len(letters))
+    letter = letters[remainder] + letter
+  return f"{letter}{column + 1}"
+
+def is_blank(tile):
+  """Returns True if every pixel of the tile has the same color."""
+  return tile.size == 0 or (tile == tile[0, 0]).all()
+
+def add_assembly_map(doc, printed_tiles, pages_x, pages_y, usable_width, usable_height, border_points=BORDER_POINTS):
+  """
+  Draws a page showing the grid of tiles with the label of every printed page,
+  so skipped pages can be left as gaps when assembling.
+  """
+  doc.saveState()
+  doc.setFont("Helvetica-Bold", LABEL_FONT_SIZE)
+  doc.drawString(border_points, border_points + usable_height - LABEL_FONT_SIZE, f"Assembly map: {len(printed_tiles)} of {pages_x * pages_y} pages")
+
+  map_height = usable_height - 2 * LABEL_FONT_SIZE
+  cell = min(usable_width / pages_x, map_height / pages_y)
+  font_size = min(LABEL_FONT_SIZE, cell / 3)
+  doc.setFont("Helvetica", font_size)
+  doc.setLineWidth(0.5)
+  for row in range(pages_y):
+    for column in range(pages_x):
+      x = border_points + column * cell
+      # The pdf origin is the bottom left, rows run down from the top of the map.
+      y = border_points + map_height - (row + 1) * cell
+      printed = (row, column) in printed_tiles
+      doc.setFillColorRGB(*((0.85, 0.85, 0.85) if printed else (1, 1, 1)))
+      doc.rect(x, y, cell, cell, stroke=1, fill=1)
+      if printed:
+        doc.setFillColorRGB(0, 0, 0)
+        doc.drawCentredString(x + cell / 2, y + cell / 2 - font_size / 3, page_label(row, column))
+  doc.restoreState()
+  doc.showPage()
+
+def export_multi_page_pdf(image, page_size_inches, image_size_inches, output_file_name, force_dimensions=False, occupied_tiles=None, skip_empty=False, assembly_map=False, tile_callback=None, context=None, jpeg_quality=None):
+  """
+  Splits an image into page sized tiles and writes them to a pdf, one tile per page.
+
+  Args:
+    image: The image to print, with 3 channels or a single gray one.
+    page_size_inches: (width, height) of each page.
+    image_size_inches: (width, height) of the printed image.
+    output_file_name: The pdf path.
+    force_dimensions: Continue if the image and its size have different proportions.
+    occupied_tiles: Optional set of (row, column) tiles to print, e.g. from
+      `occupied_pages` of a page layout. Other tiles are left out.
+    skip_empty: Leave out tiles that are a single flat color.
+    assembly_map: Start the pdf with a map of where every printed page goes.
+    tile_callback: Optional `callback(tile, (x, y))` returning the image to print
+      for a tile at pixel position (x, y) of the image, e.g. to draw a
+      background only on the pages that are printed.
+    context: Optional RenderContext of the job; its `pdf_border_in` replaces
+      BORDER_INCHES. Any object with that attribute works, so this script does
+      not depend on the drafting package.
+    jpeg_quality: Optional JPEG quality (1-100) for tiles that are not black
+      and white, e.g. of photographed patterns. By default every tile is
+      stored losslessly, see tileEncoding.py.
+
+  Pages are written to the file as they are finished, see streamingPdf.py,
+  so memory use does not grow with the number of pages.
+  """
   page_size = (page_size_inches[0] * REPORT_LAB_DPI, page_size_inches[1] * REPORT_LAB_DPI)
-  print(f"Converting image:")
-  print(f"\tfrom dpi:({image.shape[1]}, {image.shape[0]}), in: {image_size_inches}")
-  print(f"\tto dpi: {page_size}, in: {page_size_inches}")
+  logger.info("Converting image:")
+  logger.info("\tfrom dpi:(%s, %s), in: %s", image.shape[1], image.shape[0], image_size_inches)
+  logger.info("\tto dpi: %s, in: %s", page_size, page_size_inches)
 
   check_proportions(image, image_size_inches, force_dimensions)
 
-  usable_width = page_size[0] - 2 * BORDER_POINTS
-  usable_height = page_size[1] - 2 * BORDER_POINTS
+  # Not rounded, so the tiles match page layouts made with the same border.
+  border_points = getattr(context, "pdf_border_in", BORDER_INCHES) * REPORT_LAB_DPI
+  usable_width = page_size[0] - 2 * border_points
+  usable_height = page_size[1] - 2 * border_points
 
-  doc = canvas.Canvas(output_file_name, pagesize=page_size)
   split_images, pages_x, pages_y = divide_image(image, (usable_width, usable_height), image_size_inches)
-  
-  current_page_x = 0
-  current_page_y = 0
-  current_letter = letters[current_page_y]
-
-  for img, size in split_images:
-    if current_page_x > pages_x - 1:
-       current_page_x = 1
-       current_page_y += 1
-       if current_page_y > len(letters):
-          wrap_count = current_page_y / len(letters)
-          current_letter = letters[wrap_count - 1] + letters[current_page_y % len(letters)]
-       else:
-          current_letter = letters[current_page_y]
-
-    else:
-       current_page_x += 1
-
-    file_name = convert_image(img)
-
-    doc.drawImage(file_name, BORDER_POINTS, BORDER_POINTS, usable_width, usable_height, showBoundary=True, preserveAspectRatio=True)
-    add_page_markings(doc, f"{current_letter}{current_page_x}", usable_width, usable_height, page_size)
-    
-    # The library will not accept a file in tmp, so this is the work around
-    os.remove(file_name)
-    doc.showPage()
 
-  print("Saving pdf to " + output_file_name)
-  doc.save()
+  # Tiles are in row-major order
+  tiles = [(index // pages_x, index % pages_x, img) for index, (img, _) in enumerate(split_images)]
+  if occupied_tiles is not None:
+    tiles = [tile for tile in tiles if tile[:2] in occupied_tiles]
+  if skip_empty:
+    tiles = [tile for tile in tiles if not is_blank(tile[2])]
+  logger.info("Printing %d of %d pages", len(tiles), len(split_images))
+
+  logger.info("Writing pdf to %s", output_file_name)
+  tile_width, tile_height = split_images[0][1]
+  kinds = Counter()
+  with StreamingPdfWriter(output_file_name, page_size) as doc:
+    if assembly_map:
+      add_assembly_map(doc, {tile[:2] for tile in tiles}, pages_x, pages_y, usable_width, usable_height, border_points)
+
+    for row, column, img in tiles:
+      if tile_callback is not None:
+        img = tile_callback(img, (column * tile_width, row * tile_height))
+      with span("pdf.encode"):
+        encoded = encode_tile(img, jpeg_quality)
+        kinds[encoded.kind] += 1
+        draw_encoded_image(doc, encoded, border_points, border_points, usable_width, usable_height)
+        add_page_markings(doc, page_label(row, column), usable_width, usable_height, page_size, border_points)
+        doc.showPage()
+  logger.info("Tiles: %s", ", ".join(f"{count} {kind}" for kind, count in sorted(kinds.items())) or "none")
 
 def inches_from_format_name(format):
    match format:
@@ -167,6 +249,7 @@ def inches_from_format_name(format):
 
 if __name__ == "__main__":
   import argparse
+  import cv2 as cv
   parser = argparse.ArgumentParser(
     prog='Image to Printable PDF',
     description='Takes an image, the size of the image and converts it to a pdf where the pages tile to create the input image at the same scale as the original.'
@@ -184,11 +267,15 @@ if __name__ == "__main__":
   
   parser.add_argument('--output', '-o', metavar='OUTPUT_PATH', type=str, help='Output file name, defaults to the original filename with "_split.pdf" appended')
   parser.add_argument('--force', '-f', action='store_true', help='Force overwrite of image dimensions, this may result in distorted outputs.')
+  parser.add_argument('--skip-empty', '-s', action='store_true', help='Leave out pages that would be blank.')
+  parser.add_argument('--map', '-m', action='store_true', help='Add an assembly map as the first page.')
+  parser.add_argument('--jpeg', '-j', metavar='QUALITY', type=int, nargs='?', const=DEFAULT_JPEG_QUALITY, help=f'Store pages that are not black and white as JPEG, for photographed patterns. Quality defaults to {DEFAULT_JPEG_QUALITY}.')
 
 
 
   args = parser.parse_args()
-  print(args)
+  logging.basicConfig(level=logging.INFO, format="%(message)s")
+  logger.debug(args)
 
   image = cv.imread(args.image)
   page_size = "letter"
@@ -199,7 +286,7 @@ if __name__ == "__main__":
   
   image_size = args.imagesize if args.imagesize is not None else tuple(args.imagedim)
   if image_size is None:
-    print("Image size is required")
+    logger.error("Image size is required")
     exit(1)
   elif isinstance(image_size, str):
     image_size = inches_from_format_name(image_size)
@@ -208,5 +295,5 @@ if __name__ == "__main__":
   if output_file_name is None:
     output_file_name = args.image[:-4] + "_split.pdf"
 
-  export_multi_page_pdf(image, page_size, image_size, output_file_name, args.force)
+  export_multi_page_pdf(image, page_size, image_size, output_file_name, args.force, skip_empty=args.skip_empty, assembly_map=args.map, jpeg_quality=args.jpeg)
 
@@ -0,0 +1,234 @@
+#!/usr/bin/python
+# A minimal pdf writer that streams every page to the file as soon as it is
+# finished. ReportLab's canvas keeps all pages and images in memory until it
+# is saved; here only the current page's drawing commands are held, images are
+# written the moment they are drawn, and the cross-reference table is written
+# on close from the object offsets collected along the way.
+#
+# It implements the part of the ReportLab canvas API the exporter uses, so
+# the page drawing helpers work with either.
+import zlib
+
+PDF_VERSION = "1.4"
+CONTENT_COMPRESSION_LEVEL = 6
+# The standard fonts every pdf reader has, so nothing needs embedding
+FONTS = ("Helvetica", "Helvetica-Bold")
+
+# Fixed object numbers, the pages tree is written last once all pages are known
+CATALOG_OBJ = 1
+PAGES_OBJ = 2
+
+
+def _num(value):
+  """Formats a number the way pdf content streams expect: no exponent, no trailing zeros."""
+  if value == int(value):
+    return str(int(value))
+  return f"{value:.4f}".rstrip("0").rstrip(".")
+
+
+def _name(value):
+  return "/" + value
+
+
+def _string(text):
+  """A pdf literal string. Text is written in the fonts' WinAnsiEncoding."""
+  escaped = text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+  return "(" + escaped + ")"
+
+
+def _dictionary(entries):
+  """Formats a dict of already formatted pdf values."""
+  return "<< " + " ".join(f"/{key} {value}" for key, value in entries.items()) + " >>"
+
+
+class StreamingPdfWriter:
+  """
+  Writes a pdf page by page with flat memory use.
+
+  Args:
+    output: A file path or a binary file object to write to.
+    pagesize: (width, height) of every page in points.
+  """
+
+  def __init__(self, output, pagesize):
+    self._owns_file = isinstance(output, str)
+    self._file = open(output, "wb") if self._owns_file else output
+    # Offsets are relative to the start of the pdf, which need not be the start of a file object
+    self._start = self._file.tell()
+    self._pagesize = pagesize
+    # Byte offset of every object, index 0 is the free head of the xref table
+    self._offsets = [None]
+    self._page_objs = []
+    self._closed = False
+
+    self._write(f"%PDF-{PDF_VERSION}\n%\xe2\xe3\xcf\xd3\n".encode("latin-1"))
+    self._reserve(CATALOG_OBJ)
+    self._reserve(PAGES_OBJ)
+    # Font resource name and object number, shared by every page
+    self._fonts = {}
+    for index, font in enumerate(FONTS):
+      obj = self._add_object(_dictionary({"Type": "/Font", "Subtype": "/Type1", "BaseFont": _name(font), "Encoding": "/WinAnsiEncoding"}))
+      self._fonts[font] = (f"F{index + 1}", obj)
+    self._start_page()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, exc_value, traceback):
+    if exc_type is None:
+      self.close()
+    elif self._owns_file:
+      # Leave the unfinished pdf without a trailer rather than make it look complete.
+      self._closed = True
+      self._file.close()
+
+  # --- Low level object output ---
+
+  def _write(self, data):
+    self._file.write(data)
+
+  def _tell(self):
+    return self._file.tell() - self._start
+
+  def _reserve(self, obj):
+    """Allocates an object number to be written later."""
+    assert obj == len(self._offsets)
+    self._offsets.append(None)
+
+  def _begin_object(self, obj=None):
+    if obj is None:
+      obj = len(self._offsets)
+      self._offsets.append(None)
+    self._offsets[obj] = self._tell()
+    self._write(f"{obj} 0 obj\n".encode("latin-1"))
+    return obj
+
+  def _add_object(self, body, obj=None):
+    """Writes an object given as formatted text and returns its number."""
+    obj = self._begin_object(obj)
+    self._write(f"{body}\nendobj\n".encode("latin-1"))
+    return obj
+
+  def _add_stream(self, entries, data):
+    """Writes a stream object with the dictionary `entries` and returns its number."""
+    obj = self._begin_object()
+    entries = {**entries, "Length": str(len(data))}
+    self._write(f"{_dictionary(entries)}\nstream\n".encode("latin-1"))
+    self._write(data)
+    self._write(b"\nendstream\nendobj\n")
+    return obj
+
+  # --- Page state ---
+
+  def _start_page(self):
+    self._code = []
+    self._images = {}
+    self._state = {"font": FONTS[0], "font_size": 12}
+    self._saved_states = []
+
+  def saveState(self):
+    self._saved_states.append(dict(self._state))
+    self._code.append("q")
+
+  def restoreState(self):
+    self._state = self._saved_states.pop()
+    self._code.append("Q")
+
+  def setStrokeColorRGB(self, r, g, b):
+    self._code.append(f"{_num(r)} {_num(g)} {_num(b)} RG")
+
+  def setFillColorRGB(self, r, g, b):
+    self._code.append(f"{_num(r)} {_num(g)} {_num(b)} rg")
+
+  def setLineWidth(self, width):
+    self._code.append(f"{_num(width)} w")
+
+  def setFont(self, font, size):
+    if font not in self._fonts:
+      raise ValueError(f"Unknown font '{font}', expected one of {', '.join(FONTS)}.")
+    self._state["font"], self._state["font_size"] = font, size
+
+  # --- Drawing ---
+
+  def line(self, x1, y1, x2, y2):
+    self._code.append(f"{_num(x1)} {_num(y1)} m {_num(x2)} {_num(y2)} l S")
+
+  def rect(self, x, y, width, height, stroke=1, fill=0):
+    operator = {(1, 0): "S", (0, 1): "f", (1, 1): "B", (0, 0): "n"}[(int(bool(stroke)), int(bool(fill)))]
+    self._code.append(f"{_num(x)} {_num(y)} {_num(width)} {_num(height)} re {operator}")
+
+  def stringWidth(self, text, font=None, size=None):
+    """The width of `text` in points, from the standard font metrics ReportLab ships."""
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+    return stringWidth(text, font or self._state["font"], size or self._state["font_size"])
+
+  def drawString(self, x, y, text):
+    font = self._fonts[self._state["font"]][0]
+    self._code.append(f"BT /{font} {_num(self._state['font_size'])} Tf {_num(x)} {_num(y)} Td {_string(text)} Tj ET")
+
+  def drawCentredString(self, x, y, text):
+    self.drawString(x - self.stringWidth(text) / 2, y, text)
+
+  def draw_image(self, image, x, y, width, height):
+    """
+    Writes an EncodedImage (see tileEncoding.py) to the file right away and
+    draws it stretched over the box.
+    """
+    entries = {
+      "Type": "/XObject",
+      "Subtype": "/Image",
+      "Width": str(image.width),
+      "Height": str(image.height),
+      "ColorSpace": _name(image.color_space),
+      "BitsPerComponent": str(image.bits_per_component),
+      "Filter": _name(image.filter),
+    }
+    if image.decode_parms:
+      entries["DecodeParms"] = _dictionary({key: _num(value) for key, value in image.decode_parms.items()})
+    name = f"Im{len(self._images) + 1}"
+    self._images[name] = self._add_stream(entries, image.data)
+    self._code.append(f"q {_num(width)} 0 0 {_num(height)} {_num(x)} {_num(y)} cm /{name} Do Q")
+
+  def showPage(self):
+    """Writes the current page and starts a new one."""
+    content = zlib.compress("\n".join(self._code).encode("latin-1"), CONTENT_COMPRESSION_LEVEL)
+    content_obj = self._add_stream({"Filter": "/FlateDecode"}, content)
+    resources = {"Font": _dictionary({name: f"{obj} 0 R" for name, obj in self._fonts.values()})}
+    if self._images:
+      resources["XObject"] = _dictionary({name: f"{obj} 0 R" for name, obj in self._images.items()})
+    self._page_objs.append(self._add_object(_dictionary({
+      "Type": "/Page",
+      "Parent": f"{PAGES_OBJ} 0 R",
+      "MediaBox": f"[0 0 {_num(self._pagesize[0])} {_num(self._pagesize[1])}]",
+      "Resources": _dictionary(resources),
+      "Contents": f"{content_obj} 0 R",
+    })))
+    self._file.flush()
+    self._start_page()
+
+  def save(self):
+    self.close()
+
+  def close(self):
+    """
+    Writes the pages tree, the cross-reference table and the trailer. Drawing
+    after the last showPage is discarded, as with ReportLab.
+    """
+    if self._closed:
+      return
+    self._closed = True
+    kids = " ".join(f"{obj} 0 R" for obj in self._page_objs)
+    self._add_object(_dictionary({"Type": "/Pages", "Kids": f"[{kids}]", "Count": str(len(self._page_objs))}), PAGES_OBJ)
+    self._add_object(_dictionary({"Type": "/Catalog", "Pages": f"{PAGES_OBJ} 0 R"}), CATALOG_OBJ)
+    info_obj = self._add_object(_dictionary({"Producer": _string("SewingPatternAutomation")}))
+
+    xref_offset = self._tell()
+    lines = [f"xref\n0 {len(self._offsets)}\n", "0000000000 65535 f \n"]
+    lines.extend(f"{offset:010d} 00000 n \n" for offset in self._offsets[1:])
+    lines.append(f"trailer\n{_dictionary({'Size': str(len(self._offsets)), 'Root': f'{CATALOG_OBJ} 0 R', 'Info': f'{info_obj} 0 R'})}\n")
+    lines.append(f"startxref\n{xref_offset}\n%%EOF\n")
+    self._write("".join(lines).encode("latin-1"))
+    if self._owns_file:
+      self._file.close()
+    else:
+      self._file.flush()
@@ -0,0 +1,88 @@
+#!/usr/bin/python
+# Encodes image tiles as pdf image XObjects in the smallest form that keeps them
+# exact: 1 bit per pixel for black and white line art, 8-bit gray for gray tiles
+# and RGB only for color. Flate data is run through the PNG "Up" predictor first,
+# which turns the long straight lines of patterns into runs of zeros.
+import zlib
+from typing import NamedTuple
+import numpy as np
+
+TILE_KINDS = ("bilevel", "gray", "color")
+FLATE_LEVEL = 6
+PNG_UP_FILTER = 2
+# /Predictor values from 10 up are PNG predictors with a filter type per row
+PNG_PREDICTOR = 15
+DEFAULT_JPEG_QUALITY = 85
+
+
+class EncodedImage(NamedTuple):
+  """An image ready to be embedded in a pdf as an image XObject."""
+  width: int
+  height: int
+  color_space: str # DeviceGray or DeviceRGB
+  bits_per_component: int
+  filter: str # FlateDecode or DCTDecode
+  decode_parms: dict # Predictor settings for FlateDecode, None otherwise
+  data: bytes
+  kind: str # One of TILE_KINDS
+
+
+def _single_channel(tile):
+  """Returns the tile as one channel if every pixel is gray, else None."""
+  if tile.ndim == 2:
+    return tile
+  if tile.shape[2] == 1 or ((tile[..., 0] == tile[..., 1]).all() and (tile[..., 1] == tile[..., 2]).all()):
+    return tile[..., 0]
+  return None
+
+
+def _is_bilevel(gray):
+  return bool(((gray == 0) | (gray == 255)).all())
+
+
+def _predict_up(rows):
+  """Applies the PNG Up filter to every row and prefixes each with its filter type."""
+  filtered = np.empty((rows.shape[0], rows.shape[1] + 1), dtype=np.uint8)
+  filtered[:, 0] = PNG_UP_FILTER
+  filtered[:1, 1:] = rows[:1]
+  # uint8 arithmetic wraps around, as the filter is defined modulo 256
+  np.subtract(rows[1:], rows[:-1], out=filtered[1:, 1:])
+  return filtered
+
+
+def encode_tile(tile, jpeg_quality=None, level=FLATE_LEVEL):
+  """
+  Encodes a BGR or single channel tile for embedding in a pdf.
+
+  Args:
+    tile: The tile as a uint8 array.
+    jpeg_quality: Optional JPEG quality (1-100). When given, gray and color
+      tiles, e.g. of photographed patterns, are JPEG compressed instead.
+      Black and white tiles stay exact either way.
+    level: The zlib compression level of Flate data.
+
+  Returns:
+    An EncodedImage.
+  """
+  height, width = tile.shape[:2]
+  gray = _single_channel(tile)
+  if gray is not None and _is_bilevel(gray):
+    # DeviceGray maps 1 bits to white, as set pixels are in the tile.
+    kind, rows, colors, bits = "bilevel", np.packbits(gray >= 128, axis=1), 1, 1
+  else:
+    kind = "gray" if gray is not None else "color"
+    if jpeg_quality is not None:
+      import cv2 as cv
+      ok, encoded = cv.imencode(".jpg", gray if gray is not None else tile, [cv.IMWRITE_JPEG_QUALITY, jpeg_quality])
+      if not ok:
+        raise RuntimeError("Could not encode the tile as jpeg.")
+      color_space = "DeviceGray" if gray is not None else "DeviceRGB"
+      return EncodedImage(width, height, color_space, 8, "DCTDecode", None, encoded.tobytes(), kind)
+    if gray is not None:
+      rows, colors, bits = gray, 1, 8
+    else:
+      rows, colors, bits = np.ascontiguousarray(tile[..., ::-1]).reshape(height, width * 3), 3, 8
+
+  data = zlib.compress(_predict_up(rows).tobytes(), level)
+  decode_parms = {"Predictor": PNG_PREDICTOR, "Colors": colors, "BitsPerComponent": bits, "Columns": width}
+  return EncodedImage(width, height, "DeviceGray" if colors == 1 else "DeviceRGB", bits, "FlateDecode", decode_parms, data, kind)
@@ -0,0 +1,25 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Drafting modules import `util.*`, the services import from the repository root.
+for path in (ROOT, os.path.join(ROOT, "patternDrafting")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+SAMPLE_MEASUREMENTS = os.path.join(ROOT, "patternDrafting", "measurements", "sample_measurements.yaml")
+SAMPLE_GARMENT_SPECS = os.path.join(ROOT, "patternDrafting", "garmentSpecs", "sample_garment_specs.yaml")
+
+
+@pytest.fixture
+def measurements():
+    from util.measurements import Measurements
+    return Measurements.from_file(SAMPLE_MEASUREMENTS)
+
+
+@pytest.fixture
+def garment_specs():
+    from util.garment_specs import GarmentSpecs
+    return GarmentSpecs.from_file(SAMPLE_GARMENT_SPECS)
@@ -0,0 +1,39 @@
+import cv2 as cv
+import numpy as np
+import pytest
+
+import draftBodiceSloper
+from util.canvas import BILEVEL_THRESHOLD, to_bgr, unpack_bits
+from util.draw import draw_pattern
+from util.render_context import get_context
+
+SCALE = 30
+
+
+@pytest.fixture
+def production(measurements, garment_specs):
+    context = get_context(profile="production")
+    pieces = draftBodiceSloper.draft(measurements, garment_specs, context=context)
+    render = lambda canvas: draw_pattern(
+        SCALE, pieces, garment_specs.seam_allowance, None, "Test", output=False, context=context._replace(canvas=canvas)
+    )[0]
+    return pieces, context, render
+
+
+def test_compact_canvases_match_color(production):
+    _, context, render = production
+    gray = cv.cvtColor(render("color"), cv.COLOR_BGR2GRAY)
+
+    np.testing.assert_array_equal(render("gray"), gray)
+    np.testing.assert_array_equal(unpack_bits(render("bilevel")), np.where(gray >= BILEVEL_THRESHOLD, 255, 0))
+    # Palette text has hard edges, so antialiased pixels snap to the line or the background.
+    palette = to_bgr(render("palette"), context._replace(canvas="palette"))[..., 0]
+    np.testing.assert_array_equal(palette, np.where(gray >= 128, 255, 0))
+
+
+@pytest.mark.parametrize("canvas, ndim", [("color", 3), ("gray", 2), ("bilevel", 2), ("palette", 2)])
+def test_sprites_are_drawn_at_canvas_depth(production, canvas, ndim):
+    pieces, context, _ = production
+    sprite, _ = pieces[0].get_sprite(SCALE, "Test", context=context._replace(canvas=canvas))
+    assert sprite.dtype == np.uint8
+    assert sprite.ndim == ndim
@@ -0,0 +1,50 @@
+import pytest
+
+import draftBodiceSloper
+from util.estimation import estimate_piece, estimate_yardage, quote_yardage
+from util.line import Line
+from util.pattern_piece import PatternPiece
+
+
+def test_quote_matches_estimate(measurements, garment_specs):
+    pieces = draftBodiceSloper.draft(measurements, garment_specs, finish=False)
+    for copies in (1, 2):
+        estimate = estimate_yardage(pieces, garment_specs.seam_allowance, 45, copies=copies)
+        quote = quote_yardage(draftBodiceSloper.draft, [measurements], garment_specs, 45, copies=copies)
+        assert quote.tolist() == [estimate.yards]
+
+
+def test_quote_rejects_narrow_fabric(measurements, garment_specs):
+    with pytest.raises(ValueError, match="does not fit"):
+        quote_yardage(draftBodiceSloper.draft, [measurements], garment_specs, 10)
+
+
+def _rectangle(name, left, right, height):
+    piece = PatternPiece(name)
+    piece.set_outline([
+        ("Left", Line.vertical(left, height, 0)),
+        ("Top", Line.horizontal(0, left, right)),
+        ("Right", Line.vertical(right, 0, height)),
+        ("Bottom", Line.horizontal(height, right, left)),
+    ])
+    return piece
+
+
+def test_fold_pieces_are_measured_unfolded():
+    half = _rectangle("Half", 0, 5, 10)
+    half.add_fold_line()
+    assert half.cut_on_fold
+    folded = estimate_piece(half, 0.5)
+    whole = estimate_piece(_rectangle("Whole", -5, 5, 10), 0.5)
+    for field in ("area", "perimeter", "cut_area", "cut_perimeter", "cut_width", "cut_height"):
+        assert getattr(folded, field) == pytest.approx(getattr(whole, field))
+
+    with pytest.raises(ValueError, match="does not fit"):
+        estimate_yardage([half], 0.5, 10)
+
+
+def test_cut_counts_multiply_the_area(measurements, garment_specs):
+    pieces = draftBodiceSloper.draft(measurements, garment_specs, finish=False)
+    assert [piece.cut_count for piece in pieces] == [2, 2]
+    estimate = estimate_yardage(pieces, garment_specs.seam_allowance, 45, copies=3)
+    assert estimate.cut_area == pytest.approx(3 * 2 * sum(piece.cut_area for piece in estimate.pieces))
@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+import draftBatwingTop
+import draftBodiceSloper
+from util.finishing import finish_pieces
+
+SCALE = 50
+
+
+def _draft(measurements, garment_specs):
+    return (draftBodiceSloper.draft(measurements, garment_specs, finish=False)
+            + draftBatwingTop.draft(measurements, garment_specs, finish=False))
+
+
+# The default uses one thread per CPU, which may be a single one, so an explicit
+# pool size makes sure the threaded path runs too.
+@pytest.mark.parametrize("max_workers", [None, 4])
+def test_threads_finish_pieces_like_a_single_worker(measurements, garment_specs, max_workers):
+    expected = finish_pieces(_draft(measurements, garment_specs), garment_specs.seam_allowance, scale=SCALE, max_workers=1)
+    pieces = _draft(measurements, garment_specs)
+    finished = finish_pieces(pieces, garment_specs.seam_allowance, scale=SCALE, max_workers=max_workers)
+
+    assert all(a is b for a, b in zip(finished, pieces))
+    assert [piece.name for piece in finished] == [piece.name for piece in expected]
+    for a, b in zip(expected, finished):
+        assert len(b.cut_lines) == len(a.cut_lines) > 0
+        for line_a, line_b in zip(a.cut_lines, b.cut_lines):
+            np.testing.assert_allclose(line_b.points, line_a.points)
+        np.testing.assert_array_equal(b.get_outline_contour(SCALE), a.get_outline_contour(SCALE))
+        np.testing.assert_equal(b.get_label_box(SCALE), a.get_label_box(SCALE))
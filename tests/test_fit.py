@@ -0,0 +1,11 @@
+import draftBodiceSloper
+from util.fit import FEATURES, FitTargets, measure_fit, optimise_fit
+
+
+def test_default_targets_keep_the_dart_backed_off(measurements, garment_specs):
+    fit, _ = optimise_fit(draftBodiceSloper.draft, measurements, garment_specs, samples=32)
+    assert fit.dart_back_off > 0.02
+
+    pieces = draftBodiceSloper.draft(measurements, garment_specs, fit=fit, finish=False)
+    tip_gap = measure_fit(pieces, measurements)[FEATURES.index("bust_tip_gap")]
+    assert abs(tip_gap - FitTargets().target_tip_gap) < 0.25
@@ -0,0 +1,106 @@
+import asyncio
+import io
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from patternService import client, jobServer
+from util.schema import load_yaml
+from conftest import SAMPLE_GARMENT_SPECS, SAMPLE_MEASUREMENTS
+
+RESULT = b"rendered pattern " * 10000 # Several chunks
+TIMEOUT_S = 10
+
+
+@pytest.fixture
+def renders(monkeypatch):
+    """Replaces the renderer with one that blocks until released and records its payloads."""
+    calls = []
+    release = threading.Event()
+
+    def render_job(payload, output_file):
+        calls.append(payload)
+        assert release.wait(TIMEOUT_S)
+        with open(output_file, "wb") as f:
+            f.write(RESULT)
+
+    monkeypatch.setattr(jobServer, "render_job", render_job)
+    return calls, release
+
+
+def _payload(scale=100):
+    return {"measurements": load_yaml(SAMPLE_MEASUREMENTS), "garment_specs": load_yaml(SAMPLE_GARMENT_SPECS), "scale": scale}
+
+
+async def _start_server():
+    server = jobServer.JobServer(max_workers=1, max_jobs=1)
+    await server.start(port=0)
+    # Threads see the patched renderer, worker processes might not.
+    server._executor.shutdown()
+    server._executor = ThreadPoolExecutor(max_workers=1)
+    return server, server._server.sockets[0].getsockname()[1]
+
+
+async def _request(payload, port):
+    output = io.BytesIO()
+    key = await asyncio.to_thread(client.request_pattern, payload, output, port=port, timeout=TIMEOUT_S)
+    return key, output.getvalue()
+
+
+async def _wait_for_waiters(server, count):
+    for _ in range(TIMEOUT_S * 100):
+        if sum(server.status()["jobs"].values()) == count:
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"Expected {count} waiting requests, got {server.status()}.")
+
+
+def test_identical_requests_share_a_job_and_full_server_refuses(renders):
+    calls, release = renders
+
+    async def scenario():
+        server, port = await _start_server()
+        try:
+            first = asyncio.ensure_future(_request(_payload(), port))
+            second = asyncio.ensure_future(_request(_payload(), port))
+            await _wait_for_waiters(server, 2)
+            assert len(server.status()["jobs"]) == 1
+
+            # A different job does not fit while the only slot is taken
+            with pytest.raises(client.JobError) as refused:
+                await _request(_payload(scale=50), port)
+            assert refused.value.status == 503
+            assert refused.value.retry_after == str(jobServer.RETRY_AFTER_S)
+
+            release.set()
+            results = await asyncio.gather(first, second)
+            # The result file is removed once both requests have it open
+            assert os.listdir(server._output_dir.name) == []
+            return results, server.status()
+        finally:
+            release.set()
+            await server.close()
+
+    results, status = asyncio.run(asyncio.wait_for(scenario(), TIMEOUT_S * 2))
+    expected_key = jobServer.job_id(jobServer.validate_payload(_payload()))
+    assert results == [(expected_key, RESULT)] * 2
+    assert len(calls) == 1
+    assert status["jobs"] == {}
+
+
+def test_payloads_are_validated_once(caplog):
+    payload = _payload()
+    payload["measurements"]["bust"]["full bsut"] = 40
+    with caplog.at_level(logging.WARNING, logger="util.schema"):
+        validated = jobServer.validate_payload(payload)
+    assert len(caplog.records) == 1
+    assert validated["measurements"]["bust"] == payload["measurements"]["bust"]["full bust"]
+
+    # Spelling out a default gives the same job
+    explicit = _payload()
+    explicit["garment_specs"]["seam_allowance"] = validated["garment_specs"]["seam_allowance"]
+    explicit["format"] = "png"
+    assert jobServer.job_id(jobServer.validate_payload(explicit)) == jobServer.job_id(jobServer.validate_payload(_payload()))
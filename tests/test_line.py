@@ -0,0 +1,89 @@
+import math
+
+import numpy as np
+import pytest
+
+from util.dart import Dart
+from util.line import Line
+
+RADIUS = 10
+
+
+def _quarter_circle():
+    angles = np.linspace(0, math.pi / 2, 9)
+    return Line([(RADIUS * math.cos(a), RADIUS * math.sin(a)) for a in angles], smooth=True)
+
+
+@pytest.fixture(params=["straight", "polyline", "curve"])
+def line_and_length(request):
+    if request.param == "straight":
+        return Line([(1, 2), (4, 6)]), 5.0
+    if request.param == "polyline":
+        return Line([(0, 0), (3, 0), (3, 4), (0, 4)]), 10.0
+    return _quarter_circle(), math.pi * RADIUS / 2
+
+
+def test_length(line_and_length):
+    line, expected = line_and_length
+    # The curve is an interpolating spline through points on the arc, not the arc itself
+    assert line.length() == pytest.approx(expected, rel=1e-3)
+
+
+def test_point_at_length(line_and_length):
+    line, _ = line_and_length
+    length = line.length()
+    assert line.point_at_length(0) == pytest.approx(line.points[0])
+    assert line.point_at_length(length) == pytest.approx(line.points[-1])
+    middle = line.point_at_length(length / 2)
+    first, second = line.split_at_length(length / 2)
+    assert first.points[-1] == pytest.approx(middle) and second.points[0] == pytest.approx(middle)
+    points = line.point_at_length(np.array([0, length / 2, length]))
+    assert points.shape == (3, 2)
+    np.testing.assert_allclose(points[1], middle)
+
+
+def test_curve_midpoint_lies_on_the_arc():
+    line = _quarter_circle()
+    x, y = line.point_at_length(line.length() / 2)
+    assert math.hypot(x, y) == pytest.approx(RADIUS, abs=1e-2)
+    assert math.atan2(y, x) == pytest.approx(math.pi / 4, abs=1e-3)
+
+
+def test_project_round_trips(line_and_length):
+    line, _ = line_and_length
+    for distance in np.linspace(0, line.length(), 7):
+        assert line.project(line.point_at_length(distance)) == pytest.approx(distance, abs=1e-9)
+
+
+def test_split_keeps_the_length(line_and_length):
+    line, _ = line_and_length
+    for distance in (0.0, 1.0, line.length() / 3, line.length()):
+        first, second = line.split_at_length(distance)
+        assert first.length() == pytest.approx(distance, abs=1e-9)
+        assert first.length() + second.length() == pytest.approx(line.length(), abs=1e-9)
+
+
+def test_tangent_follows_the_curve():
+    line = _quarter_circle()
+    assert line.tangent_at(line.length() / 2) == pytest.approx((-math.sqrt(0.5), math.sqrt(0.5)), abs=1e-2)
+    assert Line([(1, 2), (4, 6)]).tangent_at(1.0) == pytest.approx((0.6, 0.8))
+
+
+def test_in_place_edits_need_invalidation():
+    line = Line([(0, 0), (3, 0)])
+    assert line.length() == 3
+    line.points[1] = (0, 4)
+    line.invalidate_cache()
+    assert line.length() == 4
+    line.points = [(0, 0), (5, 0)]
+    assert line.length() == 5
+
+
+def test_dart_from_legs_matches_the_dart():
+    seam = Line.horizontal(10, 0, 20)
+    dart = Dart(seam, (10, 10), 2, (10, 4), name="Waist Dart")
+    rebuilt = Dart.from_legs(dart.seam_line, Line(list(dart.leg1.points)), Line(list(dart.leg2.points)), dart.tip, name=dart.name)
+    assert rebuilt.name == "Waist Dart" and rebuilt.tip == dart.tip
+    assert rebuilt.extended_legs == []
+    assert [leg.points for leg in rebuilt.get_lines()] == [leg.points for leg in dart.get_lines()]
+    assert abs(rebuilt.leg1.points[0][0] - rebuilt.leg2.points[0][0]) == pytest.approx(2)
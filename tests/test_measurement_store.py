@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+import draftBodiceSloper
+from util.measurement_store import MeasurementStore, MeasurementView, write_store
+from util.measurements import FIELDS, Measurements
+from util.schema import SchemaError
+
+
+@pytest.fixture
+def store(tmp_path, measurements):
+    larger = Measurements.from_values(**{name: getattr(measurements, name) * 1.1 for name in FIELDS})
+    write_store(str(tmp_path / "store"), ["c-20", "c-03", "c-11"], [larger, measurements, {"bust": 40}])
+    return MeasurementStore(str(tmp_path / "store"))
+
+
+def test_lookup(store, measurements):
+    assert len(store) == 3
+    assert "c-03" in store and "c-04" not in store
+    view = store["c-03"]
+    assert isinstance(view, MeasurementView) and view.customer_id == "c-03"
+    assert view.to_values() == {name: getattr(measurements, name) for name in FIELDS}
+    assert store["c-11"].bust == 40
+    assert [view.customer_id for view in store.views(["c-20", "c-11"])] == ["c-20", "c-11"]
+    assert [view.customer_id for view in store.views()] == ["c-03", "c-11", "c-20"]
+
+
+def test_missing_ids_raise_key_error(store):
+    with pytest.raises(KeyError):
+        store["c-04"]
+    with pytest.raises(KeyError):
+        list(store.views(["c-03", "c-030"]))
+    assert store.get("c-04") is None
+
+
+def test_columns_are_contiguous(store, measurements):
+    column = store.column("bust")
+    assert column.flags.c_contiguous and not column.flags.writeable
+    np.testing.assert_allclose(column, [measurements.bust, 40, measurements.bust * 1.1])
+    assert store.column("customer_id").tolist() == ["c-03", "c-11", "c-20"]
+    with pytest.raises(KeyError):
+        store.column("shoe_size")
+
+
+def test_drafting_from_a_view(store, measurements, garment_specs):
+    from_view = draftBodiceSloper.draft(store["c-03"], garment_specs, finish=False)
+    from_measurements = draftBodiceSloper.draft(measurements, garment_specs, finish=False)
+    for expected, actual in zip(from_measurements, from_view):
+        np.testing.assert_allclose(actual.get_outline(), expected.get_outline())
+
+
+def test_duplicate_ids_are_rejected(tmp_path, measurements):
+    with pytest.raises(SchemaError, match="unique"):
+        write_store(str(tmp_path / "store"), [1, 2, 1], [measurements] * 3)
+    with pytest.raises(SchemaError):
+        MeasurementStore(str(tmp_path / "missing"))
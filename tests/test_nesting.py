@@ -0,0 +1,63 @@
+import cv2 as cv
+import numpy as np
+import pytest
+
+import draftBatwingTop
+import draftBodiceSloper
+from util.draw import get_layout
+from util.nesting import get_nested_layout
+
+CHECK_RESOLUTION = 20 # Cells per inch used to look for overlaps, finer than the nesting grid
+
+
+@pytest.fixture
+def pieces(measurements, garment_specs):
+    return draftBodiceSloper.draft(measurements, garment_specs) + draftBatwingTop.draft(measurements, garment_specs)
+
+
+def _placed_outlines(layouts):
+    outlines = []
+    for layout in layouts:
+        cut_line = layout['piece'].cut_lines[0]
+        outlines.append(np.asarray(cut_line.get_render_points(), dtype=float) + layout['offset'])
+    return outlines
+
+
+def _check_layout(layouts, pieces, width_in, height_in):
+    # One layout per piece, in the caller's order
+    assert [layout['piece'].name for layout in layouts] == [piece.name for piece in pieces]
+
+    outlines = _placed_outlines(layouts)
+    for outline in outlines:
+        assert outline[:, 0].min() >= 0 and outline[:, 0].max() <= width_in
+        assert outline[:, 1].min() >= 0 and outline[:, 1].max() <= height_in
+
+    coverage = np.zeros((round(height_in * CHECK_RESOLUTION) + 1, round(width_in * CHECK_RESOLUTION) + 1), dtype=np.uint8)
+    for outline in outlines:
+        mask = np.zeros_like(coverage)
+        cv.fillPoly(mask, [np.round(outline * CHECK_RESOLUTION).astype(np.int32)], 1)
+        coverage += mask
+    assert coverage.max() == 1, "two pieces overlap"
+
+
+def test_nesting_beats_side_by_side(pieces, garment_specs):
+    _, side_by_side_width, side_by_side_length = get_layout(pieces, garment_specs.seam_allowance)
+    layouts, width_in, length_in = get_nested_layout(pieces, side_by_side_width)
+    assert width_in <= side_by_side_width
+    assert length_in <= side_by_side_length
+    _check_layout(layouts, pieces, width_in, length_in)
+
+
+@pytest.mark.parametrize("fabric_width", [45, 60])
+def test_nesting_fits_the_fabric(pieces, fabric_width):
+    layouts, width_in, length_in = get_nested_layout(pieces, fabric_width)
+    assert width_in <= fabric_width
+    _check_layout(layouts, pieces, width_in, length_in)
+    # Stacking every piece would always fit, so nesting must do at least as well
+    heights = [piece.get_bounding_box()[3] - piece.get_bounding_box()[1] for piece in pieces]
+    assert length_in <= sum(heights)
+
+
+def test_pieces_wider_than_the_fabric_are_rejected(pieces):
+    with pytest.raises(ValueError, match="wider than the fabric"):
+        get_nested_layout(pieces, 10)
@@ -0,0 +1,38 @@
+import draftBodiceSloper
+from pdfManagement.convertImageToMultiPagePdf import REPORT_LAB_DPI, divide_image, inches_from_format_name
+from util.draw import draw_pattern
+from util.nesting import get_page_layout, occupied_pages, tile_size
+from util.render_context import get_context
+
+SCALE = 20
+LETTER = inches_from_format_name("letter")
+
+
+def test_page_layout_uses_the_context_border(measurements, garment_specs):
+    context = get_context(profile="production")._replace(pdf_border_in=1.25)
+    pieces = draftBodiceSloper.draft(measurements, garment_specs, context=context)
+    img, layouts = draw_pattern(SCALE, pieces, garment_specs.seam_allowance, None, "Test", output=False, page_size=LETTER, context=context)
+
+    tile_w_in, tile_h_in = tile_size(LETTER, context.pdf_border_in)
+    pages_across = round(img.shape[1] / SCALE / tile_w_in)
+    pages_down = round(img.shape[0] / SCALE / tile_h_in)
+    assert img.shape[1] == round(pages_across * tile_w_in * SCALE)
+
+    # The exporter tiles the canvas into the same grid of pages
+    border_points = context.pdf_border_in * REPORT_LAB_DPI
+    usable = (LETTER[0] * REPORT_LAB_DPI - 2 * border_points, LETTER[1] * REPORT_LAB_DPI - 2 * border_points)
+    _, tiles_across, tiles_down = divide_image(img, usable, (img.shape[1] / SCALE, img.shape[0] / SCALE))
+    assert (tiles_across, tiles_down) == (pages_across, pages_down)
+
+    pages = occupied_pages(layouts, LETTER, context.pdf_border_in)
+    assert pages and all(row < pages_down and column < pages_across for row, column in pages)
+
+
+def test_page_layout_tries_sheet_widths(measurements, garment_specs):
+    pieces = draftBodiceSloper.draft(measurements, garment_specs)
+    layouts, _, _ = get_page_layout(pieces, LETTER)
+    default_pages = len(occupied_pages(layouts, LETTER))
+    for pages_across in range(3, 6):
+        layouts, _, _ = get_page_layout(pieces, LETTER, pages_across=pages_across)
+        assert default_pages <= len(occupied_pages(layouts, LETTER))
+    assert default_pages <= 12
@@ -0,0 +1,93 @@
+import copy
+import pickle
+
+import numpy as np
+import pytest
+
+from util.line import Line
+from util.pattern_piece import PatternPiece
+from util.render_cache import RENDER_CACHE, RenderCache
+
+SCALE = 20
+
+
+def _square(size):
+    corners = [(0, 0), (size, 0), (size, size), (0, size)]
+    return [Line([corners[i], corners[(i + 1) % 4]]) for i in range(4)]
+
+
+def _contour_extent(piece):
+    contour = piece.get_outline_contour(SCALE).reshape(-1, 2)
+    return contour.max(axis=0) - contour.min(axis=0)
+
+
+@pytest.fixture
+def piece():
+    return PatternPiece("Square", pattern_lines=_square(4))
+
+
+def test_eviction_keeps_the_cache_within_its_byte_bound():
+    block = np.zeros(100, dtype=np.uint8)
+    cache = RenderCache(max_bytes=3 * block.nbytes)
+    for owner in range(3):
+        cache.put((owner, "contour"), block.copy())
+    cache.get((0, "contour")) # Now the most recently used
+    cache.put((3, "contour"), block.copy())
+
+    assert cache.size_bytes == 3 * block.nbytes
+    assert (1, "contour") not in cache
+    assert all((owner, "contour") in cache for owner in (0, 2, 3))
+
+    # A value larger than the whole cache is returned but never stored
+    large = np.zeros(4 * block.nbytes, dtype=np.uint8)
+    assert cache.put((4, "contour"), large) is large
+    assert (4, "contour") not in cache
+    assert cache.size_bytes <= cache.max_bytes
+
+
+def test_invalidate_drops_only_the_owners_entries():
+    cache = RenderCache()
+    cache.put((1, "contour", 50), np.zeros(10))
+    cache.put((1, "label_box", 50), (0, 0, 1, 1))
+    cache.put((2, "contour", 50), np.zeros(10))
+    cache.invalidate(1)
+
+    assert len(cache) == 1
+    assert (2, "contour", 50) in cache
+    assert cache.size_bytes == np.zeros(10).nbytes
+
+
+def test_replacing_geometry_invalidates_the_piece(piece):
+    piece.get_outline_contour(SCALE)
+    assert piece.get_bounding_box() == (0, 0, 4, 4)
+
+    piece.pattern_lines = _square(6)
+    assert not any(key[0] == piece._cache_id for key in RENDER_CACHE._entries)
+    assert piece.get_bounding_box() == (0, 0, 6, 6)
+    np.testing.assert_allclose(_contour_extent(piece), 6 * SCALE, atol=6)
+
+
+def test_in_place_edits_are_served_after_invalidate_cache(piece):
+    before = _contour_extent(piece)
+    for line in piece.pattern_lines:
+        line.points = [(2 * x, 2 * y) for x, y in line.points]
+    piece.invalidate_cache()
+
+    assert piece.get_bounding_box() == (0, 0, 8, 8)
+    np.testing.assert_allclose(_contour_extent(piece), 2 * before, atol=6)
+
+
+@pytest.mark.parametrize("make_copy", [
+    copy.deepcopy,
+    lambda piece: piece.rotated(90),
+    lambda piece: pickle.loads(pickle.dumps(piece)),
+], ids=["deepcopy", "rotated", "pickle"])
+def test_copies_do_not_share_cache_entries(piece, make_copy):
+    piece.get_outline_contour(SCALE)
+    duplicate = make_copy(piece)
+    assert duplicate._cache_id != piece._cache_id
+
+    # Editing the copy must not change what the original serves
+    duplicate.pattern_lines = _square(6)
+    duplicate.get_bounding_box()
+    assert piece.get_bounding_box() == (0, 0, 4, 4)
@@ -0,0 +1,35 @@
+import logging
+
+import pytest
+
+from conftest import SAMPLE_GARMENT_SPECS, SAMPLE_MEASUREMENTS
+from util.garment_specs import GarmentSpecs
+from util.measurements import Measurements
+from util.schema import SchemaError, load_yaml
+
+
+def test_load_yaml_returns_independent_data(tmp_path):
+    path = tmp_path / "specs.yaml"
+    path.write_text("seam_allowance: 0.5\n")
+    load_yaml(str(path))["seam_allowance"] = 2
+    assert load_yaml(str(path)) == {"seam_allowance": 0.5}
+
+
+def test_unknown_keys_are_logged_or_rejected(caplog):
+    data = {"bust": {"full bust": 36, "full bsut": 35}, "notes": "x"}
+    with caplog.at_level(logging.WARNING, logger="util.schema"):
+        measurements = Measurements(**data)
+    assert measurements.bust == 36
+    assert "'bust.full bsut'" in caplog.text and "'notes'" in caplog.text
+
+    with pytest.raises(SchemaError, match="bsut"):
+        Measurements(strict=True, **data)
+
+
+def test_shipped_samples_load_strictly(caplog):
+    with caplog.at_level(logging.WARNING, logger="util.schema"):
+        measurements = Measurements.from_file(SAMPLE_MEASUREMENTS, strict=True)
+        GarmentSpecs.from_file(SAMPLE_GARMENT_SPECS, strict=True)
+        Measurements.from_file(SAMPLE_MEASUREMENTS)
+    assert not caplog.records
+    assert (measurements.front_waist, measurements.back_waist) == (22.5, 21.5)
@@ -0,0 +1,57 @@
+import logging
+import math
+
+import pytest
+
+import draftBodiceSloper
+from util.line import Line
+from util.pattern_piece import PatternPiece
+from util.seam_matching import LENGTH_TOLERANCE_IN, MAX_ITERATIONS, SeamPair, closed_length, dart_openings, true_seams
+
+
+@pytest.mark.parametrize("side_ease, shoulder_ease", [(0.0, 0.0), (0.5, -0.25)])
+def test_true_seams_matches_closed_lengths(measurements, garment_specs, side_ease, shoulder_ease):
+    front, back = draftBodiceSloper.draft(measurements, garment_specs, finish=False)[:2]
+    shoulder = front.get_seam("Shoulder").points
+    pairs = [
+        SeamPair(front, "Side Seam", back, "Side Seam", vertex=-1, direction=(0, 1), ease=side_ease),
+        SeamPair(front, "Shoulder", back, "Shoulder", vertex=-1, direction=(shoulder[-1][0] - shoulder[0][0], shoulder[-1][1] - shoulder[0][1]), ease=shoulder_ease),
+    ]
+    openings = [dart_openings(front, front.get_seam(pair.seam)) for pair in pairs]
+    assert openings[0] > 0, "the bust dart should open on the side seam"
+
+    offsets = true_seams(pairs)
+
+    assert all(math.isfinite(offset) for offset in offsets)
+    if side_ease:
+        assert abs(offsets[0]) > 0.1
+    for pair, opening in zip(pairs, openings):
+        target = closed_length(back, pair.other_seam) + pair.ease
+        assert abs(closed_length(front, pair.seam) - target) <= LENGTH_TOLERANCE_IN
+        # Moving the seam end must not move the darts that open on the seam
+        assert dart_openings(front, front.get_seam(pair.seam)) == pytest.approx(opening, abs=1e-9)
+
+
+def _rectangle(name):
+    piece = PatternPiece(name)
+    piece.set_outline([
+        ("Left", Line.vertical(0, 10, 0)),
+        ("Top", Line.horizontal(0, 0, 5)),
+        ("Right", Line.vertical(5, 0, 10)),
+        ("Bottom", Line.horizontal(10, 5, 0)),
+    ])
+    return piece
+
+
+@pytest.mark.parametrize("direction, ease, max_iterations, reason", [
+    # Sliding sideways can only lengthen a straight seam, and has no effect at first
+    ((1, 0), -2.0, MAX_ITERATIONS, "does not change its length"),
+    ((0, 1), 1.0, 0, "not solved in 0 steps"),
+])
+def test_unreachable_targets_are_reported(caplog, direction, ease, max_iterations, reason):
+    piece, other = _rectangle("Front"), _rectangle("Back")
+    pair = SeamPair(piece, "Right", other, "Right", direction=direction, ease=ease)
+    with caplog.at_level(logging.WARNING, logger="util.seam_matching"):
+        true_seams([pair], max_iterations=max_iterations)
+    assert len(caplog.records) == 1
+    assert repr(pair) in caplog.text and reason in caplog.text
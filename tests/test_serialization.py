@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+import draftBodiceSloper
+from util.dart import Dart
+from util.serialization import LINE_GROUPS, dumps_pieces, load_pieces, loads_pieces, save_pieces
+
+
+def _points(lines):
+    return [None if line is None else np.asarray(line.points, dtype=float) for line in lines]
+
+
+def _assert_lines_equal(expected, actual, **tolerance):
+    assert len(expected) == len(actual)
+    for a, b in zip(_points(expected), _points(actual)):
+        assert (a is None) == (b is None)
+        if a is not None:
+            np.testing.assert_allclose(b, a, **tolerance)
+
+
+def _assert_pieces_equal(expected, actual, **tolerance):
+    assert (actual.name, actual.cut_count) == (expected.name, expected.cut_count)
+    for group in LINE_GROUPS:
+        _assert_lines_equal(getattr(expected, group), getattr(actual, group), **tolerance)
+    assert len(actual.marking_lines) == len(expected.marking_lines)
+    for a, b in zip(expected.marking_lines, actual.marking_lines):
+        assert isinstance(b, Dart) == isinstance(a, Dart)
+        if isinstance(a, Dart):
+            assert b.name == a.name
+            np.testing.assert_allclose(b.tip, a.tip, **tolerance)
+            _assert_lines_equal([a.seam_line, a.leg1, a.leg2, *a.extended_legs], [b.seam_line, b.leg1, b.leg2, *b.extended_legs], **tolerance)
+        else:
+            _assert_lines_equal([a], [b], **tolerance)
+    assert (actual.topology is None) == (expected.topology is None)
+    if expected.topology is not None:
+        assert list(actual.topology.names) == list(expected.topology.names)
+    assert actual.grainline[1] == expected.grainline[1]
+    _assert_lines_equal(expected.grainline[0], actual.grainline[0], **tolerance)
+
+
+@pytest.fixture
+def pieces(measurements, garment_specs):
+    return draftBodiceSloper.draft(measurements, garment_specs)
+
+
+def test_round_trip(pieces):
+    archive = loads_pieces(dumps_pieces(pieces))
+    assert len(archive) == len(pieces)
+    assert archive.names == [piece.name for piece in pieces]
+    for expected, actual in zip(pieces, archive):
+        _assert_pieces_equal(expected, actual, rtol=0, atol=0)
+
+
+def test_float32_round_trip_from_file(pieces, tmp_path):
+    path = str(tmp_path / "pieces.sppc")
+    save_pieces(pieces, path, dtype=np.float32)
+    archive = load_pieces(path)
+    for expected, actual in zip(pieces, archive):
+        _assert_pieces_equal(expected, actual, atol=1e-4)
+
+    view = archive.point_view(0, "pattern_lines", 0)
+    assert view.dtype == np.float32 and not view.flags.owndata
+    np.testing.assert_allclose(view, pieces[0].pattern_lines[0].points, atol=1e-4)
@@ -0,0 +1,22 @@
+import numpy as np
+import pytest
+
+import draftBodiceSloper
+from util.draw import draw_pattern
+from util.render_context import get_context
+
+SCALE = 30
+
+
+@pytest.mark.parametrize("canvas", ["color", "gray"])
+def test_dark_lines_on_light_background(measurements, garment_specs, canvas):
+    light = get_context(profile="production")._replace(canvas=canvas)
+    dark = light._replace(background_color=(255, 255, 255), line_color=(0, 0, 0))
+    pieces = draftBodiceSloper.draft(measurements, garment_specs, context=light)
+
+    on_black, _ = draw_pattern(SCALE, pieces, garment_specs.seam_allowance, None, "Test", output=False, context=light)
+    on_white, _ = draw_pattern(SCALE, pieces, garment_specs.seam_allowance, None, "Test", output=False, context=dark)
+
+    assert np.count_nonzero(on_white != 255) > 0
+    # Swapping the two colors draws the same pixels, inverted.
+    np.testing.assert_array_equal(on_white, 255 - on_black)
@@ -0,0 +1,77 @@
+import io
+import re
+import zlib
+
+import numpy as np
+
+from pdfManagement.streamingPdf import StreamingPdfWriter
+from pdfManagement.tileEncoding import encode_tile
+
+LETTER_POINTS = (612, 792)
+PREFIX = b"not part of the pdf\n"
+
+
+def _parse(pdf):
+    """Reads the xref table of a pdf and returns {object number: object body}."""
+    match = re.search(rb"startxref\n(\d+)\n%%EOF\n$", pdf)
+    assert match, "missing startxref"
+    xref = int(match.group(1))
+    header = re.match(rb"xref\n0 (\d+)\n", pdf[xref:])
+    assert header, "startxref does not point to the xref table"
+    count = int(header.group(1))
+    table = pdf[xref + header.end():xref + header.end() + 20 * count]
+    assert table[:20] == b"0000000000 65535 f \n"
+
+    objects = {}
+    for obj in range(1, count):
+        entry = table[20 * obj:20 * (obj + 1)]
+        assert entry.endswith(b" 00000 n \n")
+        offset = int(entry[:10])
+        assert pdf[offset:].startswith(f"{obj} 0 obj\n".encode()), f"xref offset of object {obj} is wrong"
+        objects[obj] = pdf[offset:pdf.index(b"endobj", offset)]
+    trailer = pdf[xref + header.end() + 20 * count:]
+    assert int(re.search(rb"/Size (\d+)", trailer).group(1)) == count
+    return objects, int(re.search(rb"/Root (\d+) 0 R", trailer).group(1))
+
+
+def _ref(body, key):
+    return int(re.search(rb"/" + key + rb" (\d+) 0 R", body).group(1))
+
+
+def _stream(body):
+    length = int(re.search(rb"/Length (\d+)", body).group(1))
+    start = body.index(b"stream\n") + len(b"stream\n")
+    return body[start:start + length]
+
+
+def test_xref_offsets_and_page_tree():
+    tile = np.full((40, 30), 255, dtype=np.uint8)
+    tile[10:30, 5:25] = 0
+    output = io.BytesIO()
+    output.write(PREFIX)
+    with StreamingPdfWriter(output, LETTER_POINTS) as pdf:
+        for page in range(3):
+            pdf.setFont("Helvetica-Bold", 10)
+            pdf.drawString(36, 36, f"Page {page + 1} (of 3)")
+            if page != 1:
+                pdf.draw_image(encode_tile(tile), 36, 72, 300, 400)
+            pdf.showPage()
+
+    data = output.getvalue()
+    assert data.startswith(PREFIX + b"%PDF-")
+    objects, root = _parse(data[len(PREFIX):])
+
+    pages = objects[_ref(objects[root], b"Pages")]
+    kids = [int(kid) for kid in re.findall(rb"(\d+) 0 R", re.search(rb"/Kids \[(.*?)\]", pages).group(1))]
+    assert int(re.search(rb"/Count (\d+)", pages).group(1)) == len(kids) == 3
+
+    for page, kid in enumerate(kids):
+        body = objects[kid]
+        assert b"/Type /Page " in body and b"/MediaBox [0 0 612 792]" in body
+        content = zlib.decompress(_stream(objects[_ref(body, b"Contents")]))
+        assert f"(Page {page + 1} \\(of 3\\)) Tj".encode() in content
+        images = re.findall(rb"/(Im\d+) (\d+) 0 R", body)
+        assert len(images) == (0 if page == 1 else 1)
+        for name, obj in images:
+            assert b"/" + name + b" Do" in content
+            assert b"/Subtype /Image" in objects[int(obj)]
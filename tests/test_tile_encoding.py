@@ -0,0 +1,56 @@
+import zlib
+
+import numpy as np
+import pytest
+
+from pdfManagement.tileEncoding import PNG_PREDICTOR, PNG_UP_FILTER, TILE_KINDS, encode_tile
+
+HEIGHT, WIDTH = 37, 53 # Not a multiple of 8, so bilevel rows are padded
+
+
+def _decode(encoded):
+    """Decodes Flate data with the PNG Up predictor back into rows of samples."""
+    assert encoded.filter == "FlateDecode"
+    assert encoded.decode_parms["Predictor"] == PNG_PREDICTOR
+    colors = encoded.decode_parms["Colors"]
+    row_bytes = -(-encoded.width * colors * encoded.bits_per_component // 8)
+    filtered = np.frombuffer(zlib.decompress(encoded.data), dtype=np.uint8).reshape(encoded.height, row_bytes + 1)
+    assert (filtered[:, 0] == PNG_UP_FILTER).all()
+    # Each row adds the one above, modulo 256
+    rows = np.cumsum(filtered[:, 1:], axis=0, dtype=np.uint64).astype(np.uint8)
+    if encoded.bits_per_component == 1:
+        return np.unpackbits(rows, axis=1)[:, :encoded.width] * np.uint8(255)
+    return rows.reshape(encoded.height, encoded.width, colors).squeeze(axis=2) if colors == 1 else rows.reshape(encoded.height, encoded.width, colors)
+
+
+def _tiles():
+    rng = np.random.default_rng(0)
+    bilevel = np.where(rng.random((HEIGHT, WIDTH)) < 0.2, 255, 0).astype(np.uint8)
+    gray = rng.integers(0, 256, (HEIGHT, WIDTH), dtype=np.uint8)
+    color = rng.integers(0, 256, (HEIGHT, WIDTH, 3), dtype=np.uint8)
+    tiles = {"bilevel": bilevel, "gray": gray, "color": color}
+    assert tuple(tiles) == TILE_KINDS
+    return tiles
+
+
+@pytest.mark.parametrize("kind, channels", [("bilevel", 1), ("bilevel", 3), ("gray", 1), ("gray", 3), ("color", 3)])
+def test_tiles_round_trip_exactly(kind, channels):
+    tile = _tiles()[kind]
+    if tile.ndim == 2 and channels == 3:
+        # Gray pixels stored as BGR are still encoded as one channel
+        tile = np.dstack([tile] * 3)
+
+    encoded = encode_tile(tile)
+    assert encoded.kind == kind
+    assert (encoded.width, encoded.height) == (WIDTH, HEIGHT)
+    assert encoded.color_space == ("DeviceRGB" if kind == "color" else "DeviceGray")
+    assert encoded.bits_per_component == (1 if kind == "bilevel" else 8)
+
+    expected = tile[..., ::-1] if kind == "color" else (tile if tile.ndim == 2 else tile[..., 0])
+    np.testing.assert_array_equal(_decode(encoded), expected)
+
+
+def test_jpeg_keeps_bilevel_tiles_exact():
+    tiles = _tiles()
+    assert encode_tile(tiles["bilevel"], jpeg_quality=80).filter == "FlateDecode"
+    assert encode_tile(tiles["gray"], jpeg_quality=80).filter == "DCTDecode"
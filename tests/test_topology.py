@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+from util.line import Line
+from util.pattern_piece import PatternPiece
+from util.topology import PieceTopology
+
+CORNERS = [(0, 0), (4, 0), (4, 3), (0, 3)]
+NAMES = ["Hem", "Side Seam", "Neckline", "Center Front"]
+
+
+def _edges(reverse=()):
+    """The edges of a 4 x 3 rectangle, drafting the named ones backwards."""
+    edges = []
+    for i, name in enumerate(NAMES):
+        points = [CORNERS[i], CORNERS[(i + 1) % 4]]
+        edges.append((name, Line(points[::-1] if name in reverse else points)))
+    return edges
+
+
+@pytest.mark.parametrize("reverse", [(), ("Hem",), ("Side Seam", "Center Front"), tuple(NAMES)])
+def test_edges_drafted_backwards_are_walked_in_ring_order(reverse):
+    topology = PieceTopology(_edges(reverse))
+    assert [topology.is_reversed(name) for name in NAMES] == [name in reverse for name in NAMES]
+    np.testing.assert_allclose(topology.vertices(), CORNERS)
+    np.testing.assert_allclose(topology.outline(), CORNERS)
+    assert topology.neighbours("Hem") == ("Center Front", "Side Seam")
+
+
+def test_gaps_within_the_tolerance_are_accepted():
+    edges = _edges()
+    edges[1] = ("Side Seam", Line([(4, 0.0005), (4, 3)]))
+    assert len(PieceTopology(edges)) == 4
+
+
+@pytest.mark.parametrize("index, message", [
+    (1, "'Neckline' does not meet 'Side Seam'"),
+    (3, "'Hem' does not meet 'Center Front'"),
+])
+def test_gaps_are_reported(index, message):
+    edges = _edges()
+    name, line = edges[index]
+    edges[index] = (name, Line([line.points[0], (line.points[1][0] + 0.5, line.points[1][1])]))
+    with pytest.raises(ValueError, match=message):
+        PieceTopology(edges)
+
+
+def test_repeated_names_are_rejected():
+    edges = _edges()
+    edges[2] = ("Hem", edges[2][1])
+    with pytest.raises(ValueError, match="unique"):
+        PieceTopology(edges)
+
+
+def test_replace_seam_updates_the_outline():
+    piece = PatternPiece("Front")
+    piece.set_outline(_edges())
+    old_neckline = piece.get_seam("Neckline")
+    curve = Line([(0, 3), (2, 3.5), (4, 3)]) # Drafted against the ring direction
+
+    assert piece.replace_seam("Neckline", curve) is old_neckline
+    assert piece.get_seam("Neckline") is curve
+    assert piece.pattern_lines == piece.topology.lines
+    assert old_neckline not in piece.pattern_lines
+    assert piece.topology.is_reversed("Neckline")
+    np.testing.assert_allclose(piece.get_outline(), [(0, 0), (4, 0), (4, 3), (2, 3.5), (0, 3)])
+
+
+def test_replace_seam_keeps_the_outline_when_the_line_does_not_fit():
+    piece = PatternPiece("Front")
+    piece.set_outline(_edges())
+    old_neckline = piece.get_seam("Neckline")
+
+    with pytest.raises(ValueError, match="does not meet"):
+        piece.replace_seam("Neckline", Line([(4, 3), (1, 3)]))
+    assert piece.get_seam("Neckline") is old_neckline
+    np.testing.assert_allclose(piece.get_outline(), CORNERS)
+
+
+def test_pieces_without_an_outline():
+    piece = PatternPiece("Front", pattern_lines=[line for _, line in _edges()])
+    assert piece.get_outline() is None
+    assert piece.get_seam("Neckline") is None
+    with pytest.raises(ValueError, match="no outline"):
+        piece.replace_seam("Neckline", Line([(4, 3), (0, 3)]))
@@ -3,14 +3,33 @@
 import cv2 as cv
 import numpy as np
 
+try:
+    from patternDrafting.util.instrumentation import span
+except ImportError: # Run as a standalone script without the repository root on the path
+    from contextlib import nullcontext as span
+
 threshold = 200
 min_bound_size = 100
 
-def find_pieces_from_image_file(imageFile, imageSize):
+def find_pieces_from_image_file(imageFile, imageSize, context=None):
     image = cv.imread(imageFile)
-    return find_pieces(image, imageSize)
+    return find_pieces(image, imageSize, context)
+
+def find_pieces(image, totalSize, context=None):
+    """
+    Cuts the pattern pieces out of a scanned pattern.
+
+    Args:
+        image: The scan.
+        totalSize: (width, height) of the scan in inches.
+        context: Optional RenderContext of the job; its `vision_threshold` replaces
+          the module default. Any object with that attribute works, so this
+          script does not depend on the drafting package.
+    """
+    with span("vision.find_pieces"):
+        return _find_pieces(image, totalSize, getattr(context, "vision_threshold", threshold))
 
-def find_pieces(image, totalSize):
+def _find_pieces(image, totalSize, threshold=threshold):
     assert image is not None, "image is not instantiated"
 
     grey = cv.cvtColor(image,cv.COLOR_BGR2GRAY)
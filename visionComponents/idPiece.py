@@ -1,10 +1,19 @@
 #!/usr/bin/python
 
 import cv2 as cv
-import easyocr as ocr
+
+_reader = None
+
+def _get_reader():
+  # easyocr pulls in torch, so only import it (and load the model) once text is actually extracted.
+  global _reader
+  if _reader is None:
+    import easyocr as ocr
+    _reader = ocr.Reader(['en'], gpu = True)
+  return _reader
           
 def extract_text(piece):
-  reader = ocr.Reader(['en'], gpu = True)
+  reader = _get_reader()
   text = reader.readtext(piece, detail=0, paragraph=True, rotation_info = [90, 180, 270])
   # lines = [l for l in text.split("\n", maxsplit=0) if l.strip() != ""]
   # return '\n'.join(lines)